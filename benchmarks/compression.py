@@ -0,0 +1,67 @@
+"""
+End-to-end wall time and size of compressed output against uncompressed output.
+
+Every case of benchmarks/suite.py runs once uncompressed and once per codec setting, each in a fresh
+process (the fastest of --repeat runs is kept). The table shows the generation time relative to the
+uncompressed run and the compression ratio, so the cost of compressing while generating can be
+weighed against the disk space and I/O it saves. zstd settings are skipped without zstandard.
+
+    python benchmarks/compression.py
+    python benchmarks/compression.py --cases sql:wellbore_data --scales 1000000 --settings gzip:1 gzip:6:4
+"""
+import argparse
+import importlib.util
+import json
+
+from suite import CASES, measure
+
+DEFAULT_SETTINGS = ["gzip:1", "gzip:6", "gzip:6:4", "zstd:3", "zstd:3:4"]
+
+
+def parse_setting(setting):
+    """ "codec[:level[:threads]]" -> (codec, level, threads)."""
+    codec, level, threads = (setting.split(":") + [None, None])[:3]
+    return codec, None if level is None else int(level), 1 if threads is None else int(threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cases", nargs="+", metavar="CASE", default=["batch:wellbore_data", "sql:wellbore_data",
+                                                                       "places"],
+                        help=f"any of {', '.join(CASES)}")
+    parser.add_argument("--scales", type=int, nargs="+", default=[100_000], help="rows per case")
+    parser.add_argument("--settings", nargs="+", default=DEFAULT_SETTINGS,
+                        help="codec:level:threads to compare with uncompressed output")
+    parser.add_argument("--engine", choices=["python", "numpy"], default="python", help="batch generator engine")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per setting, the fastest is kept")
+    parser.add_argument("--output", default="compression-results.json", help="where to write the results")
+    args = parser.parse_args()
+    settings = [parse_setting(setting) for setting in args.settings]
+    if importlib.util.find_spec("zstandard") is None:
+        settings = [setting for setting in settings if setting[0] != "zstd"]
+        print("zstandard is not installed, skipping zstd")
+
+    print(f"{'case':<22} {'rows':>9} {'output':<14} {'seconds':>8} {'vs plain':>9} {'MB':>9} {'ratio':>6}")
+    results = []
+    for case in args.cases:
+        for rows in args.scales:
+            plain = measure(case, rows, args.engine, args.repeat)
+            results.append(plain)
+            print(f"{case:<22} {rows:>9} {'uncompressed':<14} {plain['seconds']:>8.2f} {'':>9} "
+                  f"{plain['bytes'] / 1e6:>9.1f} {'':>6}")
+            for codec, level, threads in settings:
+                result = measure(case, rows, args.engine, args.repeat, codec, level, threads)
+                result.update(compression_level=level, compression_threads=threads)
+                results.append(result)
+                label = f"{codec}:{'default' if level is None else level} x{threads}"
+                print(f"{'':<22} {'':>9} {label:<14} {result['seconds']:>8.2f} "
+                      f"{result['seconds'] / plain['seconds'] - 1:>+9.0%} {result['bytes'] / 1e6:>9.1f} "
+                      f"{plain['bytes'] / result['bytes']:>6.1f}")
+
+    with open(args.output, "w") as f:
+        json.dump({"engine": args.engine, "repeat": args.repeat, "results": results}, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
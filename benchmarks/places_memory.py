@@ -0,0 +1,53 @@
+"""
+Peak memory of wellbore-oil-dataset-generator-with-places.py at growing row counts.
+
+Every scale runs the generator in a fresh process (2500 wells per city, as many cities as needed)
+and reads that process's peak RSS back from the kernel. With the streaming writer the peak should
+stay flat from 10k to 50M rows. Output goes to /dev/null unless --output-dir is given, 50M rows of
+CSV take about 10 GB of disk.
+
+    python benchmarks/places_memory.py
+    python benchmarks/places_memory.py --rows 10000 1000000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+GENERATOR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         "wellbore-oil-dataset-generator-with-places.py")
+WELLS_PER_CITY = 2500
+
+
+def run(rows, output, flush_rows):
+    cities = max(1, rows // WELLS_PER_CITY)
+    command = [sys.executable, GENERATOR, "--output", output, "--cities", str(cities),
+               "--min-wells", str(WELLS_PER_CITY), "--max-wells", str(WELLS_PER_CITY)]
+    if flush_rows:
+        command += ["--flush-rows", str(flush_rows)]
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start
+    if status != 0:
+        raise SystemExit(f"generator failed for {rows} rows")
+    return cities * WELLS_PER_CITY, elapsed, usage.ru_maxrss / 1024  # ru_maxrss is in KiB on Linux
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000, 50_000_000])
+    parser.add_argument("--flush-rows", type=int, help="override the generator's flush size")
+    parser.add_argument("--output-dir", help="keep the generated files here instead of discarding them")
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'seconds':>9} {'rows/s':>10} {'peak RSS MiB':>13}")
+    for rows in args.rows:
+        output = os.path.join(args.output_dir, f"places_{rows}.csv") if args.output_dir else os.devnull
+        written, elapsed, peak_mib = run(rows, output, args.flush_rows)
+        print(f"{written:>12} {elapsed:>9.1f} {written / elapsed:>10.0f} {peak_mib:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
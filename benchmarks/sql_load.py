@@ -0,0 +1,96 @@
+"""
+Load time of the SQL files of oil-and-gas-sql-data-generator.py into SQLite, per output mode.
+
+Each mode's files are generated into a temporary directory, then every table is loaded into a fresh
+file-backed SQLite database. INSERT files are run with executescript, like `sqlite3 db < file.sql`;
+COPY blocks, which SQLite does not understand, are read the way psql streams them and inserted with
+executemany. Rows are 100 per well.
+
+    python benchmarks/sql_load.py
+    python benchmarks/sql_load.py --wells 2000 --modes multi-insert copy
+"""
+import argparse
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+GENERATOR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         "oil-and-gas-sql-data-generator.py")
+TABLES = ["wellbore_data", "geophysical_logs"]
+
+
+def unescape_copy_value(value):
+    if value == "\\N":
+        return None
+    if "\\" not in value:
+        return value
+    return value.replace("\\t", "\t").replace("\\n", "\n").replace("\\\\", "\\")
+
+
+def load_copy_file(conn, path):
+    """Run the statements of a COPY file one by one, and insert the COPY data with executemany."""
+    statement = []
+    with open(path) as f:
+        for line in f:
+            if line.startswith("COPY "):
+                table, columns = line[len("COPY "):].split(" (", 1)
+                names = columns.split(")", 1)[0].split(", ")
+                insert = f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})"
+                rows = []
+                for data in f:
+                    if data == "\\.\n":
+                        break
+                    rows.append([unescape_copy_value(v) for v in data.rstrip("\n").split("\t")])
+                    if len(rows) >= 10_000:
+                        conn.executemany(insert, rows)
+                        rows.clear()
+                conn.executemany(insert, rows)
+                continue
+            statement.append(line)
+            if line.rstrip().endswith(";"):
+                conn.execute("".join(statement))
+                statement.clear()
+
+
+def load(path, mode):
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "load.db"), isolation_level=None)
+        start = time.perf_counter()
+        if mode == "copy":
+            load_copy_file(conn, path)
+        else:
+            with open(path) as f:
+                conn.executescript(f.read())
+        elapsed = time.perf_counter() - start
+        table = os.path.basename(path)[:-len(".sql")]
+        rows = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        conn.close()
+    return rows, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--wells", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per multi-row INSERT")
+    parser.add_argument("--modes", nargs="+", choices=["insert", "multi-insert", "copy"],
+                        default=["insert", "multi-insert", "copy"])
+    args = parser.parse_args()
+
+    print(f"{'mode':<14} {'table':<18} {'rows':>9} {'MB':>8} {'load s':>8} {'rows/s':>10}")
+    for mode in args.modes:
+        with tempfile.TemporaryDirectory() as output_dir:
+            subprocess.run([sys.executable, GENERATOR, "--mode", mode, "--wells", str(args.wells),
+                            "--batch-size", str(args.batch_size), "--output-dir", output_dir],
+                           check=True, stdout=subprocess.DEVNULL)
+            for table in TABLES:
+                path = os.path.join(output_dir, f"{table}.sql")
+                rows, elapsed = load(path, mode)
+                size_mb = os.path.getsize(path) / 1e6
+                print(f"{mode:<14} {table:<18} {rows:>9} {size_mb:>8.1f} {elapsed:>8.2f} {rows / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Throughput and memory of every generator entry point, compared against a stored baseline.
+
+Cases are the five batch datasets (generate_datasets, as used by the generate_* functions), the two
+SQL tables, the places generator and generate_bmw_telemetry_data. Each case runs at each scale in a
+fresh process, writing into a temporary directory; the child times the generation itself and the
+parent reads the child's peak RSS back from the kernel. Results (rows/s, bytes/s, peak RSS) go to a
+JSON file. Every case that got slower or bigger than the tolerance against the baseline (the committed
+benchmarks/baseline.json by default) is flagged and the exit status is 1, so a CI job fails on a
+regression; with --check, so does a missing baseline.
+
+    python benchmarks/suite.py
+    python benchmarks/suite.py --scales 10000 1000000 10000000 --cases batch:wellbore_data places
+    python benchmarks/suite.py --update-baseline     # store this machine's numbers
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from datagen.compress import compressed_path, open_compressed  # the generators' helpers live next to them
+from datagen.scripts import load_script
+BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+BATCH_DATASETS = ["wellbore_data", "geophysical_logs", "well_characterization", "seismic_data", "production_data"]
+CASES = ([f"batch:{name}" for name in BATCH_DATASETS] + ["sql:wellbore_data", "sql:geophysical_logs", "places",
+                                                          "telemetry"])
+SEED = 42
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def run_case(case, rows, output_dir, engine, compression=None, level=None, threads=1):
+    """Generate about rows rows of one case into output_dir, compressed with compression ("gzip" or
+    "zstd") at level on threads threads if given. Returns the rows actually generated."""
+    kind, _, name = case.partition(":")
+    if kind == "batch":
+        generator = load_script("oil-and-gas-batch-data-generator.py")
+        generator.ENGINE = engine
+        generator.COMPRESSION, generator.COMPRESSION_LEVEL, generator.COMPRESSION_THREADS = compression, level, threads
+        generator.NUM_RECORDS_PER_WELL = max(1, rows // generator.NUM_WELLS)
+        generator.generate_datasets([name], seed=SEED, output_dir=output_dir)
+        return generator.NUM_WELLS * generator.NUM_RECORDS_PER_WELL
+    if kind == "sql":
+        generator = load_script("oil-and-gas-sql-data-generator.py")
+        generator.NUM_WELLS = max(2, rows // generator.NUM_RECORDS_PER_WELL + 1)  # wells 1 .. NUM_WELLS - 1
+        generator.COMPRESSION, generator.COMPRESSION_LEVEL, generator.COMPRESSION_THREADS = compression, level, threads
+        getattr(generator, f"generate_{name}")("copy", seed=SEED, directory=output_dir)
+        return (generator.NUM_WELLS - 1) * generator.NUM_RECORDS_PER_WELL
+    if kind == "places":
+        generator = load_script("wellbore-oil-dataset-generator-with-places.py")
+        wells = min(rows, 2500)
+        places = generator.scaled_cities(max(1, rows // wells))
+        return generator.write_output(compressed_path(os.path.join(output_dir, "places.csv"), compression),
+                                      generator.generate_rows(places, wells, wells, seed=SEED),
+                                      compression=compression, compression_level=level, compression_threads=threads)
+    if kind == "telemetry":
+        simulator = load_script("bmw-live-streaming-data-simulator.py")
+        simulator.random.seed(SEED)
+        with open_compressed(compressed_path(os.path.join(output_dir, "telemetry.jsonl"), compression), "w",
+                             compression, level, threads) as f:
+            for _ in range(rows):
+                f.write(json.dumps(simulator.generate_bmw_telemetry_data()) + "\n")
+        return rows
+    raise ValueError(f"unknown case {case!r}")
+
+
+def child(case, rows, engine, compression=None, level=None, threads=1):
+    """Entry point of the measuring process: prints {rows, bytes, seconds} as JSON."""
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = time.perf_counter()
+        generated = run_case(case, rows, output_dir, engine, compression, level, threads)
+        seconds = time.perf_counter() - start
+        print(json.dumps({"rows": generated, "bytes": directory_size(output_dir), "seconds": seconds}))
+
+
+def measure(case, rows, engine, repeat=1, compression=None, level=None, threads=1):
+    """Best time (and the peak RSS of the same run) out of repeat runs, each in a fresh process.
+    bytes is the size of the output as written, i.e. compressed with compression."""
+    best = None
+    command = [sys.executable, os.path.abspath(__file__), "--child", case, str(rows), "--engine", engine,
+               "--compress-threads", str(threads)]
+    if compression:
+        command += ["--compress", compression]
+    if level is not None:
+        command += ["--compress-level", str(level)]
+    for _ in range(repeat):
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+        output = process.stdout.read()
+        _, status, usage = os.wait4(process.pid, 0)
+        if status != 0:
+            raise SystemExit(f"{case} failed at {rows} rows")
+        run = json.loads(output)
+        if best is None or run["seconds"] < best[0]["seconds"]:
+            best = run, usage
+    result, usage = best
+    return {
+        "case": case, "scale": rows, "compression": compression, "rows": result["rows"],
+        "seconds": round(result["seconds"], 4),
+        "rows_per_s": round(result["rows"] / result["seconds"], 1),
+        "bytes": result["bytes"], "bytes_per_s": round(result["bytes"] / result["seconds"], 1),
+        "peak_rss_mib": round(usage.ru_maxrss / 1024, 1),  # ru_maxrss is in KiB on Linux
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "-C", ROOT, "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """The (result, baseline result, reason) of every case that regressed beyond tolerance."""
+    previous = {(result["case"], result["scale"], result.get("compression")): result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = previous.get((result["case"], result["scale"], result.get("compression")))
+        if before is None:
+            continue
+        if result["rows_per_s"] < before["rows_per_s"] * (1 - tolerance):
+            regressions.append((result, before, "rows/s"))
+        if result["peak_rss_mib"] > before["peak_rss_mib"] * (1 + tolerance):
+            regressions.append((result, before, "peak RSS"))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cases", nargs="+", metavar="CASE", default=CASES,
+                        help=f"any of {', '.join(CASES)} (default: all)")
+    parser.add_argument("--scales", type=int, nargs="+", default=[10_000, 100_000], help="rows per case")
+    parser.add_argument("--engine", choices=["python", "numpy"], default="python", help="batch generator engine")
+    parser.add_argument("--compress", choices=["gzip", "zstd"], help="compress the outputs")
+    parser.add_argument("--compress-level", type=int, help="compression level (default: the codec's default)")
+    parser.add_argument("--compress-threads", type=int, default=1, help="compression threads per file")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case and scale, the fastest is kept")
+    parser.add_argument("--output", default="benchmark-results.json", help="where to write the results")
+    parser.add_argument("--baseline", default=BASELINE, help="results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="relative slowdown or memory growth flagged as a regression")
+    parser.add_argument("--update-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="fail when there is no baseline to compare against")
+    parser.add_argument("--child", nargs=2, metavar=("CASE", "ROWS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child[0], int(args.child[1]), args.engine, args.compress, args.compress_level,
+              args.compress_threads)
+        return
+    for case in args.cases:
+        if case not in CASES:
+            parser.error(f"unknown case {case!r}")
+
+    print(f"{'case':<28} {'rows':>10} {'seconds':>9} {'rows/s':>10} {'MB/s':>8} {'peak RSS MiB':>13}")
+    results = []
+    for case in args.cases:
+        for rows in args.scales:
+            result = measure(case, rows, args.engine, args.repeat, args.compress, args.compress_level,
+                             args.compress_threads)
+            results.append(result)
+            print(f"{case:<28} {result['rows']:>10} {result['seconds']:>9.2f} {result['rows_per_s']:>10.0f} "
+                  f"{result['bytes_per_s'] / 1e6:>8.1f} {result['peak_rss_mib']:>13.1f}")
+
+    report = {
+        "meta": {"date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                 "git": git_revision(), "python": platform.python_version(), "machine": platform.machine(),
+                 "cpus": os.cpu_count(), "engine": args.engine, "repeat": args.repeat,
+                 "compression": args.compress, "compression_level": args.compress_level,
+                 "compression_threads": args.compress_threads},
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline updated: {args.baseline}")
+    elif not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, nothing compared (--update-baseline stores one).")
+        if args.check:
+            raise SystemExit(1)
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for result, before, reason in regressions:
+            metric = "rows_per_s" if reason == "rows/s" else "peak_rss_mib"
+            print(f"REGRESSION {result['case']} at {result['scale']} rows: {reason} {before[metric]} -> "
+                  f"{result[metric]}")
+        if regressions:
+            raise SystemExit(1)
+        print(f"No regression beyond {args.tolerance:.0%} against {args.baseline} "
+              f"(git {baseline['meta'].get('git')}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Bytes per record and records per second of the telemetry encoders of
+bmw-live-streaming-data-simulator.py (json, template, binary).
+
+The records are generated up front from a fleet of Vehicle objects, so only encoding is timed,
+in batches like the fleet mode's BatchWriter writes them.
+
+    python benchmarks/telemetry_encoders.py
+    python benchmarks/telemetry_encoders.py --records 500000 --batch-size 5000
+"""
+import argparse
+import importlib.util
+import os
+import time
+
+SIMULATOR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         "bmw-live-streaming-data-simulator.py")
+
+
+def load_simulator():
+    spec = importlib.util.spec_from_file_location("bmw_live_streaming_data_simulator", SIMULATOR)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=200_000)
+    parser.add_argument("--vehicles", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3, help="best of this many runs")
+    args = parser.parse_args()
+
+    simulator = load_simulator()
+    cars = [simulator.Vehicle(f"BMW-{i:05d}") for i in range(args.vehicles)]
+    now = time.time()
+    items = [(now + i * 0.01, cars[i % args.vehicles].next_values(0.01)) for i in range(args.records)]
+    batches = [items[i:i + args.batch_size] for i in range(0, len(items), args.batch_size)]
+
+    print(f"{'encoder':<10} {'bytes/record':>13} {'records/s':>12}")
+    for name, encoder_class in simulator.ENCODERS.items():
+        encoder = encoder_class()
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            size = sum(len(encoder.encode_batch(batch)) for batch in batches)
+            best = min(best, time.perf_counter() - start)
+        print(f"{name:<10} {size / len(items):>13.1f} {len(items) / best:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
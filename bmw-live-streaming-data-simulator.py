@@ -7,46 +7,63 @@ You can change the 3% chance of error.
 Note: This is a very simplified simulation, and the actual BMW telemetric data
 """
 
+import argparse
+import asyncio
+import functools
+import math
 import random
+import sys
 import time
 import json
-from datetime import datetime
+import struct
+from datetime import datetime, timezone
 
+from datagen.eventlog import LogReader, LogWriter, read_header
+from datagen.seeding import new_seed, stream
+from datagen.transport import HTTP_CONNECTIONS, POLICIES, QUEUE_SIZE, transport_for
 
-def generate_bmw_telemetry_data():
 
-    def maybe_inject_error(value, error_range):
-        """
-        With 3% probability, create an artificial error by adding an offset
-        or completely throwing the value out of normal range.
-        """
-        if random.random() < 0.03:  # 3% probability
-            # For simplicity, let's assume error_range is a function that returns the erroneous value
-            return error_range(value)
-        return value
-
-    # Example error injection functions
-    def large_offset_error(val):
-        # Add a large offset (positive or negative) to simulate an obvious outlier
-        offset = random.uniform(-val * 2, val * 2)  # up to ±200% of the original
-        return round(val + offset, 2)
-
-    def completely_out_of_range_error(val):
-        # Generate a new random number that’s far outside normal operating range
-        return round(random.uniform(9999, 19999), 2)
-
-    # We can define different error behaviors for different metrics
-    def speed_error(val):
-        return large_offset_error(val)
-
-    def rpm_error(val):
-        # Maybe RPM error is entirely out of range
-        return completely_out_of_range_error(val)
-
-    def throttle_error(val):
-        # Throttle error might just invert or drastically offset
-        return large_offset_error(val)
+# Error injection is the same for every record, so it is defined once at module level
+def maybe_inject_error(value, error_range, rng=random):
+    """
+    With 3% probability, create an artificial error by adding an offset
+    or completely throwing the value out of normal range.
+    """
+    if rng.random() < 0.03:  # 3% probability
+        # For simplicity, let's assume error_range is a function that returns the erroneous value
+        return error_range(value, rng)
+    return value
+
+
+# Example error injection functions
+def large_offset_error(val, rng=random):
+    # Add a large offset (positive or negative) to simulate an obvious outlier
+    offset = rng.uniform(-val * 2, val * 2)  # up to ±200% of the original
+    return round(val + offset, 2)
+
+
+def completely_out_of_range_error(val, rng=random):
+    # Generate a new random number that’s far outside normal operating range
+    return round(rng.uniform(9999, 19999), 2)
+
 
+# We can define different error behaviors for different metrics
+def speed_error(val, rng=random):
+    return large_offset_error(val, rng)
+
+
+def rpm_error(val, rng=random):
+    # Maybe RPM error is entirely out of range
+    return completely_out_of_range_error(val, rng)
+
+
+def throttle_error(val, rng=random):
+    # Throttle error might just invert or drastically offset
+    return large_offset_error(val, rng)
+
+
+def generate_bmw_telemetry_data():
+    """One independent random record, see Vehicle for a stream with persistent state."""
     # Simulate driver behavior metrics
     speed = random.randint(0, 250)  # Speed in km/h
     rpm = random.randint(600, 8000)  # Engine RPM
@@ -111,18 +128,573 @@ def generate_bmw_telemetry_data():
     return data
 
 
-def main():
+class Vehicle:
     """
-    Continuously generates telemetric data for a BMW car, printing to stdout.
-    In practice, you can also send this to a file, message queue, or REST endpoint.
+    A simulated car with persistent state. Every call to next_record() advances the car by dt seconds
+    with cheap incremental updates: speed follows the throttle and brake, the odometer and GPS position
+    follow the speed, fuel and oil are consumed, temperatures drift towards their operating point.
+    Records therefore form a continuous stream per vehicle, with the same 3% error rate on speed, rpm
+    and throttle as generate_bmw_telemetry_data().
+
+    Everything is a rate per second, so the driving does not depend on dt (the emission rate): the
+    throttle is a random walk pulled towards THROTTLE_MEAN with noise scaling with sqrt(dt), braking
+    manoeuvres start BRAKE_RATE times per second on average and last a few seconds.
     """
+
+    THROTTLE_MEAN = 35.0  # %, the throttle the driver drifts back to
+    THROTTLE_PULL = 0.05  # per second
+    THROTTLE_NOISE = 10.0  # % per sqrt(second)
+    BRAKE_RATE = 0.05  # braking manoeuvres per second
+    BRAKE_SECONDS = (1.0, 4.0)  # duration range of a manoeuvre
+
+    __slots__ = (
+        "vehicle_id", "rng", "speed", "rpm", "throttle_position", "brake_pedal_pressure", "brake_time",
+        "steering_angle", "heading", "seatbelt_fastened", "engine_temperature", "oil_level", "tire_pressures",
+        "battery_voltage", "fuel_level", "latitude", "longitude", "gear_position", "ambient_temperature", "odometer",
+    )
+
+    def __init__(self, vehicle_id, rng=random):
+        self.vehicle_id = vehicle_id
+        self.rng = rng
+        # the fleet is already on the road, a car that starts parked takes about a minute to get going
+        self.throttle_position = rng.uniform(20, 50)  # %
+        self.speed = rng.uniform(0.5, 2.5) * self.throttle_position  # km/h
+        self.rpm = 800.0
+        self.brake_pedal_pressure = 0.0  # %
+        self.brake_time = 0.0  # seconds left of the current braking manoeuvre
+        self.steering_angle = 0.0  # degrees
+        self.heading = rng.uniform(0, 360)  # degrees, 0 = north
+        self.seatbelt_fastened = rng.random() < 0.95
+        self.engine_temperature = rng.uniform(70, 90)  # °C
+        self.oil_level = rng.uniform(3.5, 5.0)  # liters
+        self.tire_pressures = [rng.uniform(30, 35) for _ in range(4)]  # PSI, FL FR RL RR
+        self.battery_voltage = rng.uniform(12.4, 12.8)
+        self.fuel_level = rng.uniform(20, 100)  # %
+        self.latitude = rng.uniform(-60, 60)
+        self.longitude = rng.uniform(-180, 180)
+        self.gear_position = "D"
+        self.ambient_temperature = rng.uniform(-10, 40)  # °C
+        self.odometer = rng.uniform(0, 300000)  # km
+
+    def advance(self, dt):
+        """Move the simulation forward by dt seconds."""
+        rng = self.rng
+        event = rng.random()  # one draw decides the rare events of this step
+        root_dt = math.sqrt(dt)
+        # Driver: the throttle wanders, braking manoeuvres come and go, the car accelerates or slows down
+        throttle = self.throttle_position
+        throttle += ((self.THROTTLE_MEAN - throttle) * self.THROTTLE_PULL * dt
+                     + rng.gauss(0, self.THROTTLE_NOISE) * root_dt)
+        self.throttle_position = min(100.0, max(0.0, throttle))
+        if self.brake_time <= 0 and rng.random() < 1 - math.exp(-self.BRAKE_RATE * dt):
+            self.brake_time = rng.uniform(*self.BRAKE_SECONDS)
+            self.brake_pedal_pressure = rng.uniform(10, 100)
+        braking = max(0.0, min(self.brake_time, dt))  # seconds of this step spent braking
+        acceleration = self.throttle_position * 0.1 - self.speed * 0.03  # km/h/s, drag
+        self.speed = min(250.0, max(0.0, self.speed + acceleration * dt - self.brake_pedal_pressure * 0.3 * braking))
+        self.brake_time -= braking
+        if self.brake_time <= 0:
+            self.brake_pedal_pressure = 0.0
+        self.steering_angle = min(90.0, max(-90.0, self.steering_angle * 0.9 ** dt + rng.uniform(-5, 5) * root_dt))
+        if self.speed == 0.0:
+            self.gear_position = "P" if self.throttle_position < 5 else "N"
+        else:
+            self.gear_position = "S" if self.speed > 150 else "D"
+        self.rpm = min(8000.0, max(600.0, 800 + self.speed * 25 + self.throttle_position * 10))
+
+        # Position and odometer follow the distance driven
+        distance = self.speed * dt / 3600  # km
+        self.odometer += distance
+        self.heading = (self.heading + self.steering_angle * self.speed * dt / 1000) % 360
+        radians = math.radians(self.heading)
+        self.latitude = min(90.0, max(-90.0, self.latitude + distance * math.cos(radians) / 111.0))
+        self.longitude += distance * math.sin(radians) / (111.0 * max(0.01, math.cos(math.radians(self.latitude))))
+        self.longitude = (self.longitude + 180) % 360 - 180
+
+        # Consumables and temperatures
+        self.fuel_level -= distance * 0.01 + self.throttle_position * dt * 1e-5
+        if self.fuel_level < 5:
+            self.fuel_level = 100.0  # refuelled
+        self.oil_level = max(2.5, self.oil_level - distance * 1e-5)
+        target_temperature = 90 + self.throttle_position * 0.3
+        self.engine_temperature += (target_temperature - self.engine_temperature) * min(1.0, dt * 0.05)
+        self.ambient_temperature += (event - 0.5) * 0.02 * dt
+        self.battery_voltage = (14.2 if self.rpm > 1000 else 12.6) + (event - 0.5) * 0.2
+        if event < 0.01 * dt:  # slow leak in one tire, once every 100 seconds on average
+            tire = min(3, int(event / dt * 400))
+            self.tire_pressures[tire] = max(20.0, self.tire_pressures[tire] - 0.01)
+        if event > 1 - 1e-4 * dt:
+            self.seatbelt_fastened = not self.seatbelt_fastened
+
+    def values(self):
+        """The current state as a flat tuple in RECORD_FIELDS order, with errors injected into speed,
+        rpm and throttle. Encoders work on this tuple, so no dict is built per record."""
+        speed = round(self.speed)
+        rpm = round(self.rpm)
+        throttle_position = round(self.throttle_position, 2)
+        # One draw picks at most one faulty metric, each with the same 3% probability as maybe_inject_error
+        error = self.rng.random()
+        if error < 0.09:
+            if error < 0.03:
+                speed = speed_error(speed, self.rng)
+            elif error < 0.06:
+                rpm = rpm_error(rpm, self.rng)
+            else:
+                throttle_position = throttle_error(throttle_position, self.rng)
+        tires = self.tire_pressures
+        return (
+            self.vehicle_id, speed, rpm, throttle_position, round(self.brake_pedal_pressure, 2),
+            round(self.steering_angle, 2), self.seatbelt_fastened, round(self.engine_temperature, 2),
+            round(self.oil_level, 2), round(tires[0], 2), round(tires[1], 2), round(tires[2], 2),
+            round(tires[3], 2), round(self.battery_voltage, 2), round(self.fuel_level, 2),
+            round(self.latitude, 6), round(self.longitude, 6), self.gear_position,
+            round(self.ambient_temperature, 2), int(self.odometer),
+        )
+
+    def record(self, timestamp=None):
+        """The current state as a telemetry record, with errors injected into speed, rpm and throttle."""
+        return record_dict(timestamp or datetime.utcnow().isoformat(), self.values())
+
+    def next_record(self, dt, timestamp=None):
+        self.advance(dt)
+        return self.record(timestamp)
+
+    def next_values(self, dt):
+        self.advance(dt)
+        return self.values()
+
+
+RECORD_FIELDS = (
+    "vehicle_id", "speed_kmh", "rpm", "throttle_position_percent", "brake_pedal_pressure_percent",
+    "steering_angle_degrees", "seatbelt_fastened", "engine_temperature_celsius", "oil_level_liters",
+    "tire_front_left", "tire_front_right", "tire_rear_left", "tire_rear_right", "battery_voltage",
+    "fuel_level_percent", "latitude", "longitude", "gear_position", "ambient_temperature_celsius", "odometer_km",
+)
+
+
+def record_dict(timestamp, values):
+    """The nested telemetry record of one Vehicle.values() tuple."""
+    (vehicle_id, speed, rpm, throttle_position, brake_pedal_pressure, steering_angle, seatbelt_fastened,
+     engine_temperature, oil_level, tire_pressure_fl, tire_pressure_fr, tire_pressure_rl, tire_pressure_rr,
+     battery_voltage, fuel_level, latitude, longitude, gear_position, ambient_temperature, odometer) = values
+    return {
+        "timestamp": timestamp,
+        "vehicle_id": vehicle_id,
+        "vehicle_model": "BMW",
+        "speed_kmh": speed,
+        "rpm": rpm,
+        "throttle_position_percent": throttle_position,
+        "brake_pedal_pressure_percent": brake_pedal_pressure,
+        "steering_angle_degrees": steering_angle,
+        "seatbelt_fastened": seatbelt_fastened,
+        "engine_temperature_celsius": engine_temperature,
+        "oil_level_liters": oil_level,
+        "tire_pressure_psi": {
+            "front_left": tire_pressure_fl,
+            "front_right": tire_pressure_fr,
+            "rear_left": tire_pressure_rl,
+            "rear_right": tire_pressure_rr
+        },
+        "battery_voltage": battery_voltage,
+        "fuel_level_percent": fuel_level,
+        "location": {
+            "latitude": latitude,
+            "longitude": longitude
+        },
+        "gear_position": gear_position,
+        "ambient_temperature_celsius": ambient_temperature,
+        "odometer_km": odometer
+    }
+
+
+@functools.lru_cache(maxsize=64)
+def iso_second(second):
+    return datetime.fromtimestamp(second, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def iso_timestamp(timestamp):
+    """UTC ISO 8601 string of a time.time() value, the date part is cached per second."""
+    second = int(timestamp)
+    return f"{iso_second(second)}.{int((timestamp - second) * 1e6):06d}"
+
+
+# Encoders turn a batch of (time.time(), Vehicle.values()) items into the bytes of one write
+class JsonEncoder:
+    """Newline-delimited JSON through a dict per record and json.dumps, the reference encoding."""
+
+    def encode_batch(self, items):
+        return "".join(json.dumps(record_dict(iso_timestamp(timestamp), values)) + "\n"
+                       for timestamp, values in items).encode()
+
+
+class TemplateJsonEncoder:
+    """Newline-delimited JSON, byte for byte the same as JsonEncoder, formatted straight from the values
+    tuple with a template compiled once. String fields (vehicle id, gear) never need JSON escaping."""
+
+    def __init__(self):
+        fields = ", ".join([
+            '"timestamp": "{0}"', '"vehicle_id": "{1}"', '"vehicle_model": "BMW"', '"speed_kmh": {2!r}',
+            '"rpm": {3!r}', '"throttle_position_percent": {4!r}', '"brake_pedal_pressure_percent": {5!r}',
+            '"steering_angle_degrees": {6!r}', '"seatbelt_fastened": %s', '"engine_temperature_celsius": {8!r}',
+            '"oil_level_liters": {9!r}',
+            '"tire_pressure_psi": {{"front_left": {10!r}, "front_right": {11!r}, "rear_left": {12!r}, '
+            '"rear_right": {13!r}}}',
+            '"battery_voltage": {14!r}', '"fuel_level_percent": {15!r}',
+            '"location": {{"latitude": {16!r}, "longitude": {17!r}}}', '"gear_position": "{18}"',
+            '"ambient_temperature_celsius": {19!r}', '"odometer_km": {20!r}',
+        ])
+        template = "{{" + fields + "}}\n"
+        # the boolean is baked into two variants of the template instead of being converted per record
+        self.templates = {True: (template % "true").format, False: (template % "false").format}
+
+    def encode_batch(self, items):
+        templates = self.templates
+        return "".join(templates[values[6]](iso_timestamp(timestamp), *values)
+                       for timestamp, values in items).encode()
+
+
+class BinaryEncoder:
+    """Compact length-prefixed frames: a little-endian uint32 payload length, then the payload:
+    float64 timestamp, uint16 vehicle id length and the UTF-8 vehicle id, then the numeric fields
+    packed with a fixed struct (float32 measurements, float64 GPS position, uint32 odometer)."""
+
+    LENGTH = struct.Struct("<I")
+    HEAD = struct.Struct("<dH")
+    BODY = struct.Struct("<5f?8f2dcfI")
+
+    def __init__(self):
+        self.ids = {}
+
+    def encode_batch(self, items):
+        frames = []
+        ids = self.ids
+        length, head, body = self.LENGTH.pack, self.HEAD.pack, self.BODY.pack
+        for timestamp, values in items:
+            vehicle_id = ids.get(values[0])
+            if vehicle_id is None:
+                vehicle_id = ids[values[0]] = values[0].encode()
+            payload = (head(timestamp, len(vehicle_id)) + vehicle_id
+                       + body(*values[1:17], values[17].encode(), values[18], values[19]))
+            frames.append(length(len(payload)))
+            frames.append(payload)
+        return b"".join(frames)
+
+    @classmethod
+    def decode(cls, data):
+        """Yield the (timestamp, values) items of a buffer of complete frames."""
+        offset = 0
+        while offset < len(data):
+            (size,) = cls.LENGTH.unpack_from(data, offset)
+            offset += cls.LENGTH.size
+            timestamp, id_length = cls.HEAD.unpack_from(data, offset)
+            start = offset + cls.HEAD.size
+            vehicle_id = bytes(data[start:start + id_length]).decode()
+            fields = cls.BODY.unpack_from(data, start + id_length)
+            yield timestamp, (vehicle_id, *fields[:16], fields[16].decode(), *fields[17:])
+            offset += size
+
+
+ENCODERS = {"json": JsonEncoder, "template": TemplateJsonEncoder, "binary": BinaryEncoder}
+CONTENT_TYPES = {"json": "application/x-ndjson", "template": "application/x-ndjson",
+                 "binary": "application/octet-stream"}
+
+
+class FleetStats:
+    """Counts emitted records and keeps a bounded sample of emission lateness (jitter)."""
+
+    def __init__(self, max_samples=100_000):
+        self.events = 0
+        self.max_samples = max_samples
+        self.lateness = []
+        self.started = time.perf_counter()
+
+    def record(self, lateness):
+        self.events += 1
+        if len(self.lateness) < self.max_samples:
+            self.lateness.append(lateness)
+        else:  # reservoir sampling keeps the sample representative of the whole run
+            i = random.randrange(self.events)
+            if i < self.max_samples:
+                self.lateness[i] = lateness
+
+    def report(self, target_rate):
+        elapsed = time.perf_counter() - self.started
+        samples = sorted(self.lateness)
+        if samples:
+            mean = sum(samples) / len(samples)
+            p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+            jitter = f"jitter mean {mean * 1000:.2f} ms, p99 {p99 * 1000:.2f} ms, max {samples[-1] * 1000:.2f} ms"
+        else:
+            jitter = "no events yet"
+        return (f"{self.events} events in {elapsed:.1f}s, {self.events / elapsed:.0f} events/s "
+                f"(target {target_rate:.0f}), {jitter}")
+
+
+class BatchWriter:
+    """Coalesces records from all vehicles and flushes them in one write per batch.
+
+    Batches go to a transport (datagen.transport), by default the one of output: "-" for stdout, a
+    file path (compressed if it ends in .gz or .zst), tcp://host:port or unix:///path for a local
+    socket, fanout+tcp://host:port or fanout+unix:///path to serve subscribers, or
+    http://host:port/path to POST them to. With a recorder (a datagen.eventlog.LogWriter) every
+    record is also appended to its log, encoded on its own so it can be replayed record by record.
+
+    At most max_pending records (PENDING_BATCHES batches by default) wait for a flush: past that add()
+    waits, so a slow transport slows the vehicles down instead of the queue growing without bound.
+    """
+
+    PENDING_BATCHES = 4  # batches of records let wait for a flush by default
+
+    def __init__(self, output, batch_size=1000, flush_interval=0.05, encoder=None, recorder=None, transport=None,
+                 max_pending=None):
+        self.output = output
+        self.transport = transport or transport_for(output)
+        self.encoder = encoder or TemplateJsonEncoder()
+        self.recorder = recorder
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending or self.PENDING_BATCHES * batch_size
+        self.pending = []
+        self.full = asyncio.Event()
+        self.room = asyncio.Event()  # pending is below max_pending
+        self.room.set()
+        self.stopped = False
+
+    async def open(self):
+        await self.transport.open()
+
+    async def add(self, item):
+        """Queue one (time.time(), Vehicle.values()) item, first waiting for room in the queue."""
+        while len(self.pending) >= self.max_pending and not self.stopped:
+            self.room.clear()
+            await self.room.wait()
+        self.pending.append(item)
+        if len(self.pending) >= self.batch_size:
+            self.full.set()
+
+    async def flush(self):
+        if not self.pending:
+            return
+        if self.recorder is None:
+            data = self.encoder.encode_batch(self.pending)
+        else:
+            encode = self.encoder.encode_batch
+            payloads = [encode([item]) for item in self.pending]
+            self.recorder.append([(item[0], payload) for item, payload in zip(self.pending, payloads)])
+            data = b"".join(payloads)
+        self.pending = []
+        self.room.set()
+        await self.write(data)
+
+    async def write(self, data):
+        await self.transport.write(data)  # waits when a reader or endpoint is slow
+
+    async def run(self, stop):
+        try:
+            while not stop.is_set():
+                try:
+                    await asyncio.wait_for(self.full.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self.full.clear()
+                await self.flush()
+            await self.flush()
+        finally:
+            self.stopped = True  # nothing flushes anymore, add() must not wait for room
+            self.room.set()
+
+    async def close(self):
+        await self.transport.close()
+        report = self.transport.report()
+        if report:
+            print(report, file=sys.stderr)
+
+
+def vehicle_rng(seed, vehicle_id):
+    """The random stream of one vehicle, derived from the seed and its id, or the shared random
+    module when no seed is given."""
+    return random if seed is None else stream(seed, "vehicle", vehicle_id)
+
+
+async def vehicle(vehicle_id, rate_hz, writer, stats, stop, seed=None):
+    """Emit one record every 1 / rate_hz seconds on a fixed schedule, so late wake-ups show up as
+    jitter instead of silently lowering the rate."""
+    loop = asyncio.get_running_loop()
+    interval = 1 / rate_hz
+    car = Vehicle(vehicle_id, vehicle_rng(seed, vehicle_id))
+    scheduled = loop.time() + random.uniform(0, interval)  # stagger the fleet
+    while not stop.is_set():
+        await asyncio.sleep(scheduled - loop.time())
+        stats.record(max(0.0, loop.time() - scheduled))
+        await writer.add((time.time(), car.next_values(interval)))
+        scheduled += interval
+
+
+async def run_fleet(vehicles, rate_hz, output="-", duration=None, batch_size=1000, flush_interval=0.05,
+                    report_interval=5.0, encoding="template", seed=None, record=None, transport=None):
+    """Simulate a fleet of vehicles emitting rate_hz records per second each, through one BatchWriter.
+    With a seed every vehicle's values are reproducible (timestamps and emission times are not); record
+    is the path of an event log the stream is also appended to, to replay it exactly with replay().
+    transport is where the batches go (a datagen.transport transport), by default the one of output.
+    Progress and the final throughput/jitter report go to stderr. Returns the FleetStats."""
+    stop = asyncio.Event()
+    recorder = None if record is None else LogWriter(record, encoding)
+    writer = BatchWriter(output, batch_size, flush_interval, ENCODERS[encoding](), recorder, transport)
+    await writer.open()
+    stats = FleetStats()  # after open, which may wait for subscribers
+    writer_task = asyncio.create_task(writer.run(stop))
+    tasks = [asyncio.create_task(vehicle(f"BMW-{i:05d}", rate_hz, writer, stats, stop, seed))
+             for i in range(vehicles)]
+    target_rate = vehicles * rate_hz
+    deadline = None if duration is None else time.perf_counter() + duration
+    try:
+        while deadline is None or time.perf_counter() < deadline:
+            wait = report_interval if deadline is None else min(report_interval, deadline - time.perf_counter())
+            done, _ = await asyncio.wait([writer_task], timeout=max(0.0, wait))
+            if done:  # the writer only stops early when its transport failed, raised below
+                break
+            print(stats.report(target_rate), file=sys.stderr)
+    finally:
+        stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            await writer_task
+        finally:
+            await writer.close()
+            if recorder is not None:
+                recorder.close()
+    return stats
+
+
+async def replay(path, output="-", speed=1.0, start=None, end=None, batch_size=1000, flush_interval=0.05,
+                 transport=None):
+    """Write the records of the event log at path to output, from timestamp start to end, with their
+    recorded spacing divided by speed (None or 0 for as fast as possible). The bytes are the recorded
+    ones, original timestamps included, so every replay of a log is the same stream. The log is only
+    memory-mapped, any number of replays can read it at once. Returns the number of records."""
+    loop = asyncio.get_running_loop()
+    writer = BatchWriter(output, batch_size, flush_interval, transport=transport)
+    await writer.open()
+    records = 0
+    started = loop.time()
+    lateness = []
+    try:
+        with LogReader(path) as log:
+            for due, count, data in log.play(speed, start, end, batch_size, flush_interval):
+                delay = started + due - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                elif speed:
+                    lateness.append(-delay)
+                await writer.write(data)
+                records += count
+    finally:
+        await writer.close()
+    elapsed = max(loop.time() - started, 1e-9)
+    late = f", {len(lateness)} batches late by up to {max(lateness) * 1000:.1f} ms" if lateness else ""
+    print(f"Replayed {records} records in {elapsed:.2f}s, {records / elapsed:.0f} records/s{late}", file=sys.stderr)
+    return records
+
+
+def parse_timestamp(text):
+    """A time.time() value from seconds since the epoch or an ISO 8601 date (UTC unless it has an offset)."""
+    try:
+        return float(text)
+    except ValueError:
+        moment = datetime.fromisoformat(text)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def iter_records(vehicle_id="BMW-00000", seed=None, dt=1.0):
+    """Lazily yield the records of one vehicle, dt seconds of driving apart, without waiting between
+    them: an endless stream to islice, or to pace like main() does."""
+    car = Vehicle(vehicle_id, vehicle_rng(seed, vehicle_id))
     while True:
+        yield car.next_record(dt)
+
+
+def main(seed=None):
+    """
+    Continuously generates telemetric data for a BMW car, printing to stdout.
+    In practice, you can also send this to a file, message queue, or REST endpoint: see --fleet and
+    --output, which also serves the stream to subscribers or POSTs it to an HTTP endpoint.
+    """
+    for telemetry_data in iter_records(seed=seed):
 
-        telemetry_data = generate_bmw_telemetry_data()
         telemetry_json = json.dumps(telemetry_data)
         print(telemetry_json)
         time.sleep(1)  # Generate new data every second
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Simulate live BMW telemetry data.")
+    parser.add_argument("--fleet", type=int, metavar="N",
+                        help="simulate N vehicles concurrently instead of one record per second")
+    parser.add_argument("--rate", type=float, default=10.0, help="records per second per vehicle (fleet mode)")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds (fleet mode)")
+    parser.add_argument("--output", default="-",
+                        help="'-' for stdout, a file path (compressed if it ends in .gz or .zst), tcp://host:port "
+                             "or unix:///path to connect to, fanout+tcp://host:port or fanout+unix:///path to serve "
+                             "subscribers, http://host:port/path to POST batches to (fleet and replay modes)")
+    parser.add_argument("--encoding", choices=list(ENCODERS), default="template",
+                        help="json (dict + json.dumps), template (same JSON, faster) or binary frames (fleet mode)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="records per write (fleet and replay modes)")
+    parser.add_argument("--flush-interval", type=float, default=0.05,
+                        help="max seconds a record waits before being written (fleet and replay modes)")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE,
+                        help="batches queued per subscriber of a fanout+ output")
+    parser.add_argument("--slow-policy", choices=POLICIES, default="drop",
+                        help="when the queue of a subscriber is full: drop its oldest batch, block the stream "
+                             "until it catches up, or disconnect it")
+    parser.add_argument("--subscribers", type=int, default=0,
+                        help="wait for this many subscribers of a fanout+ output before starting")
+    parser.add_argument("--http-connections", type=int, default=HTTP_CONNECTIONS,
+                        help="keep-alive connections (concurrent POST requests) of an http:// output")
+    parser.add_argument("--seed", type=int, help="master seed, the same seed reproduces every vehicle's values")
+    parser.add_argument("--record", metavar="LOG",
+                        help="also append the stream to this indexed event log, to replay it (fleet mode)")
+    parser.add_argument("--replay", metavar="LOG", help="write the records of a recorded event log to --output "
+                                                        "instead of simulating, in its recorded encoding")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="replay speed, 1 for the recorded pace, N for N times faster, 0 for as fast as possible")
+    parser.add_argument("--start", type=parse_timestamp, metavar="TIME",
+                        help="replay from this time (epoch seconds or ISO 8601, UTC by default)")
+    parser.add_argument("--end", type=parse_timestamp, metavar="TIME", help="replay up to this time")
+    args = parser.parse_args()
+    if args.speed < 0:
+        parser.error("--speed must be positive, or 0 for as fast as possible")
+    if args.replay and (args.fleet or args.record):
+        parser.error("--replay cannot be combined with --fleet or --record")
+    if args.record and not args.fleet:
+        parser.error("--record requires --fleet")
+    if (args.start is not None or args.end is not None) and not args.replay:
+        parser.error("--start and --end require --replay")
+    if args.output.startswith("https://"):
+        parser.error("--output supports http:// endpoints only, not https://")
+    if args.queue_size < 1 or args.http_connections < 1:
+        parser.error("--queue-size and --http-connections must be at least 1")
+    encoding = read_header(args.replay) if args.replay else args.encoding
+    transport = transport_for(args.output, args.queue_size, args.slow_policy, args.subscribers,
+                              args.http_connections, CONTENT_TYPES.get(encoding, "application/octet-stream"))
+
+    if args.replay:
+        try:
+            asyncio.run(replay(args.replay, args.output, args.speed, args.start, args.end, args.batch_size,
+                               args.flush_interval, transport))
+        except KeyboardInterrupt:
+            pass
+        sys.exit()
+
+    seed = new_seed() if args.seed is None else args.seed
+    print(f"Seed: {seed}", file=sys.stderr)
+    if args.fleet:
+        try:
+            asyncio.run(run_fleet(args.fleet, args.rate, args.output, args.duration, args.batch_size,
+                                  args.flush_interval, encoding=args.encoding, seed=seed, record=args.record,
+                                  transport=transport))
+        except KeyboardInterrupt:
+            pass
+    else:
+        main(seed)
@@ -0,0 +1 @@
+"""Helpers shared by the data generator scripts in the repository root."""
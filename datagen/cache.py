@@ -0,0 +1,136 @@
+"""
+Content-addressed cache of generated datasets.
+
+A dataset is fully determined by the generator, its configuration, the seed and the code that
+produced it, so the finished output is stored under a hash of those and reused as long as none of
+them change. Hits are hard-linked into place when the cache is on the same filesystem (copied
+otherwise), so reusing even a multi-GB file takes milliseconds. Entries are kept read-only, since a
+hard link shares the file with the cache, and the least recently used ones are evicted once the
+cache grows past max_bytes.
+"""
+import hashlib
+import json
+import os
+import shutil
+import stat
+import tempfile
+import time
+
+MAX_BYTES = 10 * 1024 ** 3  # default cache size limit, 10 GiB
+
+_DATAGEN_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def code_version(*paths):
+    """Hash of the given source files and of the datagen package, which changes with the code."""
+    digest = hashlib.sha256()
+    datagen_sources = sorted(os.path.join(_DATAGEN_DIR, name) for name in os.listdir(_DATAGEN_DIR)
+                             if name.endswith(".py"))
+    for path in [*paths, *datagen_sources]:
+        with open(path, "rb") as source:
+            digest.update(hashlib.sha256(source.read()).digest())
+    return digest.hexdigest()
+
+
+def cache_key(generator, config, seed, version):
+    """The key of one output: (generator name, config dict, seed, code version)."""
+    payload = json.dumps([generator, config, seed, version], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def remove_output(path):
+    """Remove a previous output (file or directory), which may be a read-only link into the cache."""
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+
+def _place(source, destination):
+    remove_output(destination)
+    try:
+        os.link(source, destination)
+    except OSError:  # other filesystem, or links not supported
+        shutil.copyfile(source, destination)
+
+
+def _tree_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+class GenerationCache:
+    """A directory of entries <key>/<relative output paths>, evicted LRU by total size.
+
+    fetch() and store() take paths relative to an output directory, so an entry can hold a single
+    file or a directory of part files. hits and misses record the keys looked up, for reporting.
+    """
+
+    def __init__(self, directory, max_bytes=MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = []
+        self.misses = []
+        os.makedirs(directory, exist_ok=True)
+
+    def _entry(self, key):
+        return os.path.join(self.directory, key)
+
+    def fetch(self, key, output_dir, relative_path):
+        """Put the cached output at output_dir/relative_path and return True, or return False on a miss."""
+        entry = self._entry(key)
+        source = os.path.join(entry, relative_path)
+        if not os.path.lexists(source):
+            self.misses.append(key)
+            return False
+        destination = os.path.join(output_dir, relative_path)
+        if os.path.isdir(source):
+            remove_output(destination)
+            os.makedirs(destination)
+            for name in sorted(os.listdir(source)):
+                _place(os.path.join(source, name), os.path.join(destination, name))
+        else:
+            _place(source, destination)
+        now = time.time()
+        os.utime(entry, (now, now))  # entries are ordered by last use
+        self.hits.append(key)
+        return True
+
+    def store(self, key, output_dir, relative_path):
+        """Copy output_dir/relative_path into the cache, then evict entries over the size limit."""
+        entry = self._entry(key)
+        if os.path.exists(entry):
+            return
+        source = os.path.join(output_dir, relative_path)
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.directory)
+        target = os.path.join(staging, relative_path)
+        if os.path.isdir(source):
+            shutil.copytree(source, target)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(source, target)
+        for root, _, names in os.walk(staging):
+            for name in names:
+                os.chmod(os.path.join(root, name), stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        try:
+            os.rename(staging, entry)  # atomic, so a concurrent run never sees half an entry
+        except OSError:  # another run stored the same key first
+            shutil.rmtree(staging, ignore_errors=True)
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes. Returns the evicted keys."""
+        entries = []
+        for key in os.listdir(self.directory):
+            path = self._entry(key)
+            if key.startswith(".staging-") or not os.path.isdir(path):
+                continue
+            entries.append((os.path.getmtime(path), _tree_size(path), key))
+        total = sum(size for _, size, _ in entries)
+        evicted = []
+        for _, size, key in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(self._entry(key), ignore_errors=True)
+            total -= size
+            evicted.append(key)
+        return evicted
@@ -0,0 +1,187 @@
+"""
+Reference cleaner for the dirty datasets: the clean counterpart of a CSV file, made chunk by chunk
+on a process pool with every column cleaned by vectorized pyarrow.compute kernels.
+
+Every column has a Rule:
+    text     blanks and sentinels (ERROR, N/A, NULL, UNKNOWN...) become nulls
+    number   a unit suffix like " PSI" is stripped, whatever else is not a number becomes null, and
+             numbers outside low..high are clipped to the range (the generators' outliers are valid
+             values multiplied by 10-1000)
+    integer  a number, rounded to an int64
+    date     ISO, MM/DD/YYYY, DD-MM-YYYY and YYYY/MM/DD dates become ISO dates, impossible dates
+             (31/02/2023) and placeholders become nulls
+
+A file is split into byte ranges aligned on line starts, like datagen.quality does for profiling.
+A worker parses its range with pyarrow's CSV reader, cleans it and writes it to a part file, and the
+parts are concatenated in order (datagen.sinks.merge_files), so memory is bounded by the chunk size
+and the output is the same whatever the number of workers. Clean CSV has blanks for nulls, Parquet
+and Arrow output get typed columns (float64, int64, date32). Requires pyarrow.
+"""
+import collections
+import csv
+import io
+import os
+import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from datagen.quality import CHUNK_SIZE, SENTINELS, chunk_bounds, read_chunk, read_header
+from datagen.sinks import FORMATS, merge_files
+
+RULE_KINDS = ("text", "number", "integer", "date")
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%d-%m-%Y", "%Y/%m/%d")  # ISO first, then the corrupted formats
+NUMBER_PATTERN = r"^[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$"
+STATS = ("nulled", "clipped", "reformatted")
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.csv
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("the cleaning pipeline requires pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+
+class Rule:
+    def __init__(self, kind="text", low=None, high=None, unit=None):
+        if kind not in RULE_KINDS:
+            raise ValueError(f"unknown rule kind {kind!r}, expected one of {', '.join(RULE_KINDS)}")
+        self.kind = kind
+        self.low = low
+        self.high = high
+        self.unit = unit
+
+
+def rules_from_table(table, overrides=None):
+    """A Rule per column of a datagen.schema Table, numbers clipped to their column's low..high.
+    overrides maps column names to rules, e.g. for drilled and stratified depths, whose low and
+    high are not the range of the values."""
+    overrides = overrides or {}
+    rules = []
+    for column in table.columns:
+        if column.name in overrides:
+            rules.append(overrides[column.name])
+        elif column.kind == "date":
+            rules.append(Rule("date"))
+        elif column.is_text:
+            rules.append(Rule("text"))
+        elif column.kind in ("drilled", "stratified"):
+            rules.append(Rule("number"))
+        else:
+            rules.append(Rule("integer" if column.kind in ("integer", "sequence") else "number", column.low,
+                              column.high))
+    return rules
+
+
+def _count(pc, mask):
+    return pc.sum(mask).as_py() or 0
+
+
+def clean_column(pa, values, rule, sentinels=SENTINELS, stats=None):
+    """The cleaned array of a string array (blanks as ""), counting the cells changed into stats."""
+    pc = pa.compute
+    stats = collections.Counter() if stats is None else stats
+    values = pc.utf8_trim_whitespace(values)
+    if rule.unit:
+        values = pc.replace_substring_regex(values, r"\s*" + re.escape(rule.unit.strip()) + "$", "")
+    filled = pc.not_equal(values, "")
+    if rule.kind == "text":
+        invalid = pc.and_(filled, pc.is_in(values, value_set=pa.array(list(sentinels), pa.string())))
+        cleaned = pc.if_else(pc.or_(invalid, pc.invert(filled)), pa.scalar(None, pa.string()), values)
+    elif rule.kind == "date":
+        parsed = [pc.strptime(values, format=f, unit="s", error_is_null=True) for f in DATE_FORMATS]
+        cleaned = pc.cast(pc.coalesce(*parsed), pa.date32())
+        invalid = pc.and_(filled, pc.is_null(cleaned))
+        stats["reformatted"] += _count(pc, pc.and_(pc.is_null(parsed[0]), pc.is_valid(cleaned)))
+    else:
+        numeric = pc.match_substring_regex(values, NUMBER_PATTERN)
+        invalid = pc.and_(filled, pc.invert(numeric))
+        cleaned = pc.cast(pc.if_else(numeric, values, pa.scalar(None, pa.string())), pa.float64())
+        if rule.low is not None:
+            stats["clipped"] += _count(pc, pc.less(cleaned, rule.low))
+            cleaned = pc.max_element_wise(cleaned, rule.low, skip_nulls=False)
+        if rule.high is not None:
+            stats["clipped"] += _count(pc, pc.greater(cleaned, rule.high))
+            cleaned = pc.min_element_wise(cleaned, rule.high, skip_nulls=False)
+        if rule.kind == "integer":
+            cleaned = pc.cast(pc.round(cleaned), pa.int64())
+    stats["nulled"] += _count(pc, invalid)
+    return cleaned
+
+
+def clean_chunk(path, start, end, rules, part_path, output_format="csv", sentinels=SENTINELS):
+    """Clean the lines of path in [start, end) into part_path. Returns (rows, stats)."""
+    pa = import_pyarrow()
+    header, _ = read_header(path)
+    data = read_chunk(path, start, end)
+    if data:
+        table = pa.csv.read_csv(
+            io.BytesIO(data), read_options=pa.csv.ReadOptions(column_names=header, use_threads=False),
+            convert_options=pa.csv.ConvertOptions(column_types={name: pa.string() for name in header},
+                                                  strings_can_be_null=False))
+    else:
+        table = pa.table({name: pa.array([], pa.string()) for name in header})
+    stats = collections.Counter()
+    cleaned = pa.table([clean_column(pa, table.column(i), rule, sentinels, stats) for i, rule in enumerate(rules)],
+                       names=header)
+
+    if output_format == "csv":
+        line = io.StringIO()
+        csv.writer(line, lineterminator="\n").writerow(header)  # pyarrow would quote every name
+        header_line = line.getvalue().encode()
+        with open(part_path, "wb") as f:
+            f.write(header_line)
+            try:  # unquoted like the generators' CSV, unless a value holds a comma, quote or newline
+                pa.csv.write_csv(cleaned, f, pa.csv.WriteOptions(include_header=False, quoting_style="none"))
+            except pa.ArrowInvalid:
+                f.truncate(f.seek(len(header_line)))
+                pa.csv.write_csv(cleaned, f, pa.csv.WriteOptions(include_header=False, quoting_style="needed"))
+    elif output_format == "parquet":
+        pa.parquet.write_table(cleaned, part_path)
+    else:
+        with pa.ipc.new_file(part_path, cleaned.schema) as writer:
+            writer.write_table(cleaned)
+    return cleaned.num_rows, stats
+
+
+def clean_files(jobs, workers=1, chunk_size=CHUNK_SIZE, output_format="csv", sentinels=SENTINELS):
+    """Clean every (path, output_path, rules) job in turn, the chunks of a file spread over workers
+    processes. Returns a summary per job: rows, bytes read, seconds, throughput and the counts of
+    nulled, clipped and reformatted cells."""
+    if output_format not in FORMATS:
+        raise ValueError(f"unknown output format {output_format!r}, expected one of {', '.join(FORMATS)}")
+    import_pyarrow()  # fail before starting the pool
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    summaries = []
+    try:
+        for path, output_path, rules in jobs:
+            started = time.perf_counter()
+            size = os.path.getsize(path)
+            bounds = chunk_bounds(path, chunk_size) or [(size, size)]  # a header-only file gives a header-only one
+            parts_dir = tempfile.mkdtemp(prefix=".clean-", dir=os.path.dirname(os.path.abspath(output_path)))
+            try:
+                parts = [os.path.join(parts_dir, f"part-{i:05d}{FORMATS[output_format]}") for i in range(len(bounds))]
+                n = len(bounds)
+                args = ([path] * n, *zip(*bounds), [rules] * n, parts, [output_format] * n, [sentinels] * n)
+                results = list(pool.map(clean_chunk, *args) if pool else map(clean_chunk, *args))
+                merge_files(parts, output_path, output_format)
+            finally:
+                shutil.rmtree(parts_dir)
+            seconds = time.perf_counter() - started
+            rows = sum(result[0] for result in results)
+            stats = sum((result[1] for result in results), collections.Counter())
+            summaries.append({
+                "path": path, "output": output_path, "rows": rows, "bytes": size, "seconds": round(seconds, 4),
+                "rows_per_s": round(rows / seconds, 1), "mb_per_s": round(size / 1e6 / seconds, 2),
+                **{stat: stats[stat] for stat in STATS},
+            })
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return summaries
@@ -0,0 +1,184 @@
+"""
+Streaming gzip / zstd output, compressed on background threads in independent chunks.
+
+CompressedWriter buffers what is written to it and cuts it into chunk_size chunks. Each chunk is
+compressed on its own (a gzip member or a zstd frame) by a thread pool while the generator keeps
+producing rows; zlib and zstandard release the GIL while they compress, so the two overlap. The
+members are written in order, so the output is the same whatever the number of threads, and it is
+an ordinary file for gzip -d / zcat / zstd -d and for gzip.open.
+
+Every member records its own compressed size, so a reader can find all members without
+decompressing anything and decompress them in parallel (iter_decompressed):
+    gzip  a FEXTRA subfield "DG" holding the member size (like the BGZF blocks of bgzip)
+    zstd  a skippable frame before each frame, holding the frame size
+zstd requires the zstandard package, which is only imported when it is used.
+"""
+import collections
+import io
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+CODECS = {"gzip": ".gz", "zstd": ".zst"}
+DEFAULT_LEVELS = {"gzip": 6, "zstd": 3}
+CHUNK_SIZE = 4 * 1024 * 1024  # uncompressed bytes per member
+
+_GZIP_HEADER = struct.Struct("<4sIBBH2sHI")  # magic+CM+FLG, MTIME, XFL, OS, XLEN, SI1SI2, LEN, member size
+_ZSTD_SKIPPABLE = struct.Struct("<IIL")  # magic, frame size (4), size of the following frame
+_ZSTD_SKIPPABLE_MAGIC = 0x184D2A5E
+
+
+def import_zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstd compression requires zstandard (pip install zstandard)") from None
+    return zstandard
+
+
+def codec_for_path(path):
+    """The codec of a path from its extension, or None for an uncompressed file."""
+    for codec, extension in CODECS.items():
+        if path.endswith(extension):
+            return codec
+    return None
+
+
+def compressed_path(path, codec):
+    """path with the extension of codec, unless it already has it."""
+    if codec is None or path.endswith(CODECS[codec]):
+        return path
+    return path + CODECS[codec]
+
+
+def gzip_member(data, level=DEFAULT_LEVELS["gzip"]):
+    """One gzip member holding data, with its total size in the header."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    body = compressor.compress(data) + compressor.flush()
+    trailer = struct.pack("<II", zlib.crc32(data), len(data) & 0xFFFFFFFF)
+    size = _GZIP_HEADER.size + len(body) + len(trailer)
+    return _GZIP_HEADER.pack(b"\x1f\x8b\x08\x04", 0, 0, 255, 8, b"DG", 4, size) + body + trailer
+
+
+def zstd_frame(data, level=DEFAULT_LEVELS["zstd"]):
+    """One zstd frame holding data, preceded by a skippable frame with its size."""
+    frame = import_zstandard().ZstdCompressor(level=level, write_content_size=True).compress(data)
+    return _ZSTD_SKIPPABLE.pack(_ZSTD_SKIPPABLE_MAGIC, 4, len(frame)) + frame
+
+
+class CompressedWriter(io.BufferedIOBase):
+    """A binary file object writing codec-compressed members of chunk_size bytes to path.
+
+    threads compress members concurrently, at most 2 * threads are in flight so memory stays
+    bounded. flush() writes out the finished members but does not cut the chunk being filled;
+    end_member() does, e.g. so the header of a file is a member of its own.
+    """
+
+    def __init__(self, path, codec="gzip", level=None, threads=1, chunk_size=CHUNK_SIZE, mode="wb"):
+        if codec not in CODECS:
+            raise ValueError(f"unknown codec {codec!r}, expected one of {', '.join(CODECS)}")
+        if codec == "zstd":
+            import_zstandard()
+        self.codec = codec
+        self.level = DEFAULT_LEVELS[codec] if level is None else level
+        self.chunk_size = chunk_size
+        self.compress = gzip_member if codec == "gzip" else zstd_frame
+        self.file = open(path, mode)
+        self.buffer = bytearray()
+        self.pool = ThreadPoolExecutor(max_workers=threads)
+        self.max_pending = 2 * threads
+        self.pending = collections.deque()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer += data
+        while len(self.buffer) >= self.chunk_size:
+            self._submit(bytes(self.buffer[:self.chunk_size]))
+            del self.buffer[:self.chunk_size]
+        return len(data)
+
+    def _submit(self, chunk):
+        self.pending.append(self.pool.submit(self.compress, chunk, self.level))
+        while len(self.pending) > self.max_pending:
+            self.file.write(self.pending.popleft().result())
+
+    def end_member(self):
+        """Compress what was written since the last member as a member of its own."""
+        if self.buffer:
+            self._submit(bytes(self.buffer))
+            self.buffer.clear()
+
+    def flush(self):
+        while self.pending:
+            self.file.write(self.pending.popleft().result())
+        self.file.flush()
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            self.end_member()
+            super().close()  # flushes
+        finally:
+            self.pool.shutdown()
+            self.file.close()
+
+
+def open_compressed(path, mode="w", codec=None, level=None, threads=1, chunk_size=CHUNK_SIZE):
+    """Open path for writing ("w"/"a" text, "wb"/"ab" binary), compressed with codec (by default the
+    one of its extension) or as a plain file when there is none. Appending adds members."""
+    codec = codec or codec_for_path(path)
+    binary = "b" in mode
+    if codec is None:
+        return open(path, mode) if binary else open(path, mode, newline="")
+    raw = CompressedWriter(path, codec, level, threads, chunk_size, mode[0] + "b")
+    return raw if binary else io.TextIOWrapper(raw, newline="")
+
+
+def iter_members(path):
+    """(offset, size) of every member of a file written by CompressedWriter, read from the headers."""
+    codec = codec_for_path(path)
+    with open(path, "rb") as f:
+        offset = 0
+        while True:
+            if codec == "gzip":
+                header = f.read(_GZIP_HEADER.size)
+                if not header:
+                    return
+                magic, _, _, _, _, subfield, _, size = _GZIP_HEADER.unpack(header)
+                if magic != b"\x1f\x8b\x08\x04" or subfield != b"DG":
+                    raise ValueError(f"{path}: member at {offset} has no size, it was not written by CompressedWriter")
+                f.seek(offset + size)
+            else:
+                header = f.read(_ZSTD_SKIPPABLE.size)
+                if not header:
+                    return
+                magic, _, frame_size = _ZSTD_SKIPPABLE.unpack(header)
+                if magic != _ZSTD_SKIPPABLE_MAGIC:
+                    raise ValueError(f"{path}: frame at {offset} has no size, it was not written by CompressedWriter")
+                size = _ZSTD_SKIPPABLE.size + frame_size
+                f.seek(offset + size)
+            yield offset, size
+            offset += size
+
+
+def decompress_member(data, codec):
+    if codec == "gzip":
+        return zlib.decompress(data, zlib.MAX_WBITS | 16)
+    return import_zstandard().ZstdDecompressor().decompress(data[_ZSTD_SKIPPABLE.size:])
+
+
+def iter_decompressed(path, threads=4):
+    """Yield the decompressed members of path in order, decompressing up to threads at a time."""
+    codec = codec_for_path(path)
+    with open(path, "rb") as f, ThreadPoolExecutor(max_workers=threads) as pool:
+        pending = collections.deque()
+        for offset, size in iter_members(path):
+            f.seek(offset)
+            pending.append(pool.submit(decompress_member, f.read(size), codec))
+            if len(pending) >= 2 * threads:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,39 @@
+"""
+Precomputed date tables for the date columns of the generators.
+
+Drawing a date is a random day offset into a range; formatting it (date arithmetic plus strftime or
+isoformat) costs far more than the draw. A DatePool formats every day of its range once, as an ISO
+string, so a clean date is a list lookup. Other formats are only produced for the offsets that
+need them, e.g. the rare badly formatted dates. Pools are cached per range, a range of 20 years is
+about 7300 strings.
+"""
+import datetime
+import functools
+
+
+class DatePool:
+    """The days from start to start + days (inclusive), iso[offset] is start + offset days as "YYYY-MM-DD"."""
+
+    __slots__ = ("start", "iso", "last")
+
+    def __init__(self, start, days):
+        first = start.toordinal()
+        self.start = start
+        self.iso = tuple(datetime.date.fromordinal(first + offset).isoformat() for offset in range(days + 1))
+        self.last = days  # the largest offset, for rng.randint(0, pool.last)
+
+    def strftime(self, offset, date_format):
+        return (self.start + datetime.timedelta(days=offset)).strftime(date_format)
+
+
+@functools.lru_cache(maxsize=None)
+def date_pool(start, days):
+    """The cached DatePool of start to start + days days."""
+    return DatePool(start, days)
+
+
+@functools.lru_cache(maxsize=None)
+def year_pool(start_year, end_year):
+    """The cached DatePool of January 1st of start_year to December 31st of end_year."""
+    start = datetime.date(start_year, 1, 1)
+    return date_pool(start, (datetime.date(end_year, 12, 31) - start).days)
@@ -0,0 +1,210 @@
+"""
+Append-only log of timestamped records, to capture a stream once and replay it as often as needed.
+
+A log file starts with a header (magic and the name of the encoding of the payloads), then holds
+one entry per record:
+
+    timestamp  float64, the time.time() at which the record was produced
+    size       uint32, the size of the payload
+    payload    the bytes of the record as they were streamed (a JSON line, a binary frame...)
+
+Entries are only ever appended, in the order they were produced, so timestamps do not decrease. A
+sparse index next to the log (path + ".idx") holds a (timestamp, offset) pair every INDEX_EVERY
+bytes of log: seeking to a timestamp bisects the index and scans at most INDEX_EVERY bytes. The
+index is written after the log and only ever points at complete entries; when it is missing or
+behind, readers scan from its last pair, and reopening a log for appending drops a torn last entry.
+
+LogReader memory-maps the log read-only. Any number of readers, in one process or many, share the
+pages of the OS cache with no locking, each with its own position, and they can open a log that is
+still being recorded: a reader sees the entries complete when it was opened. Payloads are sliced
+from the map, so replaying at full speed costs a copy of the bytes and no decoding.
+"""
+import bisect
+import mmap
+import os
+import struct
+
+MAGIC = b"DGEVLOG1"
+INDEX_MAGIC = b"DGEVIDX1"
+HEADER = struct.Struct("<8s16s")  # magic, encoding name (NUL padded)
+ENTRY = struct.Struct("<dI")  # timestamp, payload size
+INDEX_ENTRY = struct.Struct("<dQ")  # timestamp, offset of the entry in the log
+INDEX_EVERY = 64 * 1024  # bytes of log between two index pairs
+
+
+def index_path(path):
+    return path + ".idx"
+
+
+def read_header(path):
+    """The encoding name of the log at path."""
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size or header[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not an event log")
+    return HEADER.unpack(header)[1].rstrip(b"\0").decode()
+
+
+def read_index(path):
+    """The (timestamp, offset) pairs of the index of the log at path, [] if there is none."""
+    try:
+        with open(index_path(path), "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return []
+    if data[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+        raise ValueError(f"{index_path(path)} is not an event log index")
+    end = len(data) - (len(data) - len(INDEX_MAGIC)) % INDEX_ENTRY.size  # a pair being written is ignored
+    return list(INDEX_ENTRY.iter_unpack(memoryview(data)[len(INDEX_MAGIC):end]))
+
+
+def scan_entries(data, offset, end):
+    """Yield (timestamp, offset, size) of the complete entries of data in [offset, end)."""
+    unpack = ENTRY.unpack_from
+    while offset + ENTRY.size <= end:
+        timestamp, size = unpack(data, offset)
+        if offset + ENTRY.size + size > end:
+            return
+        yield timestamp, offset, size
+        offset += ENTRY.size + size
+
+
+class LogWriter:
+    """Appends entries to the log at path, creating it (and its index) or continuing an existing one,
+    whose encoding must be the same."""
+
+    def __init__(self, path, encoding, index_every=INDEX_EVERY):
+        self.path = path
+        self.index_every = index_every
+        index = []
+        if os.path.exists(path) and os.path.getsize(path) >= HEADER.size:
+            if read_header(path) != encoding:
+                raise ValueError(f"{path} holds {read_header(path)} records, not {encoding}")
+            index = read_index(path)
+            size = self._recover(index)
+        else:
+            with open(path, "wb") as f:
+                f.write(HEADER.pack(MAGIC, encoding.encode()))
+            with open(index_path(path), "wb") as f:
+                f.write(INDEX_MAGIC)
+            size = HEADER.size
+        self.file = open(path, "ab")
+        self.index = open(index_path(path), "ab")
+        self.offset = size
+        self.next_index = index[-1][1] + index_every if index else size
+
+    def _recover(self, index):
+        """Truncate a torn last entry and drop the index pairs past the end of the log, scanning the
+        log from its last index pair. Returns the size of the log."""
+        end = os.path.getsize(self.path)
+        while index and index[-1][1] >= end:
+            index.pop()
+        size = index[-1][1] if index else HEADER.size
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for _, offset, entry_size in scan_entries(data, size, end):  # only the tail past the last index pair
+                size = offset + ENTRY.size + entry_size
+        if size < end:
+            with open(self.path, "r+b") as f:
+                f.truncate(size)
+        with open(index_path(self.path), "wb") as f:
+            f.write(INDEX_MAGIC + b"".join(INDEX_ENTRY.pack(*pair) for pair in index))
+        return size
+
+    def append(self, items):
+        """Append the (timestamp, payload) items, in order, in one write."""
+        parts = []
+        pairs = []
+        offset, next_index = self.offset, self.next_index
+        pack = ENTRY.pack
+        for timestamp, payload in items:
+            if offset >= next_index:
+                pairs.append(INDEX_ENTRY.pack(timestamp, offset))
+                next_index = offset + self.index_every
+            parts.append(pack(timestamp, len(payload)))
+            parts.append(payload)
+            offset += ENTRY.size + len(payload)
+        self.file.write(b"".join(parts))
+        self.offset, self.next_index = offset, next_index
+        if pairs:
+            self.file.flush()  # the index never points past the log
+            self.index.write(b"".join(pairs))
+
+    def flush(self):
+        self.file.flush()
+        self.index.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class LogReader:
+    """A read-only memory map of the log at path, as it was when it was opened."""
+
+    def __init__(self, path):
+        self.path = path
+        self.encoding = read_header(path)
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.end = len(self.map)
+        self.index = [pair for pair in read_index(path) if pair[1] < self.end]
+        self.index_timestamps = [timestamp for timestamp, _ in self.index]
+
+    def seek(self, timestamp):
+        """Offset of the first entry at or after timestamp (the end of the log if there is none)."""
+        i = bisect.bisect_left(self.index_timestamps, timestamp)
+        start = self.index[i - 1][1] if i else HEADER.size
+        for entry_timestamp, offset, _ in scan_entries(self.map, start, self.end):
+            if entry_timestamp >= timestamp:
+                return offset
+        return self.end
+
+    def entries(self, start=None, end=None):
+        """Yield (timestamp, offset, size) of the entries from timestamp start (inclusive) to timestamp
+        end (exclusive), by default the whole log."""
+        offset = HEADER.size if start is None else self.seek(start)
+        for entry in scan_entries(self.map, offset, self.end):
+            if end is not None and entry[0] >= end:
+                return
+            yield entry
+
+    def play(self, speed=1.0, start=None, end=None, batch_size=1000, interval=0.05):
+        """Yield (due, count, data) batches of consecutive payloads to replay the log: due is when
+        data should be written, in seconds from the start of the replay, for the records to keep their
+        recorded spacing divided by speed. A batch spans at most interval seconds of replay (its
+        records wait like they did in the live stream's batches) and batch_size records. speed None
+        or 0 replays as fast as possible, every due is 0."""
+        data = self.map
+        header = ENTRY.size
+        window = interval * speed if speed else None
+        first = None
+        batch = []
+        batch_start = batch_last = None
+        for timestamp, offset, size in self.entries(start, end):
+            if first is None:
+                first = timestamp
+            if batch and (len(batch) >= batch_size or (window is not None and timestamp - batch_start > window)):
+                yield (batch_last - first) / speed if speed else 0.0, len(batch), b"".join(batch)
+                batch = []
+            if not batch:
+                batch_start = timestamp
+            batch.append(data[offset + header:offset + header + size])
+            batch_last = timestamp
+        if batch:
+            yield (batch_last - first) / speed if speed else 0.0, len(batch), b"".join(batch)
+
+    def close(self):
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
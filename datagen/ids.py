@@ -0,0 +1,86 @@
+"""
+Unique ids at any scale without remembering the ones handed out.
+
+FeistelPermutation is a keyed bijection of range(size): a balanced Feistel network over the
+smallest even number of bits that covers size, with cycle walking to stay inside the range. Index
+i always maps to the same id for a given key, different indexes never share one, and the id can be
+mapped back to its index. Each id takes a few integer operations and no memory, so the id space can
+be billions wide.
+
+IdAllocator numbers the entities of a generator 0, 1, 2... and turns those indexes into scattered
+ids, optionally reusing an earlier id at a configured rate when duplicates are wanted.
+"""
+import random
+
+MASK_64 = (1 << 64) - 1
+
+
+class FeistelPermutation:
+    """A keyed permutation of range(size), see the module docstring."""
+
+    def __init__(self, size, key, rounds=4):
+        if size < 1:
+            raise ValueError(f"the id space must hold at least one id, got {size}")
+        self.size = size
+        self.half_bits = max(1, ((size - 1).bit_length() + 1) // 2)
+        self.mask = (1 << self.half_bits) - 1
+        key_rng = random.Random(key)
+        self.keys = [key_rng.getrandbits(64) for _ in range(rounds)]
+
+    def _round(self, value, key):
+        value = (value * 0x9E3779B97F4A7C15 + key) & MASK_64
+        return (value ^ (value >> 29)) >> 7 & self.mask
+
+    def _encrypt(self, value):
+        left, right = value >> self.half_bits, value & self.mask
+        for key in self.keys:
+            left, right = right, left ^ self._round(right, key)
+        return left << self.half_bits | right
+
+    def _decrypt(self, value):
+        left, right = value >> self.half_bits, value & self.mask
+        for key in reversed(self.keys):
+            left, right = right ^ self._round(left, key), left
+        return left << self.half_bits | right
+
+    def __call__(self, index):
+        if not 0 <= index < self.size:
+            raise IndexError(f"index {index} is outside of the id space of {self.size}")
+        value = self._encrypt(index)
+        while value >= self.size:  # cycle walking, at most a few steps as the domain is < 4 * size
+            value = self._encrypt(value)
+        return value
+
+    def inverse(self, value):
+        """The index that maps to value."""
+        if not 0 <= value < self.size:
+            raise IndexError(f"id {value} is outside of the id space of {self.size}")
+        index = self._decrypt(value)
+        while index >= self.size:
+            index = self._decrypt(index)
+        return index
+
+
+class IdAllocator:
+    """Ids first .. first + space - 1 for the indexes 0 .. space - 1, in a keyed random order.
+
+    next_id(index, rng) gives the id of index, except that with probability duplicate_rate it gives
+    the id of an earlier index (from earliest on) instead, so duplicates are deliberate and their
+    rate is known.
+    """
+
+    def __init__(self, space, key, first=0, duplicate_rate=0.0):
+        self.permutation = FeistelPermutation(space, key)
+        self.first = first
+        self.duplicate_rate = duplicate_rate
+
+    def id_of(self, index):
+        return self.first + self.permutation(index)
+
+    def index_of(self, allocated_id):
+        return self.permutation.inverse(allocated_id - self.first)
+
+    def next_id(self, index, rng=random, earliest=0):
+        if self.duplicate_rate and index > earliest and rng.random() < self.duplicate_rate:
+            index = rng.randrange(earliest, index)
+        return self.id_of(index)
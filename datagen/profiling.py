@@ -0,0 +1,227 @@
+"""
+Opt-in instrumentation for the generators: per-column cost and error counts, and whole-run profilers.
+
+DatasetProfile is fed by the generator one row (or one column batch) at a time. Every corrupted cell
+or column is recorded with the time spent producing its raw value (the RNG draws, round, ... since
+the previous column, including uncorrupted columns computed before it) and the time spent in the
+corruption itself, plus which error it got. Timer calls add roughly 0.1 us per column, so the
+numbers are for comparing columns, not absolute.
+
+profiled() wraps a run in cProfile, or in a small sampling profiler that looks at the main thread's
+stack every few milliseconds, and prints the hottest functions. As a row generator compiled from a
+schema runs inside the sink's csv writerows, the sampler also breaks its samples down by line of the
+innermost compiled function on the stack (one column per line, the source is in linecache) and by the
+function that line was in, e.g. rng.uniform for the draws or random_corrupt_value for the corruption.
+"""
+import cProfile
+import collections
+import contextlib
+import io
+import linecache
+import pstats
+import sys
+import threading
+import time
+from time import perf_counter
+
+ERROR_KINDS = ("missing", "wrong_type", "outlier")
+COMPILED_PREFIX = "<schema "  # file name of the functions compiled by datagen.schema
+
+
+class ColumnStats:
+    __slots__ = ("value_seconds", "corrupt_seconds", "cells", "numeric_cells", "missing", "wrong_type", "outlier")
+
+    def __init__(self):
+        self.value_seconds = self.corrupt_seconds = 0.0
+        self.cells = self.numeric_cells = self.missing = self.wrong_type = self.outlier = 0
+
+
+class DatasetProfile:
+    """Timing and error counts of one dataset, per column."""
+
+    def __init__(self, name, header, corrupted=None):
+        """corrupted are the indexes in header of the columns that go through the corruption function,
+        in order (every column by default)."""
+        self.name = name
+        self.header = header
+        self.corrupted = [header[i] for i in corrupted] if corrupted is not None else list(header)
+        self.columns = {column: ColumnStats() for column in header}
+        self.rows = 0
+        self.other_seconds = 0.0  # building rows besides the corrupted columns (e.g. the row list itself)
+        self.write_seconds = 0.0  # formatting and writing, csv.writer for CSV
+        self._calls = []
+        self._mark = 0.0
+
+    def start_row(self):
+        """Call before asking the generator for the next row or column batch."""
+        self._calls.clear()
+        self._mark = perf_counter()
+
+    def record(self, entered, left, cells, is_numeric, missing, wrong_type, outlier):
+        """Record a corrupted cell (cells=1) or column batch, corrupted between the perf_counter()
+        times entered and left, with the number of cells that got each error."""
+        self._calls.append((entered - self._mark, left - entered, cells, is_numeric, missing, wrong_type, outlier))
+        self._mark = perf_counter()  # the bookkeeping above is not charged to the next column
+
+    def end_row(self, size=1):
+        """Call once the row (or a batch of size rows) is complete, to attribute the recorded calls."""
+        self.other_seconds += perf_counter() - self._mark
+        self.rows += size
+        for column, (value_s, corrupt_s, cells, is_numeric, missing, wrong_type, outlier) in zip(
+                self.corrupted, self._calls):
+            stats = self.columns[column]
+            stats.value_seconds += value_s
+            stats.corrupt_seconds += corrupt_s
+            stats.cells += cells
+            stats.numeric_cells += cells if is_numeric else 0
+            stats.missing += missing
+            stats.wrong_type += wrong_type
+            stats.outlier += outlier
+
+    def generate_seconds(self):
+        return self.other_seconds + sum(s.value_seconds + s.corrupt_seconds for s in self.columns.values())
+
+    def error_rates(self):
+        """Observed missing rate, and wrong-type/outlier rates among the numeric cells each could hit
+        (a cell is only made wrong-type if not missing, and an outlier if neither)."""
+        cells = sum(s.cells for s in self.columns.values())
+        missing = sum(s.missing for s in self.columns.values())
+        numeric = sum(s.numeric_cells for s in self.columns.values())
+        numeric_missing = sum(s.missing for s in self.columns.values() if s.numeric_cells)
+        wrong_type = sum(s.wrong_type for s in self.columns.values())
+        outlier = sum(s.outlier for s in self.columns.values())
+        not_missing = numeric - numeric_missing
+        return {
+            "missing": missing / cells if cells else 0.0,
+            "wrong_type": wrong_type / not_missing if not_missing else 0.0,
+            "outlier": outlier / (not_missing - wrong_type) if not_missing - wrong_type else 0.0,
+        }
+
+    def report(self, expected=None):
+        """A text table of per-column cost (us per row) and errors, expected maps error kind -> probability."""
+        rows = max(self.rows, 1)
+        generate = self.generate_seconds()
+        total = generate + self.write_seconds
+        lines = [f"{self.name}: {self.rows} rows, generate {generate:.2f}s, write {self.write_seconds:.2f}s "
+                 f"({self.rows / total if total else 0:.0f} rows/s)",
+                 f"  {'column':<30} {'value us':>9} {'corrupt us':>11} {'share':>6} "
+                 f"{'missing':>8} {'wrong':>7} {'outlier':>8}"]
+        for column, stats in self.columns.items():
+            if not stats.cells:
+                continue
+            seconds = stats.value_seconds + stats.corrupt_seconds
+            lines.append(f"  {column:<30} {stats.value_seconds / rows * 1e6:>9.2f} "
+                         f"{stats.corrupt_seconds / rows * 1e6:>11.2f} {seconds / total if total else 0:>6.1%} "
+                         f"{stats.missing:>8} {stats.wrong_type:>7} {stats.outlier:>8}")
+        lines.append(f"  {'(rest of the row)':<30} {self.other_seconds / rows * 1e6:>9.2f}")
+        lines.append(f"  {'(writing)':<30} {self.write_seconds / rows * 1e6:>9.2f}")
+        observed = self.error_rates()
+        lines.append("  error rates: " + ", ".join(
+            f"{kind} {observed[kind]:.4f}" + (f" (configured {expected[kind]})" if expected else "")
+            for kind in ERROR_KINDS))
+        return "\n".join(lines)
+
+
+class SamplingProfiler:
+    """Count the functions on a thread's stack every interval seconds, from a background thread.
+
+    The sampler can only look when the thread lets go of the GIL, which it does at every write to a
+    file long before the interpreter's switch interval asks it to, so samples would pile up on the
+    writes. The switch interval is lowered well below interval while sampling."""
+
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.main_thread().ident
+        self.own = collections.Counter()  # innermost frame only
+        self.inclusive = collections.Counter()  # anywhere on the stack
+        self.compiled = collections.Counter()  # (line of the innermost compiled function, function it was in)
+        self.samples = 0
+        self._switch_interval = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            self.own[self._name(frame)] += 1
+            seen = set()
+            inner = None  # the frame called by frame
+            in_compiled = False
+            while frame is not None:
+                name = self._name(frame)
+                if name not in seen:
+                    seen.add(name)
+                    self.inclusive[name] += 1
+                if not in_compiled and frame.f_code.co_filename.startswith(COMPILED_PREFIX):
+                    in_compiled = True
+                    self.compiled[self._line(frame), "(the line itself)" if inner is None else inner] += 1
+                inner = name
+                frame = frame.f_back
+
+    @staticmethod
+    def _name(frame):
+        code = frame.f_code
+        return f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})"
+
+    @staticmethod
+    def _line(frame):
+        filename, line = frame.f_code.co_filename, frame.f_lineno
+        return f"{filename}:{line} {linecache.getline(filename, line).strip()}"
+
+    def start(self):
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval / 50))
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+
+    def report(self, limit=20):
+        lines = [f"{self.samples} samples every {self.interval * 1000:g} ms",
+                 f"  {'own':>6} {'total':>6}  function"]
+        samples = max(self.samples, 1)
+        for name, count in self.own.most_common(limit):
+            lines.append(f"  {count / samples:>6.1%} {self.inclusive[name] / samples:>6.1%}  {name}")
+        if self.compiled:
+            lines.append(f"  {'share':>6}  line of the compiled generator <- function it was in")
+            for (line, inner), count in self.compiled.most_common(limit):
+                lines.append(f"  {count / samples:>6.1%}  {line} <- {inner}")
+        return "\n".join(lines)
+
+
+@contextlib.contextmanager
+def profiled(kind=None, dump_path=None, limit=20):
+    """Run the with-block under "cprofile" or "sample" (or nothing for None), then print the top
+    functions. cProfile stats are also dumped to dump_path for snakeviz/pstats when given."""
+    if kind is None:
+        yield
+        return
+    start = time.perf_counter()
+    if kind == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            if dump_path:
+                profiler.dump_stats(dump_path)
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("tottime").print_stats(limit)
+            print(out.getvalue())
+    elif kind == "sample":
+        profiler = SamplingProfiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            print(profiler.report(limit))
+    else:
+        raise ValueError(f"unknown profiler {kind!r}, expected 'cprofile' or 'sample'")
+    print(f"profiled run took {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,362 @@
+"""
+Streaming data quality profile of dirty CSV files, in bounded memory and on a process pool.
+
+A file is split into byte ranges of chunk_size aligned on line starts (fields must not contain
+newlines, which holds for every generator here). Each range is profiled by a worker into one
+ColumnProfile per column, and the profiles of the ranges are merged. Per column:
+
+    missing     blank cells (the generators write None as an empty field)
+    sentinels   counts of error tokens like ERROR, N/A, NULL, XYZ
+    wrong_type  in a numeric column, non-blank cells that are not numbers
+    outliers    numbers beyond the column's fences, q1 - k * IQR and q3 + k * IQR (an estimate, from
+                the quantile sketch, since the generators' x10-1000 outliers skew everything else)
+    quantiles   from a mergeable KLL-style sketch keeping about k * log2(n / k) values
+    distinct    a HyperLogLog estimate, exact below a few thousand values
+
+A column is numeric when most of its non-blank, non-sentinel values are numbers.
+"""
+import csv
+import hashlib
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+SENTINELS = ("ERROR", "N/A", "NULL", "XYZ", "INVALID", "INVALID_DATE", "UNKNOWN")
+CHUNK_SIZE = 64 * 1024 * 1024  # bytes per task
+SKETCH_K = 1000  # values per level of the quantile sketch, rank error about 1 / k
+HLL_PRECISION = 12  # 4096 registers, about 1.6% standard error
+EXACT_DISTINCT = 4096  # values counted exactly before switching to HyperLogLog
+FENCE = 3.0  # outlier fences in IQRs beyond the quartiles
+ERROR_KINDS = ("missing", "wrong_type", "outlier")
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch: level i holds values standing for 2 ** i values each. A full
+    level is sorted and every other value (alternating which) is promoted to the next level."""
+
+    def __init__(self, k=SKETCH_K):
+        self.k = k
+        self.levels = [[]]
+        self.count = 0
+        self._flip = 0
+
+    def add(self, value):
+        self.levels[0].append(value)
+        self.count += 1
+        if len(self.levels[0]) >= self.k:
+            self._compact(0)
+
+    def _compact(self, level):
+        while level < len(self.levels) and len(self.levels[level]) >= self.k:
+            values = sorted(self.levels[level])
+            kept = [values.pop()] if len(values) % 2 else []  # an odd value out stays, so weights add up
+            if level + 1 == len(self.levels):
+                self.levels.append([])
+            self.levels[level + 1].extend(values[self._flip::2])
+            self._flip ^= 1
+            self.levels[level] = kept
+            level += 1
+
+    def merge(self, other):
+        for level, values in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append([])
+            self.levels[level].extend(values)
+        self.count += other.count
+        for level in range(len(self.levels)):
+            self._compact(level)
+
+    def _weighted(self):
+        return sorted((value, 1 << level) for level, values in enumerate(self.levels) for value in values)
+
+    def quantiles(self, qs):
+        """The values at the given fractions (0..1) of the sorted input, None when empty."""
+        weighted = self._weighted()
+        total = sum(weight for _, weight in weighted)
+        results = []
+        for q in qs:
+            if not weighted:
+                results.append(None)
+                continue
+            target, seen = q * total, 0
+            for value, weight in weighted:
+                seen += weight
+                if seen >= target:
+                    break
+            results.append(value)
+        return results
+
+    def count_outside(self, low, high):
+        """Estimated number of input values below low or above high."""
+        weighted = self._weighted()
+        total = sum(weight for _, weight in weighted)
+        outside = sum(weight for value, weight in weighted if value < low or value > high)
+        return round(outside * self.count / total) if total else 0
+
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class DistinctSketch:
+    """Distinct count: an exact set of up to EXACT_DISTINCT values, then a HyperLogLog. The hash
+    is stable (not hash()), so sketches built in different processes merge."""
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.exact = set()
+        self.registers = None
+
+    def add(self, value):
+        if self.registers is None:
+            self.exact.add(value)
+            if len(self.exact) > EXACT_DISTINCT:
+                self._to_registers()
+        else:
+            self._add_hash(_hash64(value))
+
+    def _add_hash(self, h):
+        bits = 64 - self.precision
+        index, rest = h >> bits, h & ((1 << bits) - 1)
+        rank = bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def _to_registers(self):
+        self.registers = bytearray(1 << self.precision)
+        for value in self.exact:
+            self._add_hash(_hash64(value))
+        self.exact = set()
+
+    def merge(self, other):
+        if self.registers is None and other.registers is None:
+            self.exact |= other.exact
+            if len(self.exact) > EXACT_DISTINCT:
+                self._to_registers()
+            return
+        if self.registers is None:
+            self._to_registers()
+        if other.registers is None:
+            for value in other.exact:
+                self._add_hash(_hash64(value))
+        else:
+            self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def estimate(self):
+        if self.registers is None:
+            return len(self.exact)
+        m = len(self.registers)
+        raw = 0.7213 / (1 + 1.079 / m) * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            return round(m * math.log(m / zeros))  # linear counting for small cardinalities
+        return round(raw)
+
+
+class ColumnProfile:
+    def __init__(self, name):
+        self.name = name
+        self.cells = self.missing = self.numbers = self.texts = 0
+        self.sentinels = {}
+        self.minimum = self.maximum = None
+        self.quantiles = QuantileSketch()
+        self.distinct = DistinctSketch()
+
+    def add(self, value, sentinels=SENTINELS):
+        self.cells += 1
+        if value == "":
+            self.missing += 1
+            return
+        self.distinct.add(value)
+        if value in sentinels:
+            self.sentinels[value] = self.sentinels.get(value, 0) + 1
+            return
+        try:
+            number = float(value)
+        except ValueError:
+            self.texts += 1
+            return
+        if number != number:  # "nan"
+            self.texts += 1
+            return
+        self.numbers += 1
+        self.quantiles.add(number)
+        if self.minimum is None or number < self.minimum:
+            self.minimum = number
+        if self.maximum is None or number > self.maximum:
+            self.maximum = number
+
+    def merge(self, other):
+        self.cells += other.cells
+        self.missing += other.missing
+        self.numbers += other.numbers
+        self.texts += other.texts
+        for token, count in other.sentinels.items():
+            self.sentinels[token] = self.sentinels.get(token, 0) + count
+        for bound in (other.minimum, other.maximum):
+            if bound is not None:
+                self.minimum = bound if self.minimum is None else min(self.minimum, bound)
+                self.maximum = bound if self.maximum is None else max(self.maximum, bound)
+        self.quantiles.merge(other.quantiles)
+        self.distinct.merge(other.distinct)
+
+    @property
+    def is_numeric(self):
+        return self.numbers > 0 and self.numbers >= self.texts
+
+    @property
+    def wrong_type(self):
+        """Non-blank cells of a numeric column that are not numbers."""
+        return self.texts + sum(self.sentinels.values()) if self.is_numeric else 0
+
+    def fences(self, k=FENCE):
+        q1, q3 = self.quantiles.quantiles([0.25, 0.75])
+        if q1 is None:
+            return None
+        return q1 - k * (q3 - q1), q3 + k * (q3 - q1)
+
+    @property
+    def outliers(self):
+        fences = self.fences() if self.is_numeric else None
+        return self.quantiles.count_outside(*fences) if fences else 0
+
+    def summary(self):
+        p01, p25, p50, p75, p99 = self.quantiles.quantiles([0.01, 0.25, 0.5, 0.75, 0.99])
+        return {
+            "type": "numeric" if self.is_numeric else "text", "cells": self.cells, "missing": self.missing,
+            "sentinels": dict(sorted(self.sentinels.items())), "wrong_type": self.wrong_type,
+            "outliers": self.outliers, "distinct": self.distinct.estimate(), "min": self.minimum,
+            "max": self.maximum, "p01": p01, "p25": p25, "p50": p50, "p75": p75, "p99": p99,
+        }
+
+
+class FileProfile:
+    def __init__(self, path, header):
+        self.path = path
+        self.header = header
+        self.rows = 0
+        self.columns = [ColumnProfile(name) for name in header]
+
+    def merge(self, other):
+        self.rows += other.rows
+        for column, other_column in zip(self.columns, other.columns):
+            column.merge(other_column)
+
+    def error_rates(self):
+        """Observed rates over the columns that have any error, computed like
+        datagen.profiling.DatasetProfile.error_rates: missing among all their cells, wrong-type among
+        the non-missing cells of numeric columns, outliers among what is left of those."""
+        dirty = [column for column in self.columns if column.missing or column.sentinels or column.wrong_type]
+        cells = sum(column.cells for column in dirty)
+        missing = sum(column.missing for column in dirty)
+        numeric = [column for column in dirty if column.is_numeric]
+        not_missing = sum(column.cells - column.missing for column in numeric)
+        wrong_type = sum(column.wrong_type for column in numeric)
+        outliers = sum(column.outliers for column in numeric)
+        return {
+            "missing": missing / cells if cells else 0.0,
+            "wrong_type": wrong_type / not_missing if not_missing else 0.0,
+            "outlier": outliers / (not_missing - wrong_type) if not_missing - wrong_type else 0.0,
+        }
+
+    def summary(self, expected=None):
+        rates = self.error_rates()
+        return {
+            "path": self.path, "rows": self.rows,
+            "columns": {column.name: column.summary() for column in self.columns},
+            "error_rates": rates,
+            "expected": expected,
+            "deviation": {kind: rates[kind] - expected[kind] for kind in ERROR_KINDS} if expected else None,
+        }
+
+    def report(self, expected=None):
+        lines = [f"{self.path}: {self.rows} rows, {len(self.columns)} columns",
+                 f"  {'column':<30} {'type':<7} {'missing':>8} {'wrong':>7} {'outliers~':>9} {'distinct~':>9} "
+                 f"{'p01':>11} {'p50':>11} {'p99':>11}  sentinels"]
+        for column in self.columns:
+            s = column.summary()
+            p01, p50, p99 = (f"{value:>11.4g}" if value is not None else f"{'':>11}"
+                             for value in (s["p01"], s["p50"], s["p99"]))
+            sentinels = " ".join(f"{token}={count}" for token, count in s["sentinels"].items())
+            lines.append(f"  {column.name:<30} {s['type']:<7} {s['missing']:>8} {s['wrong_type']:>7} "
+                         f"{s['outliers']:>9} {s['distinct']:>9} {p01} {p50} {p99}  {sentinels}")
+        rates = self.error_rates()
+        lines.append("  error rates: " + ", ".join(
+            f"{kind} {rates[kind]:.4f}" + (f" (configured {expected[kind]}, {rates[kind] - expected[kind]:+.4f})"
+                                           if expected else "")
+            for kind in ERROR_KINDS))
+        return "\n".join(lines)
+
+
+def read_header(path):
+    """The header of a CSV file and the offset of its first data line, ([], 0) for an empty file."""
+    with open(path, "rb") as f:
+        line = f.readline()
+        if not line:
+            return [], 0
+        return next(csv.reader([line.decode()])), f.tell()
+
+
+def chunk_bounds(path, chunk_size=CHUNK_SIZE):
+    """(start, end) byte ranges covering the data lines of path, a line belongs to the range its
+    first byte is in."""
+    _, data_start = read_header(path)
+    size = os.path.getsize(path)
+    return [(start, min(start + chunk_size, size)) for start in range(data_start, size, chunk_size)]
+
+
+def iter_chunk_lines(path, start, end):
+    """Decoded lines whose first byte lies in [start, end)."""
+    with open(path, "rb") as f:
+        f.seek(max(start - 1, 0))
+        if start > 0:
+            f.readline()  # the rest of the line the previous range owns (or just its newline)
+        position = f.tell()
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            yield line.decode()
+
+
+def read_chunk(path, start, end):
+    """The raw bytes of the lines whose first byte lies in [start, end), like iter_chunk_lines."""
+    with open(path, "rb") as f:
+        f.seek(max(start - 1, 0))
+        if start > 0:
+            f.readline()
+        first = f.tell()
+        if first >= end:
+            return b""
+        data = f.read(end - first)
+        if data and not data.endswith(b"\n"):
+            data += f.readline()  # the rest of the last line
+        return data
+
+
+def profile_chunk(path, start, end, sentinels=SENTINELS):
+    header, _ = read_header(path)
+    profile = FileProfile(path, header)
+    columns = profile.columns
+    sentinels = frozenset(sentinels)
+    for row in csv.reader(iter_chunk_lines(path, start, end)):
+        profile.rows += 1
+        for column, value in zip(columns, row):
+            column.add(value, sentinels)
+    return profile
+
+
+def profile_files(paths, workers=1, chunk_size=CHUNK_SIZE, sentinels=SENTINELS):
+    """Profile the CSV files at paths, their chunks spread over workers processes. Returns a
+    FileProfile per path, in order."""
+    tasks = [(path, start, end) for path in paths for start, end in chunk_bounds(path, chunk_size)]
+    profiles = {path: FileProfile(path, read_header(path)[0]) for path in paths}
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(profile_chunk, *zip(*tasks), [sentinels] * len(tasks))) if tasks else []
+    else:
+        results = [profile_chunk(path, start, end, sentinels) for path, start, end in tasks]
+    for (path, _, _), result in zip(tasks, results):
+        profiles[path].merge(result)
+    return [profiles[path] for path in paths]
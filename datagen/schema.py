@@ -0,0 +1,262 @@
+"""
+Declarative table schemas, compiled into the generators' row and column-batch functions.
+
+A Table is a list of Columns, each with a kind (how its value is drawn), its range, precision or
+categorical choices, and an error policy (which data quality issues it gets). The header, the
+Arrow/Parquet column types and the SQL column types all come from the same spec, so the outputs
+cannot drift apart.
+
+compile_rows / compile_batches / compile_sql_rows turn a table into Python source equivalent to a
+hand-written generator (one expression per column inside a single list display) and exec it once
+in the generator module's namespace. The compiled functions therefore cost nothing over the
+hand-written ones, look up the module's helpers (random_corrupt_value, NUM_RECORDS_PER_WELL...) at
+call time like they would, and draw from the random streams in exactly the same order.
+
+Column kinds:
+    key         the shard's id (well id, or seismic line id)
+    date        start + the record's day index, as an ISO date string
+    uniform     round(uniform(low, high), precision)
+    integer     randint(low, high)
+    choice      one of choices
+    lookup      choices[i] where i is the index of the choice drawn for the column named source
+    drilled     running sum of randint(low, high) per record, capped at the well's total depth
+    stratified  one draw per 1 / NUM_RECORDS_PER_WELL slice of the well's total depth
+    sequence    the record's 1-based index
+Error policies:
+    "numeric"   missing, wrong type or outlier (random_corrupt_value / np_corrupt_column)
+    "text"      missing only
+    "sql"       the SQL generator's random_value / random_date errors
+    None        always clean
+"""
+import linecache
+
+TEXT_KINDS = {"key", "date", "choice", "lookup"}
+NUMERIC_KINDS = {"uniform", "integer", "drilled", "stratified", "sequence"}
+
+
+class Column:
+    def __init__(self, name, kind="uniform", low=None, high=None, precision=None, choices=None, source=None,
+                 start=None, errors="default"):
+        if kind not in TEXT_KINDS | NUMERIC_KINDS:
+            raise ValueError(f"unknown column kind {kind!r} for {name}")
+        self.name = name
+        self.kind = kind
+        self.low = low
+        self.high = high
+        self.precision = precision
+        self.choices = choices
+        self.source = source
+        self.start = start
+        self.errors = ("text" if kind in TEXT_KINDS else "numeric") if errors == "default" else errors
+
+    @property
+    def is_text(self):
+        return self.kind in TEXT_KINDS
+
+    @property
+    def arrow_type(self):
+        """"string" for text, "mixed" for numbers that may hold error strings, else int64/float64."""
+        if self.is_text:
+            return "string"
+        if self.errors is not None:
+            return "mixed"
+        return "float64" if self.kind in ("uniform", "stratified") else "int64"
+
+    @property
+    def sql_type(self):
+        if self.kind == "date":
+            return "DATE"
+        if self.is_text:
+            return "TEXT"
+        return "INT" if self.kind in ("integer", "sequence") else "FLOAT"
+
+
+class Table:
+    """A named list of columns. shard is "well" (rows per (id, lat, lon, total depth) well) or "line"
+    (rows per seismic line id)."""
+
+    def __init__(self, name, columns, shard="well"):
+        self.name = name
+        self.columns = columns
+        self.shard = shard
+
+    @property
+    def header(self):
+        return [column.name for column in self.columns]
+
+    def column_types(self):
+        return {column.name: column.arrow_type for column in self.columns}
+
+    def sql_columns(self, dirty=False):
+        """The "name TYPE" definitions of the columns. dirty declares the columns that get errors TEXT,
+        for loaders that reject a whole load on one 'N/A' in a FLOAT column (PostgreSQL's COPY)."""
+        return [f"{column.name} {'TEXT' if dirty and column.errors is not None else column.sql_type}"
+                for column in self.columns]
+
+
+def _constants(table, namespace):
+    """Put the choices and start dates of table into namespace, returning column name -> constant names."""
+    names = {}
+    for column in table.columns:
+        prefix = f"_{table.name}_{column.name}"
+        if column.choices is not None:
+            namespace[f"{prefix}_choices"] = list(column.choices)
+        if column.start is not None:
+            namespace[f"{prefix}_start"] = column.start
+        names[column.name] = (f"{prefix}_choices", f"{prefix}_start")
+    return names
+
+
+def _sources(table):
+    return {column.source for column in table.columns if column.kind == "lookup"}
+
+
+def _exec(source, function_name, filename, namespace):
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)  # for tracebacks/profilers
+    exec(compile(source, filename, "exec"), namespace)
+    function = namespace[function_name]
+    function.source = source
+    return function
+
+
+def _unpack(table):
+    if table.shard == "line":
+        return "    key = shard\n"
+    return ("    key, lat, lon, total_depth = shard\n"
+            "    depth_interval = total_depth / NUM_RECORDS_PER_WELL\n")
+
+
+def _row_expression(table, column, constants, sources):
+    choices, start = constants[column.name]
+    if column.kind == "key":
+        value = "key"
+    elif column.kind == "date":
+        value = f"({start} + datetime.timedelta(days=i)).isoformat()"
+    elif column.kind == "uniform":
+        value = f"round(rng.uniform({column.low!r}, {column.high!r}), {column.precision})"
+    elif column.kind == "integer":
+        value = f"rng.randint({column.low!r}, {column.high!r})"
+    elif column.kind == "choice":
+        value = f"rng.choice({choices})"
+        if column.name in sources:
+            value = f"(_{column.name} := {value})"
+    elif column.kind == "lookup":
+        value = f"{choices}[{constants[column.source][0]}.index(_{column.source})]"
+    elif column.kind == "drilled":
+        value = f"(current_depth := min(current_depth + rng.randint({column.low!r}, {column.high!r}), total_depth))"
+    elif column.kind == "stratified":
+        value = f"round(i * depth_interval + rng.uniform(0, depth_interval), {column.precision})"
+    else:  # sequence
+        value = "i + 1"
+    if column.errors == "numeric":
+        return f"random_corrupt_value({value}, rng=rng)"
+    if column.errors == "text":
+        return f"random_corrupt_value({value}, is_numeric=False, rng=rng)"
+    if column.errors is None:
+        return value
+    raise ValueError(f"error policy {column.errors!r} of {table.name}.{column.name} is not supported here")
+
+
+def compile_rows(table, namespace, function_name=None):
+    """Compile table into rows(shard, first_day=0, num_records=None, current_depth=0, rng=random),
+    which yields one list per record from day/record first_day on (NUM_RECORDS_PER_WELL records by
+    default); current_depth is where a "drilled" column starts from."""
+    function_name = function_name or f"{table.name}_rows"
+    constants = _constants(table, namespace)
+    sources = _sources(table)
+    values = ",\n".join(f"            {_row_expression(table, column, constants, sources)}"
+                        for column in table.columns)
+    source = (f"def {function_name}(shard, first_day=0, num_records=None, current_depth=0, rng=random):\n"
+              f"    \"\"\"Rows of {table.name}, compiled from its schema.\"\"\"\n"
+              f"{_unpack(table)}"
+              f"    for i in range(first_day, first_day + (num_records or NUM_RECORDS_PER_WELL)):\n"
+              f"        yield [\n{values}\n        ]\n")
+    return _exec(source, function_name, f"<schema {table.name} rows>", namespace)
+
+
+def _batch_expression(table, column, constants, sources):
+    choices, start = constants[column.name]
+    if column.kind == "key":
+        if column.errors is None:
+            return "[key] * n"
+        value = "np.full(n, key)"
+    elif column.kind == "date":
+        value = f"np_dates({start}, first, n)"
+    elif column.kind == "uniform":
+        value = f"np_uniform(rng, {column.low!r}, {column.high!r}, n, {column.precision})"
+    elif column.kind == "integer":
+        value = f"rng.integers({column.low!r}, {column.high + 1!r}, n)"
+    elif column.kind == "choice":
+        if column.name in sources:
+            value = f"np.array({choices})[(_{column.name} := rng.integers(0, {len(column.choices)}, n))]"
+        else:
+            value = f"np_choice(rng, {choices}, n)"
+    elif column.kind == "lookup":
+        value = f"np.array({choices})[_{column.source}]"
+    elif column.kind == "drilled":
+        value = (f"np.minimum((depth := drilled + np.cumsum(rng.integers({column.low!r}, {column.high + 1!r}, n))), "
+                 f"total_depth)")
+    elif column.kind == "stratified":
+        value = (f"np.round(np.arange(first, first + n) * depth_interval + rng.uniform(0, depth_interval, n), "
+                 f"{column.precision})")
+    else:  # sequence
+        value = "np.arange(first + 1, first + n + 1)"
+    if column.errors == "numeric":
+        return f"np_corrupt_column(rng, {value})"
+    if column.errors == "text":
+        return f"np_corrupt_column(rng, {value}, is_numeric=False)"
+    if column.errors is None:
+        return f"{value}.tolist()"
+    raise ValueError(f"error policy {column.errors!r} of {table.name}.{column.name} is not supported here")
+
+
+def compile_batches(table, namespace, function_name=None):
+    """Compile table into batches(rng, shard, first_day=0, num_records=None, current_depth=0) for the
+    numpy engine, which yields lists of columns of at most BATCH_SIZE rows."""
+    function_name = function_name or f"{table.name}_batches"
+    constants = _constants(table, namespace)
+    sources = _sources(table)
+    drilled = any(column.kind == "drilled" for column in table.columns)
+    values = ",\n".join(f"            {_batch_expression(table, column, constants, sources)}"
+                        for column in table.columns)
+    source = (f"def {function_name}(rng, shard, first_day=0, num_records=None, current_depth=0):\n"
+              f"    \"\"\"Column batches of {table.name}, compiled from its schema.\"\"\"\n"
+              f"{_unpack(table)}"
+              + ("    drilled = current_depth  # depth reached before the current batch\n" if drilled else "")
+              + f"    for first, n in batch_bounds(num_records or NUM_RECORDS_PER_WELL, first_day):\n"
+                f"        yield [\n{values}\n        ]\n"
+              + ("        drilled = depth[-1]\n" if drilled else ""))
+    return _exec(source, function_name, f"<schema {table.name} batches>", namespace)
+
+
+def _sql_expression(table, column, constants):
+    choices, start = constants[column.name]
+    if column.kind == "key" and column.errors is None:
+        return "key"
+    if column.kind == "choice" and column.errors is None:
+        return f"rng.choice({choices})"  # the bad values are among the choices
+    if column.errors == "sql":
+        if column.kind == "date":
+            return f"random_date({start}, bad_dates, rng=rng)"
+        if column.kind == "uniform":
+            return f"random_value(({column.low!r}, {column.high!r}), True, rng)"
+        if column.kind == "integer":
+            return f"random_value(({column.low!r}, {column.high!r}), rng=rng)"
+    raise ValueError(f"{column.kind} column {table.name}.{column.name} with error policy {column.errors!r} "
+                     f"is not supported in SQL tables")
+
+
+def compile_sql_rows(table, namespace, function_name=None):
+    """Compile table into rows(rng=random, num_wells=None) for the SQL generator: NUM_RECORDS_PER_WELL
+    rows for each of iter_well_ids(num_wells), with the table's messed-up dates drawn first."""
+    function_name = function_name or f"{table.name}_rows"
+    constants = _constants(table, namespace)
+    dates = any(column.kind == "date" for column in table.columns)
+    values = ",\n".join(f"                {_sql_expression(table, column, constants)}" for column in table.columns)
+    source = (f"def {function_name}(rng=random, num_wells=None):\n"
+              f"    \"\"\"Rows of {table.name}, compiled from its schema.\"\"\"\n"
+              + ("    bad_dates = messed_up_dates(rng)\n" if dates else "")
+              + f"    for key in iter_well_ids(num_wells):\n"
+                f"        for _ in range(NUM_RECORDS_PER_WELL):\n"
+                f"            yield [\n{values}\n            ]\n")
+    return _exec(source, function_name, f"<schema {table.name} sql rows>", namespace)
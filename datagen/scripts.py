@@ -0,0 +1,16 @@
+"""
+Importing the generator scripts of the repository root, whose hyphenated file names are not module
+names, e.g. load_script("oil-and-gas-batch-data-generator.py").iter_rows("wellbore_data", seed=42).
+"""
+import importlib.util
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_script(filename):
+    """The module of the script filename of the repository root, executed anew on every call."""
+    spec = importlib.util.spec_from_file_location(filename[:-3].replace("-", "_"), os.path.join(ROOT, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,26 @@
+"""
+Reproducible seeding for the generators.
+
+One master seed drives every generator, but each table, shard, city or vehicle draws from its own
+random stream derived from (master seed, names...). A stream therefore does not depend on how much
+the others consumed: a single table can be regenerated on its own, shards can run in any order or
+process, and the same seed and configuration always produce byte-identical files.
+"""
+import hashlib
+import random
+
+
+def derive_seed(seed, *names):
+    """A 64-bit seed for the stream identified by names, e.g. derive_seed(42, "wellbore_data", 3)."""
+    key = ":".join(str(part) for part in (seed, *names))
+    return int.from_bytes(hashlib.sha256(key.encode()).digest()[:8], "big")
+
+
+def stream(seed, *names):
+    """An independent random.Random for the stream identified by names."""
+    return random.Random(derive_seed(seed, *names))
+
+
+def new_seed():
+    """A fresh master seed, for runs without --seed (print it so the run can be reproduced)."""
+    return random.SystemRandom().randrange(2 ** 63)
@@ -0,0 +1,271 @@
+"""
+Output sinks for the generators: CSV, Parquet and Arrow IPC.
+
+A sink is opened with the header of a dataset and receives rows (lists of values) or batches of
+columns. The columnar sinks buffer at most row_group_size rows and write them as one row group /
+record batch, so memory stays bounded. pyarrow is only imported when a columnar format is used.
+
+Column types are given per column name: "string", "int64", "float64" or "mixed". A mixed column
+holds numbers and error strings like "ERROR" or "N/A" side by side. By default (mixed="split") it
+becomes two columns: the numbers in a float64 column of its name, and the other cells (the error
+strings) in a string column named name + RAW_SUFFIX, null where the cell is a number, so numbers
+are neither formatted nor parsed. mixed="string" stores every cell as the string it would have in
+the CSV, and mixed="union" (Arrow IPC only) a dense union of int64/float64/string children.
+Columns without a type are strings.
+
+CSV can be written gzip or zstd compressed (datagen.compress), on background threads.
+"""
+import csv
+import itertools
+import shutil
+
+from datagen.compress import CompressedWriter, codec_for_path, iter_members, open_compressed
+
+FORMATS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+ROW_GROUP_SIZE = 100_000  # rows per Parquet row group / Arrow record batch
+MIXED = ("split", "string", "union")  # how a column of numbers and error strings is stored
+RAW_SUFFIX = "_raw"  # the string column of a split mixed column
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet and Arrow output require pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+
+class Sink:
+    def __init__(self, path, header):
+        self.path = path
+        self.header = header
+
+    def write_rows(self, rows):
+        raise NotImplementedError
+
+    def write_columns(self, columns):
+        self.write_rows(zip(*columns))
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CsvSink(Sink):
+    def __init__(self, path, header, compression=None, compression_level=None, compression_threads=1, **options):
+        super().__init__(path, header)
+        self.file = open_compressed(path, "w", compression, compression_level, compression_threads)
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(header)
+        if isinstance(getattr(self.file, "buffer", None), CompressedWriter):
+            self.file.flush()
+            self.file.buffer.end_member()  # the header is a member of its own, which merge_files can drop
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class ArrowSink(Sink):
+    """Base class of the columnar sinks, buffers columns until a row group is full."""
+
+    def __init__(self, path, header, types=None, row_group_size=ROW_GROUP_SIZE, mixed="split"):
+        super().__init__(path, header)
+        if mixed not in MIXED:
+            raise ValueError(f"mixed must be one of {', '.join(MIXED)}, not {mixed!r}")
+        self.pa = import_pyarrow()
+        self.types = [(types or {}).get(name, "string") for name in header]
+        self.mixed = mixed
+        self.row_group_size = row_group_size
+        self.arrow_types = [self.arrow_type(kind) for kind in self.types]
+        fields = []
+        for name, kind, arrow_type in zip(header, self.types, self.arrow_types):
+            fields.append((name, arrow_type))
+            if self.is_split(kind):
+                fields.append((name + RAW_SUFFIX, self.pa.string()))
+        self.schema = self.pa.schema(fields)
+        self.pending = [[] for _ in header]
+        self.pending_rows = 0
+        self.writer = self.open_writer()
+
+    def is_split(self, kind):
+        return kind == "mixed" and self.mixed == "split"
+
+    def arrow_type(self, kind):
+        pa = self.pa
+        if kind == "mixed" and self.mixed == "union":
+            return pa.dense_union([pa.field("int", pa.int64()), pa.field("float", pa.float64()),
+                                   pa.field("text", pa.string())])
+        if self.is_split(kind):
+            return pa.float64()
+        if kind in ("int64", "float64"):
+            return getattr(pa, kind)()
+        return pa.string()
+
+    def open_writer(self):
+        raise NotImplementedError
+
+    def write_rows(self, rows):
+        rows = iter(rows)
+        while True:
+            chunk = list(itertools.islice(rows, self.row_group_size - self.pending_rows))
+            if not chunk:
+                break
+            self.write_columns(list(zip(*chunk)))
+
+    def write_columns(self, columns):
+        size = len(columns[0])
+        start = 0
+        while start < size:
+            stop = min(size, start + self.row_group_size - self.pending_rows)
+            for buffer, column in zip(self.pending, columns):
+                buffer.extend(column[start:stop])
+            self.pending_rows += stop - start
+            start = stop
+            if self.pending_rows >= self.row_group_size:
+                self.flush()
+
+    def flush(self):
+        if not self.pending_rows:
+            return
+        arrays = []
+        for column, kind, arrow_type in zip(self.pending, self.types, self.arrow_types):
+            if self.is_split(kind):
+                arrays.extend(self.to_split(column))
+            else:
+                arrays.append(self.to_arrow(column, kind, arrow_type))
+        self.writer.write_batch(self.pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+        self.pending = [[] for _ in self.header]
+        self.pending_rows = 0
+
+    def to_arrow(self, values, kind, arrow_type):
+        pa = self.pa
+        if kind in ("int64", "float64"):
+            return pa.array(values, arrow_type)
+        if kind == "mixed" and self.mixed == "union":
+            return self.to_union(values)
+        return pa.array([None if value is None else str(value) for value in values], pa.string())
+
+    def to_split(self, values):
+        """(float64 array of the numbers, string array of the other cells) of a mixed column."""
+        numbers = []
+        raw = []
+        for value in values:
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                numbers.append(value)
+                raw.append(None)
+            else:
+                numbers.append(None)
+                raw.append(None if value is None else str(value))
+        return self.pa.array(numbers, self.pa.float64()), self.pa.array(raw, self.pa.string())
+
+    def to_union(self, values):
+        pa = self.pa
+        children = ([], [], [])
+        type_ids = []
+        offsets = []
+        for value in values:
+            if isinstance(value, int) and not isinstance(value, bool):
+                child = 0
+            elif isinstance(value, float):
+                child = 1
+            else:
+                child = 2
+                value = None if value is None else str(value)
+            type_ids.append(child)
+            offsets.append(len(children[child]))
+            children[child].append(value)
+        return pa.UnionArray.from_dense(
+            pa.array(type_ids, pa.int8()), pa.array(offsets, pa.int32()),
+            [pa.array(children[0], pa.int64()), pa.array(children[1], pa.float64()),
+             pa.array(children[2], pa.string())],
+            ["int", "float", "text"])
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+class ParquetSink(ArrowSink):
+    def open_writer(self):
+        if self.mixed == "union":
+            raise ValueError("Parquet has no union type, use mixed='string'")
+        return self.pa.parquet.ParquetWriter(self.path, self.schema)
+
+
+class ArrowIpcSink(ArrowSink):
+    def open_writer(self):
+        return self.pa.ipc.new_file(self.path, self.schema)
+
+
+SINKS = {"csv": CsvSink, "parquet": ParquetSink, "arrow": ArrowIpcSink}
+
+
+def open_sink(path, header, output_format="csv", compression=None, compression_level=None, compression_threads=1,
+              **options):
+    """Open a sink for path; options (types, row_group_size, mixed) are used by columnar formats.
+
+    compression ("gzip" or "zstd", see datagen.compress) is for CSV only, the columnar formats
+    compress their own pages."""
+    if output_format not in SINKS:
+        raise ValueError(f"unknown output format {output_format!r}, expected one of {', '.join(SINKS)}")
+    if output_format == "csv":
+        options.update(compression=compression, compression_level=compression_level,
+                       compression_threads=compression_threads)
+    elif compression is not None:
+        raise ValueError(f"compression is only supported for CSV, not {output_format}")
+    return SINKS[output_format](path, header, **options)
+
+
+def merge_files(part_paths, path, output_format="csv", append=False):
+    """Concatenate part files written by the same kind of sink into one file, or with append
+    (CSV only) add their rows to the end of an existing file."""
+    if output_format == "csv" and codec_for_path(path):
+        # compressed parts start with a member holding only the header, the other members are copied as is
+        with open(path, "ab" if append else "wb") as out:
+            for i, part_path in enumerate(part_paths):
+                with open(part_path, "rb") as part:
+                    if i > 0 or append:
+                        part.seek(next(iter_members(part_path))[1])
+                    shutil.copyfileobj(part, out)
+        return
+    if output_format == "csv":
+        with open(path, "a" if append else "w", newline="") as out:
+            for i, part_path in enumerate(part_paths):
+                with open(part_path, newline="") as part:
+                    if i > 0 or append:
+                        part.readline()  # header
+                    shutil.copyfileobj(part, out)
+        return
+    if append:
+        raise ValueError(f"appending is only supported for CSV, not {output_format}")
+
+    pa = import_pyarrow()
+    writer = None
+    try:
+        for part_path in part_paths:
+            if output_format == "parquet":
+                part = pa.parquet.ParquetFile(part_path)
+                if writer is None:
+                    writer = pa.parquet.ParquetWriter(path, part.schema_arrow)
+                for i in range(part.num_row_groups):
+                    writer.write_table(part.read_row_group(i))
+            else:
+                with pa.memory_map(part_path) as source:
+                    part = pa.ipc.open_file(source)
+                    if writer is None:
+                        writer = pa.ipc.new_file(path, part.schema)
+                    for i in range(part.num_record_batches):
+                        writer.write_batch(part.get_batch(i))
+    finally:
+        if writer is not None:
+            writer.close()
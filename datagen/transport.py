@@ -0,0 +1,352 @@
+"""
+Asyncio transports for a stream of batches, each batch being the bytes of whole records (JSON lines,
+binary frames): where the telemetry simulator writes what it generates.
+
+    -                          stdout
+    path                       a file, compressed if it ends in .gz or .zst (datagen.compress)
+    tcp://host:port            a connection to a server (unix:///path for a Unix socket)
+    fanout+tcp://host:port     a server every subscriber connects to (fanout+unix:///path)
+    http://host:port/path      a POST request per batch
+
+Every transport has the same interface (open, write, close and report), transport_for picks one
+from an output string, and anything else with that interface can be given to the simulator.
+
+FanoutServer gives every subscriber a bounded queue of batches and a task writing it out, so a slow
+subscriber holds back no one else unless asked to. What happens when the queue of a subscriber is
+full is the policy:
+    drop        its oldest batch is dropped, it gets the most recent records (a batch is made of
+                whole records, so what it reads still parses)
+    block       the producer waits for it, every subscriber is slowed down to its pace
+    disconnect  it is disconnected
+The batches waiting in a queue are written to the subscriber in one write.
+
+HttpPostTransport keeps a pool of keep-alive HTTP/1.1 connections, a batch is the body of one POST;
+with more than one connection batches are sent concurrently and may arrive out of order. A write
+waits for a free connection, so a slow endpoint slows the producer down.
+"""
+import asyncio
+import collections
+import os
+import stat
+import sys
+import urllib.parse
+
+from datagen.compress import open_compressed
+
+POLICIES = ("drop", "block", "disconnect")
+QUEUE_SIZE = 64  # batches queued per subscriber
+HTTP_CONNECTIONS = 4
+CLOSE_TIMEOUT = 5.0  # seconds given to subscribers and requests to take what is pending when closing
+
+
+def split_address(address):
+    """(host, port) of host:port."""
+    host, port = address.rsplit(":", 1)
+    return host, int(port)
+
+
+class FileTransport:
+    """stdout ("-") or a file appended to."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    async def open(self):
+        self.file = sys.stdout.buffer if self.path == "-" else open_compressed(self.path, "ab")
+
+    async def write(self, data):
+        self.file.write(data)
+        self.file.flush()
+
+    async def close(self):
+        if self.file is not None and self.file is not sys.stdout.buffer:
+            self.file.close()
+
+    def report(self):
+        return None
+
+
+class StreamTransport:
+    """A connection to a tcp://host:port or unix:///path server, with backpressure from a slow reader."""
+
+    def __init__(self, url):
+        self.url = url
+        self.stream = None
+
+    async def open(self):
+        if self.url.startswith("tcp://"):
+            _, self.stream = await asyncio.open_connection(*split_address(self.url[len("tcp://"):]))
+        else:
+            _, self.stream = await asyncio.open_unix_connection(self.url[len("unix://"):])
+
+    async def write(self, data):
+        self.stream.write(data)
+        await self.stream.drain()
+
+    async def close(self):
+        if self.stream is not None:
+            self.stream.close()
+            try:
+                await self.stream.wait_closed()
+            except ConnectionError:  # already lost, the write that found out has raised it
+                pass
+
+    def report(self):
+        return None
+
+
+class Subscriber:
+    """One connection to a FanoutServer and its queue of batches."""
+
+    def __init__(self, number, stream, queue_size):
+        self.number = number
+        self.stream = stream
+        peer = stream.get_extra_info("peername")
+        self.name = f"{peer[0]}:{peer[1]}" if isinstance(peer, tuple) else f"#{number}"
+        self.queue_size = queue_size
+        self.queue = collections.deque()
+        self.ready = asyncio.Event()  # batches are queued
+        self.space = asyncio.Event()  # the queue is not full
+        self.space.set()
+        self.connected = True
+        self.lost = None  # why the subscriber was disconnected before the end of the stream
+        self.batches = self.bytes = self.dropped = 0
+
+    def put(self, data):
+        self.queue.append(data)
+        self.ready.set()
+        if len(self.queue) >= self.queue_size:
+            self.space.clear()
+
+    async def run(self):
+        """Write out the queued batches until the subscriber disconnects or the queue is closed (None)."""
+        try:
+            while True:
+                await self.ready.wait()
+                if not self.connected:  # disconnected by the server
+                    return
+                batches = list(self.queue)
+                self.queue.clear()
+                self.ready.clear()
+                self.space.set()
+                done = batches[-1] is None
+                if done:
+                    batches.pop()
+                if batches:
+                    data = b"".join(batches)
+                    self.stream.write(data)
+                    await self.stream.drain()
+                    self.batches += len(batches)
+                    self.bytes += len(data)
+                if done:
+                    self.disconnect()
+                    await self.stream.wait_closed()
+                    return
+        except ConnectionError:
+            self.disconnect("connection lost")
+        finally:
+            self.disconnect()
+
+    def disconnect(self, reason=None):
+        if self.connected:
+            self.connected = False
+            self.lost = reason
+            self.space.set()  # a blocked producer moves on
+            self.stream.close()
+
+    def report(self):
+        lost = f", {self.lost}" if self.lost else ""
+        return (f"subscriber {self.name}: {self.batches} batches, {self.bytes / 1e6:.1f} MB, "
+                f"{self.dropped} batches dropped{lost}")
+
+
+class FanoutServer:
+    """A fanout+tcp://host:port or fanout+unix:///path server writing every batch to every subscriber
+    connected at the time. open() returns once subscribers subscribers are connected."""
+
+    def __init__(self, url, queue_size=QUEUE_SIZE, policy="drop", subscribers=0):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown policy {policy!r}, expected one of {', '.join(POLICIES)}")
+        self.url = url
+        self.queue_size = queue_size
+        self.policy = policy
+        self.min_subscribers = subscribers
+        self.subscribers = []
+        self.tasks = []
+        self.joined = asyncio.Event()
+        self.server = None
+        self.path = None
+
+    async def open(self):
+        if self.url.startswith("fanout+tcp://"):
+            self.server = await asyncio.start_server(self._subscribe, *split_address(self.url[len("fanout+tcp://"):]))
+        else:
+            self.path = self.url[len("fanout+unix://"):]
+            if os.path.exists(self.path) and stat.S_ISSOCK(os.stat(self.path).st_mode):
+                os.unlink(self.path)  # left over by a server that did not stop cleanly
+            self.server = await asyncio.start_unix_server(self._subscribe, self.path)
+        print(f"Serving on {self.url}", file=sys.stderr)
+        if self.min_subscribers:
+            print(f"Waiting for {self.min_subscribers} subscriber(s)", file=sys.stderr)
+            await self.joined.wait()
+
+    async def _subscribe(self, _, stream):
+        subscriber = Subscriber(len(self.subscribers) + 1, stream, self.queue_size)
+        self.subscribers.append(subscriber)
+        self.tasks.append(asyncio.create_task(subscriber.run()))
+        if len(self.subscribers) >= self.min_subscribers:
+            self.joined.set()
+
+    async def write(self, data):
+        for subscriber in self.subscribers:
+            if not subscriber.connected:
+                continue
+            if len(subscriber.queue) >= self.queue_size:
+                if self.policy == "drop":
+                    subscriber.queue.popleft()
+                    subscriber.dropped += 1
+                elif self.policy == "block":
+                    await subscriber.space.wait()
+                    if not subscriber.connected:
+                        continue
+                else:
+                    subscriber.disconnect("disconnected, its queue was full")
+                    continue
+            subscriber.put(data)
+        await asyncio.sleep(0)  # the subscribers' tasks write while the next batch is made
+
+    async def close(self):
+        if self.server is None:
+            return
+        self.server.close()
+        for subscriber in self.subscribers:
+            subscriber.queue.append(None)
+            subscriber.ready.set()
+        if self.tasks:
+            await asyncio.wait(self.tasks, timeout=CLOSE_TIMEOUT)
+            for subscriber, task in zip(self.subscribers, self.tasks):
+                if not task.done():
+                    subscriber.disconnect("cut off, it was still reading when the stream ended")
+                    task.cancel()
+        await self.server.wait_closed()
+        if self.path is not None and os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def report(self):
+        if not self.subscribers:
+            return "no subscribers"
+        return "\n".join(subscriber.report() for subscriber in self.subscribers)
+
+
+class HttpPostTransport:
+    """POSTs every batch to an http://host:port/path endpoint over a pool of keep-alive connections,
+    each opened when it is first needed."""
+
+    def __init__(self, url, connections=HTTP_CONNECTIONS, content_type="application/octet-stream"):
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme != "http":
+            raise ValueError(f"{url}: only http:// endpoints are supported")
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self.head = (f"POST {target} HTTP/1.1\r\nHost: {parts.netloc}\r\nContent-Type: {content_type}\r\n"
+                     "Content-Length: {}\r\n\r\n")
+        self.idle = asyncio.Queue()
+        for _ in range(connections):
+            self.idle.put_nowait(None)  # a free slot of the pool, connected on first use
+        self.requests = set()
+        self.sent = self.bytes = self.failed = 0
+        self.statuses = collections.Counter()
+
+    async def open(self):
+        await self.idle.get()  # fail now if nothing listens
+        self.idle.put_nowait(await asyncio.open_connection(self.host, self.port))
+
+    async def write(self, data):
+        connection = await self.idle.get()
+        request = asyncio.create_task(self._post(connection, data))
+        self.requests.add(request)
+        request.add_done_callback(self.requests.discard)
+
+    async def _post(self, connection, data):
+        message = self.head.format(len(data)).encode() + data
+        keep = False
+        try:
+            for retry in (connection is not None, False):  # a kept-alive connection may have been closed
+                try:
+                    if connection is None:
+                        connection = await asyncio.open_connection(self.host, self.port)
+                    reader, writer = connection
+                    writer.write(message)
+                    await writer.drain()
+                    status, keep = await read_response(reader)
+                    break
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    connection = close_connection(connection)
+                    if not retry:
+                        raise
+            self.statuses[status] += 1
+            self.sent += 1
+            self.bytes += len(data)
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            self.failed += 1
+        finally:
+            if not keep:
+                connection = close_connection(connection)
+            self.idle.put_nowait(connection)
+
+    async def close(self):
+        if self.requests:
+            await asyncio.wait(self.requests, timeout=CLOSE_TIMEOUT)
+        while not self.idle.empty():
+            close_connection(self.idle.get_nowait())
+
+    def report(self):
+        statuses = ", ".join(f"{count} x {status}" for status, count in sorted(self.statuses.items()))
+        return (f"{self.sent} POST requests, {self.bytes / 1e6:.1f} MB, {self.failed} failed"
+                + (f", responses {statuses}" if statuses else ""))
+
+
+def close_connection(connection):
+    if connection is not None:
+        connection[1].close()
+    return None
+
+
+async def read_response(reader):
+    """(status, keep-alive) of the HTTP/1.1 response read from reader, its body is skipped."""
+    status_line = await reader.readuntil(b"\r\n")
+    parts = status_line.split(None, 2)
+    if len(parts) < 2 or not parts[0].startswith(b"HTTP/"):
+        raise ValueError(f"not an HTTP response: {status_line[:80]!r}")
+    status = int(parts[1])
+    headers = {}
+    while (line := await reader.readuntil(b"\r\n")) != b"\r\n":
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip().lower()
+    keep = parts[0] != b"HTTP/1.0" and headers.get("connection") != "close"
+    if "chunked" in headers.get("transfer-encoding", ""):
+        while size := int((await reader.readuntil(b"\r\n")).split(b";")[0], 16):
+            await reader.readexactly(size + 2)
+        while await reader.readuntil(b"\r\n") != b"\r\n":  # trailers
+            pass
+    elif "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    elif status >= 200 and status not in (204, 304):
+        await reader.read()  # the body ends with the connection
+        keep = False
+    return status, keep
+
+
+def transport_for(output, queue_size=QUEUE_SIZE, policy="drop", subscribers=0, connections=HTTP_CONNECTIONS,
+                  content_type="application/octet-stream"):
+    """The transport of an output string (see the module docstring), the other arguments are the
+    options of the fanout server and of the HTTP sink."""
+    if output.startswith(("tcp://", "unix://")):
+        return StreamTransport(output)
+    if output.startswith(("fanout+tcp://", "fanout+unix://")):
+        return FanoutServer(output, queue_size, policy, subscribers)
+    if output.startswith(("http://", "https://")):
+        return HttpPostTransport(output, connections, content_type)
+    return FileTransport(output)
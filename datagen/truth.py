@@ -0,0 +1,111 @@
+"""
+Ground truth of the injected errors, to score cleaning pipelines for precision and recall.
+
+An ErrorLog records every corrupted cell of one part of a dataset while the part is generated, and
+writes a Parquet sidecar with a row per error:
+
+    row            int64, the row of the cell in the dataset file (0 is the first row after the header)
+    column         the column's name (dictionary encoded)
+    kind           "missing", "wrong_type" or "outlier" (dictionary encoded)
+    original       float64, the value before it was corrupted, for numeric columns
+    original_text  the value before it was corrupted, for text columns (dates, choices, ids)
+
+Cells are located by call order instead of being passed around: a row (or a batch of rows) corrupts
+its corrupted columns left to right, so the n-th corruption call of a part is column n % k of row
+n // k, with k corrupted columns. The hot path only appends a tuple per error (or hands over the
+numpy arrays of a whole column batch), the conversion to Arrow happens FLUSH_ERRORS errors at a
+time, which also bounds memory. Requires pyarrow.
+"""
+from datagen.sinks import import_pyarrow
+
+ERROR_KINDS = ("missing", "wrong_type", "outlier")
+MISSING, WRONG_TYPE, OUTLIER = range(3)
+FLUSH_ERRORS = 1_000_000  # errors buffered before a row group is written
+
+
+class ErrorLog:
+    """Errors of one part of a dataset, whose first row is first_row of the dataset. corrupted are
+    the indexes in header of the columns that go through the corruption function, in order.
+
+    Errors of single cells are appended to errors as (cell, kind, original) tuples, cell being the
+    number of the corruption call in the part; errors of column batches are given to add_batch.
+    """
+
+    def __init__(self, path, header, corrupted, first_row=0, flush_errors=FLUSH_ERRORS):
+        pa = self.pa = import_pyarrow()
+        self.header = pa.array(header, pa.string())
+        self.kind_names = pa.array(ERROR_KINDS, pa.string())
+        self.corrupted = corrupted
+        self.first_row = first_row
+        self.flush_errors = flush_errors
+        self.errors = []
+        self.batches = []
+        self.pending = 0  # errors in batches
+        self.calls = 0
+        self.batch_row = first_row
+        self.batch_size = 0
+        self.schema = pa.schema([
+            ("row", pa.int64()), ("column", pa.dictionary(pa.int16(), pa.string())),
+            ("kind", pa.dictionary(pa.int8(), pa.string())), ("original", pa.float64()),
+            ("original_text", pa.string()),
+        ])
+        self.writer = pa.parquet.ParquetWriter(path, self.schema)
+
+    def _batch(self, rows, columns, kinds, numbers=None, texts=None):
+        pa = self.pa
+        return pa.RecordBatch.from_arrays([
+            pa.array(rows, pa.int64()),
+            pa.DictionaryArray.from_arrays(columns, self.header),
+            pa.DictionaryArray.from_arrays(pa.array(kinds, pa.int8()), self.kind_names),
+            pa.nulls(len(rows), pa.float64()) if numbers is None else pa.array(numbers, pa.float64()),
+            pa.nulls(len(rows), pa.string()) if texts is None else pa.array(texts, pa.string()),
+        ], schema=self.schema)
+
+    def next_column(self, size):
+        """(column index, first row) of the next corruption call when each call corrupts a column
+        batch of size rows."""
+        slot = self.calls % len(self.corrupted)
+        if slot == 0 and self.calls:
+            self.batch_row += self.batch_size
+        self.calls += 1
+        self.batch_size = size
+        return self.corrupted[slot], self.batch_row
+
+    def add_batch(self, rows, column, kinds, originals):
+        """Record errors of one column: numpy arrays of their rows in the dataset, their kinds and
+        their original values (numbers, or strings for a text column)."""
+        columns = self.pa.repeat(self.pa.scalar(column, self.pa.int16()), len(rows))
+        if originals.dtype.kind in "biuf":
+            self.batches.append(self._batch(rows, columns, kinds, numbers=originals))
+        else:
+            self.batches.append(self._batch(rows, columns, kinds, texts=originals))
+        self.pending += len(rows)
+        if self.pending >= self.flush_errors:
+            self.flush()
+
+    def _cell_batch(self):
+        cells, kinds, originals = zip(*self.errors)
+        k = len(self.corrupted)
+        return self._batch([self.first_row + cell // k for cell in cells],
+                           self.pa.array([self.corrupted[cell % k] for cell in cells], self.pa.int16()), kinds,
+                           [None if isinstance(value, str) else value for value in originals],
+                           [value if isinstance(value, str) else None for value in originals])
+
+    def flush(self):
+        if self.errors:
+            self.batches.append(self._cell_batch())
+            self.errors.clear()  # the list is kept, recorders may hold on to it
+        if self.batches:
+            self.writer.write_table(self.pa.Table.from_batches(self.batches), row_group_size=self.flush_errors)
+        self.batches = []
+        self.pending = 0
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,105 @@
+"""
+Seismic volumes stored as raw, memory-mapped binary arrays.
+
+A volume is a directory holding volume.json (shape, sample interval, first inline/crossline and
+dtypes) and one file per array, in C order so every trace is contiguous on disk:
+
+    amplitude.f32         float32 (inlines, crosslines, samples), the traces
+    twt_ms.f32            float32 (samples,), two-way time of each sample
+    inline_number.i32     int32 (inlines, crosslines) grid
+    crossline_number.i32  int32 (inlines, crosslines) grid
+
+The arrays are numpy memmaps, so a volume far larger than memory is written and read one slice at a
+time, and several processes can fill disjoint inlines of the same files. The CSV view (one row per
+sample, like the seismic_data CSV) is derived lazily from the files, only when asked for. numpy is
+only imported when a volume is created or opened.
+"""
+import csv
+import json
+import os
+
+ARRAYS = {
+    "amplitude": ("amplitude.f32", "float32"),
+    "twt_ms": ("twt_ms.f32", "float32"),
+    "inline_number": ("inline_number.i32", "int32"),
+    "crossline_number": ("crossline_number.i32", "int32"),
+}
+CSV_HEADER = ["inline_number", "crossline_number", "twt_ms", "amplitude"]
+
+
+def import_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("seismic volumes require numpy (pip install numpy)") from None
+    return numpy
+
+
+class SeismicVolume:
+    """The memmapped arrays of a volume directory, see open_volume / create_volume."""
+
+    def __init__(self, directory, mode="r"):  # "w+" (re)creates the files, see create_volume
+        np = import_numpy()
+        self.directory = directory
+        with open(os.path.join(directory, "volume.json")) as f:
+            self.meta = json.load(f)
+        self.inlines, self.crosslines, self.samples = self.meta["shape"]
+        shapes = {"amplitude": (self.inlines, self.crosslines, self.samples), "twt_ms": (self.samples,),
+                  "inline_number": (self.inlines, self.crosslines),
+                  "crossline_number": (self.inlines, self.crosslines)}
+        for name, (filename, dtype) in ARRAYS.items():
+            setattr(self, name, np.memmap(os.path.join(directory, filename), dtype=dtype, mode=mode,
+                                          shape=shapes[name]))
+
+    def flush(self):
+        for name in ARRAYS:
+            getattr(self, name).flush()
+
+    def iter_rows(self, inlines=None, ndigits=2):
+        """Lazily yield [inline, crossline, twt_ms, amplitude] for every sample of the given inline
+        indexes (all by default), trace after trace. Missing samples (NaN) are None."""
+        np = import_numpy()
+        twt = np.round(self.twt_ms.astype(np.float64), ndigits).tolist()
+        for i in range(self.inlines) if inlines is None else inlines:
+            amplitude = np.round(self.amplitude[i].astype(np.float64), ndigits)
+            for j, trace in enumerate(amplitude.tolist()):
+                inline, crossline = int(self.inline_number[i, j]), int(self.crossline_number[i, j])
+                yield from ([inline, crossline, t, None if a != a else a] for t, a in zip(twt, trace))
+
+    def write_csv(self, path, inlines=None):
+        """Write the CSV view of the volume (or of some inlines) to path, one inline in memory at a
+        time. Returns the number of rows written."""
+        count = 0
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_HEADER)
+            for i in range(self.inlines) if inlines is None else inlines:
+                rows = list(self.iter_rows([i]))
+                writer.writerows(rows)
+                count += len(rows)
+        return count
+
+
+def create_volume(directory, inlines, crosslines, samples, sample_interval_ms=4.0, first_inline=1000,
+                  first_crossline=2000):
+    """Allocate the files of an empty volume (sparse where the filesystem allows), write its axes
+    and grids, and return it opened for writing. Existing files in directory are overwritten."""
+    np = import_numpy()
+    os.makedirs(directory, exist_ok=True)
+    meta = {"shape": [inlines, crosslines, samples], "sample_interval_ms": sample_interval_ms,
+            "first_inline": first_inline, "first_crossline": first_crossline,
+            "files": {name: {"path": filename, "dtype": dtype} for name, (filename, dtype) in ARRAYS.items()}}
+    with open(os.path.join(directory, "volume.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    volume = SeismicVolume(directory, "w+")
+    volume.twt_ms[:] = np.arange(samples, dtype=np.float32) * np.float32(sample_interval_ms)
+    volume.inline_number[:], volume.crossline_number[:] = np.meshgrid(
+        np.arange(first_inline, first_inline + inlines, dtype=np.int32),
+        np.arange(first_crossline, first_crossline + crosslines, dtype=np.int32), indexing="ij")
+    volume.flush()
+    return volume
+
+
+def open_volume(directory, mode="r"):
+    """Open an existing volume, mode "r+" to write into it (e.g. one inline range per process)."""
+    return SeismicVolume(directory, mode)
@@ -0,0 +1,83 @@
+"""
+Clean the dirty datasets into their reference clean counterparts and report the throughput, as the baseline
+to measure other cleaning pipelines against.
+
+Sentinels and blanks become nulls, dates become ISO dates, units are stripped and outliers are clipped to the
+valid range of their column. The rules of the five batch datasets come from their schemas in
+oil-and-gas-batch-data-generator.py, the ones of the places dataset are the ranges its generator draws from.
+A file is matched to its dataset by its header, so renamed files and generator output are cleaned as well.
+Requires pyarrow.
+"""
+import argparse
+import json
+import os
+
+from datagen.cleaning import Rule, clean_files, rules_from_table
+from datagen.quality import CHUNK_SIZE, SENTINELS, read_header
+from datagen.scripts import load_script
+from datagen.sinks import FORMATS
+
+SHIPPED_CSVS = ["wellbore_data.csv", "geophysical_logs.csv", "well_characterization.csv", "seismic_data.csv",
+                "production_data.csv"]
+# Batch columns whose range is not the low..high of their schema column
+BATCH_OVERRIDES = {"measured_depth_m": Rule("number", 0, 8000)}  # up to the deepest well of make_wells
+# The ranges of city_rows in wellbore-oil-dataset-generator-with-places.py, the other columns are text
+PLACES_RULES = {
+    "DEPTH_FT": Rule("integer", 100, 15000), "PRESSURE_PSI": Rule("number", 1000, 15000, unit=" PSI"),
+    "TEMPERATURE_F": Rule("integer", 50, 350), "DATE_LOGGED": Rule("date"), "LATITUDE": Rule("number", -90, 90),
+    "LONGITUDE": Rule("number", -180, 180), "POROSITY": Rule("number", 0.05, 0.3),
+    "PERMEABILITY": Rule("number", 0.01, 1000), "MUD_WEIGHT_PPG": Rule("number", 8.5, 10.0),
+    "CASING_SIZE_IN": Rule("number", 4.5, 20.0), "SPUD_DATE": Rule("date"), "COMPLETION_DATE": Rule("date"),
+    "LAST_INSPECTION": Rule("date"), "PRODUCTION_RATE_BBL": Rule("integer", 0, 5000),
+    "WATER_CUT_PERCENT": Rule("integer", 0, 100),
+}
+
+
+def dataset_rules():
+    """{header: (dataset name, rules)} of every dataset the generators write as CSV."""
+    batch = load_script("oil-and-gas-batch-data-generator.py")
+    places = load_script("wellbore-oil-dataset-generator-with-places.py")
+    datasets = {tuple(table.header): (name, rules_from_table(table, BATCH_OVERRIDES))
+                for name, table in batch.TABLES.items()}
+    datasets[tuple(places.header)] = ("places", [PLACES_RULES.get(name, Rule("text")) for name in places.header])
+    return datasets
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="*", default=SHIPPED_CSVS, metavar="CSV",
+                        help="CSV files to clean, e.g. wellbore_data_with_places.csv (default: the shipped datasets)")
+    parser.add_argument("--output-dir", default="clean", help="where the <name>_clean files are written")
+    parser.add_argument("--format", choices=list(FORMATS), default="csv")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--chunk-mb", type=float, default=CHUNK_SIZE / 1024 ** 2,
+                        help="MB of a file cleaned per task")
+    parser.add_argument("--sentinels", nargs="+", default=list(SENTINELS), help="error tokens that become nulls")
+    parser.add_argument("--json", metavar="PATH", help="also write the throughput numbers as JSON")
+    args = parser.parse_args()
+
+    datasets = dataset_rules()
+    jobs = []
+    for path in args.paths:
+        header, _ = read_header(path)
+        if tuple(header) not in datasets:
+            print(f"Skipping {path}: its header is not the one of a known dataset")
+            continue
+        name = os.path.splitext(os.path.basename(path))[0]
+        jobs.append((path, os.path.join(args.output_dir, f"{name}_clean{FORMATS[args.format]}"),
+                     datasets[tuple(header)][1]))
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    summaries = clean_files(jobs, args.workers, max(1, int(args.chunk_mb * 1024 ** 2)), args.format, args.sentinels)
+    for s in summaries:
+        print(f"{s['path']}: {s['rows']} rows, {s['bytes'] / 1e6:.1f} MB in {s['seconds']:.2f}s "
+              f"({s['mb_per_s']:.1f} MB/s, {s['rows_per_s']:,.0f} rows/s), {s['nulled']} nulled, "
+              f"{s['clipped']} clipped, {s['reformatted']} dates reformatted -> {s['output']}")
+    if summaries:
+        seconds = sum(s["seconds"] for s in summaries)
+        print(f"Total: {sum(s['rows'] for s in summaries)} rows, "
+              f"{sum(s['bytes'] for s in summaries) / 1e6 / seconds:.1f} MB/s with {args.workers} worker(s)")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"workers": args.workers, "format": args.format, "results": summaries}, f, indent=2)
+        print(f"Throughput written to {args.json}")
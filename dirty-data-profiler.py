@@ -0,0 +1,53 @@
+"""
+Profile the dirty CSV datasets: per column missing, sentinel, wrong-type and outlier counts, approximate
+quantiles and distinct counts, and the observed error rates next to the configured ones.
+
+Files are read in chunks on a process pool with bounded memory per column, so multi-GB outputs of the
+generators can be profiled as well as the shipped CSVs.
+"""
+import argparse
+import json
+
+from datagen.quality import CHUNK_SIZE, ERROR_KINDS, SENTINELS, profile_files
+
+SHIPPED_CSVS = ["wellbore_data.csv", "geophysical_logs.csv", "well_characterization.csv", "seismic_data.csv",
+                "production_data.csv"]
+# ERROR_PROB_MISSING / _WRONG_TYPE / _OUTLIER of oil-and-gas-batch-data-generator.py
+EXPECTED_RATES = {"missing": 0.05, "wrong_type": 0.05, "outlier": 0.05}
+
+
+def parse_expected(items):
+    expected = dict(EXPECTED_RATES)
+    for item in items or []:
+        kind, _, rate = item.partition("=")
+        if kind not in ERROR_KINDS:
+            raise ValueError(f"unknown error kind {kind!r}, expected one of {', '.join(ERROR_KINDS)}")
+        expected[kind] = float(rate)
+    return expected
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="*", default=SHIPPED_CSVS, metavar="CSV",
+                        help="CSV files to profile (default: the shipped datasets)")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--chunk-mb", type=float, default=CHUNK_SIZE / 1024 ** 2,
+                        help="MB of a file profiled per task")
+    parser.add_argument("--expected", nargs="+", metavar="KIND=RATE",
+                        help=f"configured error rates to compare with, any of {', '.join(ERROR_KINDS)} "
+                             f"(default: {', '.join(f'{k}={v}' for k, v in EXPECTED_RATES.items())})")
+    parser.add_argument("--sentinels", nargs="+", default=list(SENTINELS), help="error tokens counted per column")
+    parser.add_argument("--json", metavar="PATH", help="also write the full profile as JSON, e.g. to diff runs")
+    args = parser.parse_args()
+    try:
+        expected = parse_expected(args.expected)
+    except ValueError as error:
+        parser.error(str(error))
+
+    profiles = profile_files(args.paths, args.workers, max(1, int(args.chunk_mb * 1024 ** 2)), args.sentinels)
+    for profile in profiles:
+        print(profile.report(expected))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([profile.summary(expected) for profile in profiles], f, indent=2)
+        print(f"Profile written to {args.json}")
@@ -1,6 +1,27 @@
+import argparse
+import contextlib
 import csv
-import random
 import datetime
+import itertools
+import os
+import random
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from datagen.cache import GenerationCache, cache_key, code_version, remove_output
+from datagen.compress import CODECS
+from datagen.profiling import DatasetProfile, profiled
+from datagen.schema import Column, Table, compile_batches, compile_rows
+from datagen.seeding import derive_seed, new_seed, stream
+from datagen.sinks import FORMATS, MIXED, merge_files, open_sink
+from datagen.truth import MISSING, OUTLIER, WRONG_TYPE, ErrorLog
+from datagen.volume import create_volume, open_volume
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for ENGINE = "numpy"
+    np = None
 
 # Configuration parameters
 NUM_WELLS = 5  # number of wells to simulate
@@ -8,283 +29,863 @@ NUM_RECORDS_PER_WELL = 1000  # number of records per well per dataset
 ERROR_PROB_MISSING = 0.05  # 5% chance to produce a missing value (None)
 ERROR_PROB_WRONG_TYPE = 0.05  # 5% chance to produce a wrong data type/string error
 ERROR_PROB_OUTLIER = 0.05  # 5% chance to produce an outlier
-
-# Generate a list of wells with some basic attributes
-wells = []
-for i in range(NUM_WELLS):
-    well_id = f"WELL-{1000 + i}"
-    lat = 29.0 + random.uniform(-1, 1)
-    lon = -95.0 + random.uniform(-1, 1)
-    depth = random.randint(1500, 8000)  # approximate total well depth in meters
-    wells.append((well_id, lat, lon, depth))
+ENGINE = "python"  # "python" draws cell by cell, "numpy" draws whole columns per batch (much faster)
+BATCH_SIZE = 100_000  # max rows per batch for the numpy engine, and per Parquet/Arrow row group
+OUTPUT_FORMAT = "csv"  # "csv", "parquet" or "arrow" (Arrow IPC file), the last two require pyarrow
+MIXED_COLUMNS = "split"  # numeric columns with error strings: "split" (numbers + raw strings), "string" or "union"
+WRONG_TYPE_VALUES = ["ERROR", "N/A", "NULL", "XYZ"]
+COMPRESSION = None  # None, "gzip" or "zstd" (CSV only, zstd requires zstandard)
+COMPRESSION_LEVEL = None  # None for the codec's default
+COMPRESSION_THREADS = 1  # threads compressing each file while its rows are generated
+ERRORS_SIDECAR = False  # also write <name>.errors.parquet, the ground truth of every injected error (pyarrow)
+
+
+def make_wells(rng):
+    """Generate a list of wells with some basic attributes."""
+    wells = []
+    for i in range(NUM_WELLS):
+        well_id = f"WELL-{1000 + i}"
+        lat = 29.0 + rng.uniform(-1, 1)
+        lon = -95.0 + rng.uniform(-1, 1)
+        depth = rng.randint(1500, 8000)  # approximate total well depth in meters
+        wells.append((well_id, lat, lon, depth))
+    return wells
 
 
 def generate_timestamp_records(num_records, start_date=datetime.date(2010, 1, 1)):
     return [start_date + datetime.timedelta(days=d) for d in range(num_records)]
 
 
-def random_corrupt_value(value, is_numeric=True):
+def random_corrupt_value(value, is_numeric=True, rng=random):
     """Randomly introduce data quality issues."""
     # Chance to become missing
-    if random.random() < ERROR_PROB_MISSING:
+    if rng.random() < ERROR_PROB_MISSING:
         return None
 
     # Chance to become wrong type (e.g., string where a number is expected)
-    if is_numeric and random.random() < ERROR_PROB_WRONG_TYPE:
-        return random.choice(["ERROR", "N/A", "NULL", "XYZ"])
+    if is_numeric and rng.random() < ERROR_PROB_WRONG_TYPE:
+        return rng.choice(WRONG_TYPE_VALUES)
 
     # Chance to become an outlier
-    if is_numeric and random.random() < ERROR_PROB_OUTLIER:
+    if is_numeric and rng.random() < ERROR_PROB_OUTLIER:
         # Multiply by a large factor or add a large offset
         if isinstance(value, (int, float)):
-            return value * random.uniform(10, 1000)
+            return value * rng.uniform(10, 1000)
 
     return value
 
 
-def random_str_choice(choices):
-    return random.choice(choices)
+def random_str_choice(choices, rng=random):
+    return rng.choice(choices)
+
+
+# Vectorized engine: every helper below works on a whole column of a batch at once.
+def numpy_rng(seed=None):
+    if np is None:
+        raise RuntimeError('ENGINE = "numpy" requires numpy (pip install numpy)')
+    return np.random.default_rng(seed)
+
+
+def np_uniform(rng, low, high, size, ndigits):
+    return np.round(rng.uniform(low, high, size), ndigits)
+
+
+def np_choice(rng, choices, size):
+    return np.array(choices)[rng.integers(0, len(choices), size)]
+
+
+def np_dates(start_date, first_day, size):
+    days = np.arange(first_day, first_day + size)
+    return np.datetime_as_string(np.datetime64(start_date, "D") + days)
+
+
+def np_error_masks(rng, size, is_numeric=True):
+    """The missing, wrong-type and outlier masks of a column of size cells (None for the last two
+    of a text column), so each cell keeps the missing/wrong-type/outlier probabilities."""
+    missing = rng.random(size) < ERROR_PROB_MISSING
+    if not is_numeric:
+        return missing, None, None
+    wrong_type = ~missing & (rng.random(size) < ERROR_PROB_WRONG_TYPE)
+    outlier = ~missing & ~wrong_type & (rng.random(size) < ERROR_PROB_OUTLIER)
+    return missing, wrong_type, outlier
+
+
+def np_corrupt_column(rng, values, is_numeric=True, masks=None):
+    """Column version of random_corrupt_value, the error kinds are applied as boolean masks (drawn
+    by np_error_masks unless given)."""
+    missing, wrong_type, outlier = masks or np_error_masks(rng, len(values), is_numeric)
+    column = values.astype(object)
+    if is_numeric:
+        column[wrong_type] = np_choice(rng, WRONG_TYPE_VALUES, wrong_type.sum())
+        column[outlier] = (values[outlier] * rng.uniform(10, 1000, outlier.sum())).astype(object)
+    column[missing] = None
+    return column.tolist()
+
+
+def batch_bounds(num_records, first_record=0):
+    """Split one well's records into (first_record, size) batches of at most BATCH_SIZE rows."""
+    for first in range(first_record, first_record + num_records, BATCH_SIZE):
+        yield first, min(BATCH_SIZE, first_record + num_records - first)
 
 
 # 1. Wellbore Data (20 columns)
-# Columns: well_id, date, measured_depth_m, mud_weight_ppg, rop_m_per_hr, borehole_diameter_in,
-# fluid_loss_rate_ml_per_min, pump_pressure_psi, bit_type, operator_name, rig_id,
-# drilling_fluid_type, wellhead_pressure_psi, formation_pressure_psi, wob_kN, rpm, torque_ft_lbs,
-# standpipe_pressure_psi, direction_azimuth_deg, inclination_deg
+BIT_TYPES = ["PDC", "Roller Cone", "Diamond Impregnated"]
+OPERATORS = ["Schlumberger", "Halliburton", "Baker Hughes", "Nabors", "Weatherford"]
+RIG_IDS = ["RIG-1", "RIG-2", "RIG-3", "RIG-4", "RIG-5"]
+FLUID_TYPES = ["OBM", "WBM", "SOBM"]
+WELLBORE_START_DATE = datetime.date(2010, 1, 1)
+WELLBORE = Table("wellbore_data", [
+    Column("well_id", "key", errors=None),
+    Column("date", "date", start=WELLBORE_START_DATE, errors=None),
+    Column("measured_depth_m", "drilled", 5, 20),  # 5-20 m a day until the well's total depth
+    Column("mud_weight_ppg", "uniform", 8.5, 12.0, 2),
+    Column("rop_m_per_hr", "uniform", 5, 30, 2),
+    Column("borehole_diameter_in", "uniform", 8.5, 12.25, 2),
+    Column("fluid_loss_rate_ml_per_min", "uniform", 0, 50, 2),
+    Column("pump_pressure_psi", "uniform", 500, 5000, 2),
+    Column("bit_type", "choice", choices=BIT_TYPES),
+    Column("operator_name", "choice", choices=OPERATORS),
+    Column("rig_id", "choice", choices=RIG_IDS),
+    Column("drilling_fluid_type", "choice", choices=FLUID_TYPES),
+    Column("wellhead_pressure_psi", "uniform", 1000, 3000, 2),
+    Column("formation_pressure_psi", "uniform", 2000, 6000, 2),
+    Column("wob_kN", "uniform", 10, 200, 2),
+    Column("rpm", "uniform", 50, 200, 2),
+    Column("torque_ft_lbs", "uniform", 100, 10000, 2),
+    Column("standpipe_pressure_psi", "uniform", 500, 5000, 2),
+    Column("direction_azimuth_deg", "uniform", 0, 360, 2),
+    Column("inclination_deg", "uniform", 0, 90, 2),
+])
+WELLBORE_HEADER = WELLBORE.header
+wellbore_rows = compile_rows(WELLBORE, globals())
+wellbore_batches = compile_batches(WELLBORE, globals())
+
+
 def generate_wellbore_data():
-    bit_types = ["PDC", "Roller Cone", "Diamond Impregnated"]
-    operators = ["Schlumberger", "Halliburton", "Baker Hughes", "Nabors", "Weatherford"]
-    rig_ids = ["RIG-1", "RIG-2", "RIG-3", "RIG-4", "RIG-5"]
-    fluid_types = ["OBM", "WBM", "SOBM"]
-
-    with open("wellbore_data.csv", "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            "well_id", "date", "measured_depth_m", "mud_weight_ppg", "rop_m_per_hr", "borehole_diameter_in",
-            "fluid_loss_rate_ml_per_min", "pump_pressure_psi", "bit_type", "operator_name", "rig_id",
-            "drilling_fluid_type", "wellhead_pressure_psi", "formation_pressure_psi", "wob_kN", "rpm", "torque_ft_lbs",
-            "standpipe_pressure_psi", "direction_azimuth_deg", "inclination_deg"
-        ])
-
-        for well_id, lat, lon, total_depth in wells:
-            dates = generate_timestamp_records(NUM_RECORDS_PER_WELL)
-            current_depth = 0
-            for dt in dates:
-                current_depth += random.randint(5, 20)
-                if current_depth > total_depth:
-                    current_depth = total_depth
-                row = [
-                    well_id,
-                    dt.isoformat(),
-                    random_corrupt_value(current_depth),
-                    random_corrupt_value(round(random.uniform(8.5, 12.0), 2)),
-                    random_corrupt_value(round(random.uniform(5, 30), 2)),
-                    random_corrupt_value(round(random.uniform(8.5, 12.25), 2)),
-                    random_corrupt_value(round(random.uniform(0, 50), 2)),
-                    random_corrupt_value(round(random.uniform(500, 5000), 2)),
-                    random_corrupt_value(random_str_choice(bit_types), is_numeric=False),
-                    random_corrupt_value(random_str_choice(operators), is_numeric=False),
-                    random_corrupt_value(random_str_choice(rig_ids), is_numeric=False),
-                    random_corrupt_value(random_str_choice(fluid_types), is_numeric=False),
-                    random_corrupt_value(round(random.uniform(1000, 3000), 2)),
-                    random_corrupt_value(round(random.uniform(2000, 6000), 2)),
-                    random_corrupt_value(round(random.uniform(10, 200), 2)),
-                    random_corrupt_value(round(random.uniform(50, 200), 2)),
-                    random_corrupt_value(round(random.uniform(100, 10000), 2)),
-                    random_corrupt_value(round(random.uniform(500, 5000), 2)),
-                    random_corrupt_value(round(random.uniform(0, 360), 2)),
-                    random_corrupt_value(round(random.uniform(0, 90), 2))
-                ]
-                writer.writerow(row)
+    generate_datasets(["wellbore_data"])
 
 
 # 2. Geophysical Data (20 columns)
-# well_id, measured_depth_m, gamma_ray_api, resistivity_ohm_m, sonic_dt_us_ft,
-# density_g_cc, neutron_porosity, caliper_in, photoelectric_factor, shale_volume,
-# clay_content, water_saturation, hydrocarbon_saturation, permeability_md, velocity_m_s,
-# acoustic_impedance, formation_factor, bulk_modulus_GPa, shear_modulus_GPa, poisson_ratio
+GEOPHYSICAL = Table("geophysical_logs", [
+    Column("well_id", "key", errors=None),
+    Column("measured_depth_m", "stratified", precision=2),
+    Column("gamma_ray_api", "uniform", 20, 150, 2),
+    Column("resistivity_ohm_m", "uniform", 0.5, 200, 2),
+    Column("sonic_dt_us_ft", "uniform", 50, 120, 2),
+    Column("density_g_cc", "uniform", 1.9, 2.7, 3),
+    Column("neutron_porosity", "uniform", 0.05, 0.35, 3),
+    Column("caliper_in", "uniform", 8.5, 16, 2),
+    Column("photoelectric_factor", "uniform", 1, 5, 2),
+    Column("shale_volume", "uniform", 0.1, 0.8, 3),
+    Column("clay_content", "uniform", 0.1, 0.5, 3),
+    Column("water_saturation", "uniform", 0.2, 1.0, 3),
+    Column("hydrocarbon_saturation", "uniform", 0.2, 0.8, 3),
+    Column("permeability_md", "uniform", 0.1, 1000, 2),
+    Column("velocity_m_s", "uniform", 2000, 5000, 2),
+    Column("acoustic_impedance", "uniform", 5e6, 25e6, 2),
+    Column("formation_factor", "uniform", 1, 5, 2),
+    Column("bulk_modulus_GPa", "uniform", 10, 50, 2),
+    Column("shear_modulus_GPa", "uniform", 5, 30, 2),
+    Column("poisson_ratio", "uniform", 0.1, 0.4, 3),
+])
+GEOPHYSICAL_HEADER = GEOPHYSICAL.header
+geophysical_rows = compile_rows(GEOPHYSICAL, globals())
+geophysical_batches = compile_batches(GEOPHYSICAL, globals())
+
+
 def generate_geophysical_logs():
-    with open("geophysical_logs.csv", "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            "well_id", "measured_depth_m", "gamma_ray_api", "resistivity_ohm_m", "sonic_dt_us_ft",
-            "density_g_cc", "neutron_porosity", "caliper_in", "photoelectric_factor", "shale_volume",
-            "clay_content", "water_saturation", "hydrocarbon_saturation", "permeability_md", "velocity_m_s",
-            "acoustic_impedance", "formation_factor", "bulk_modulus_GPa", "shear_modulus_GPa", "poisson_ratio"
-        ])
-
-        for well_id, lat, lon, total_depth in wells:
-            depth_interval = total_depth / NUM_RECORDS_PER_WELL
-            for i in range(NUM_RECORDS_PER_WELL):
-                depth = i * depth_interval + random.uniform(0, depth_interval)
-                row = [
-                    well_id,
-                    random_corrupt_value(round(depth, 2)),
-                    random_corrupt_value(round(random.uniform(20, 150), 2)),
-                    random_corrupt_value(round(random.uniform(0.5, 200), 2)),
-                    random_corrupt_value(round(random.uniform(50, 120), 2)),
-                    random_corrupt_value(round(random.uniform(1.9, 2.7), 3)),
-                    random_corrupt_value(round(random.uniform(0.05, 0.35), 3)),
-                    random_corrupt_value(round(random.uniform(8.5, 16), 2)),
-                    random_corrupt_value(round(random.uniform(1, 5), 2)),
-                    random_corrupt_value(round(random.uniform(0.1, 0.8), 3)),
-                    random_corrupt_value(round(random.uniform(0.1, 0.5), 3)),
-                    random_corrupt_value(round(random.uniform(0.2, 1.0), 3)),
-                    random_corrupt_value(round(random.uniform(0.2, 0.8), 3)),
-                    random_corrupt_value(round(random.uniform(0.1, 1000), 2)),
-                    random_corrupt_value(round(random.uniform(2000, 5000), 2)),
-                    random_corrupt_value(round(random.uniform(5e6, 25e6), 2)),  # acoustic impedance
-                    random_corrupt_value(round(random.uniform(1, 5), 2)),
-                    random_corrupt_value(round(random.uniform(10, 50), 2)),
-                    random_corrupt_value(round(random.uniform(5, 30), 2)),
-                    random_corrupt_value(round(random.uniform(0.1, 0.4), 3))
-                ]
-                writer.writerow(row)
+    generate_datasets(["geophysical_logs"])
 
 
 # 3. Well Characterization (20 columns)
-# well_id, formation_name, porosity_frac, permeability_md, lithology, grain_density_g_cc, clay_volume_frac,
-# quartz_volume_frac, calcite_volume_frac, dolomite_volume_frac, formation_thickness_m, net_pay_m,
-# capillary_pressure_psi, fluid_contact_depth_m, reservoir_temperature_C, reservoir_pressure_psi,
-# oil_saturation_frac, gas_saturation_frac, water_saturation_frac, fracture_density
+FORMATIONS = ["Sandstone_A", "Shale_B", "Limestone_C", "Dolomite_D"]
+LITHOLOGIES = ["Sandstone", "Shale", "Limestone", "Dolomite"]
+WELL_CHARACTERIZATION = Table("well_characterization", [
+    Column("well_id", "key", errors=None),
+    Column("formation_name", "choice", choices=FORMATIONS),
+    Column("porosity_frac", "uniform", 0.05, 0.25, 3),
+    Column("permeability_md", "uniform", 0.1, 1000, 2),
+    Column("lithology", "lookup", choices=LITHOLOGIES, source="formation_name"),
+    Column("grain_density_g_cc", "uniform", 2.0, 2.7, 3),
+    Column("clay_volume_frac", "uniform", 0.1, 0.5, 3),
+    Column("quartz_volume_frac", "uniform", 0.2, 0.8, 3),
+    Column("calcite_volume_frac", "uniform", 0.0, 0.6, 3),
+    Column("dolomite_volume_frac", "uniform", 0.0, 0.4, 3),
+    Column("formation_thickness_m", "uniform", 10, 100, 2),
+    Column("net_pay_m", "uniform", 5, 50, 2),
+    Column("capillary_pressure_psi", "uniform", 100, 3000, 2),
+    Column("fluid_contact_depth_m", "uniform", 1500, 3500, 2),
+    Column("reservoir_temperature_C", "uniform", 50, 150, 2),
+    Column("reservoir_pressure_psi", "uniform", 2000, 6000, 2),
+    Column("oil_saturation_frac", "uniform", 0.2, 0.8, 3),
+    Column("gas_saturation_frac", "uniform", 0.0, 0.5, 3),
+    Column("water_saturation_frac", "uniform", 0.2, 1.0, 3),
+    Column("fracture_density", "uniform", 0, 10, 2),
+])
+WELL_CHARACTERIZATION_HEADER = WELL_CHARACTERIZATION.header
+well_characterization_rows = compile_rows(WELL_CHARACTERIZATION, globals())
+well_characterization_batches = compile_batches(WELL_CHARACTERIZATION, globals())
+
+
 def generate_well_characterization():
-    formations = ["Sandstone_A", "Shale_B", "Limestone_C", "Dolomite_D"]
-    lithologies = ["Sandstone", "Shale", "Limestone", "Dolomite"]
-
-    with open("well_characterization.csv", "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            "well_id", "formation_name", "porosity_frac", "permeability_md", "lithology",
-            "grain_density_g_cc", "clay_volume_frac", "quartz_volume_frac", "calcite_volume_frac",
-            "dolomite_volume_frac", "formation_thickness_m", "net_pay_m", "capillary_pressure_psi",
-            "fluid_contact_depth_m", "reservoir_temperature_C", "reservoir_pressure_psi",
-            "oil_saturation_frac", "gas_saturation_frac", "water_saturation_frac", "fracture_density"
-        ])
-
-        for well_id, lat, lon, total_depth in wells:
-            for i in range(NUM_RECORDS_PER_WELL):
-                formation = random.choice(formations)
-                lith = lithologies[formations.index(formation)]
-                row = [
-                    well_id,
-                    random_corrupt_value(formation, is_numeric=False),
-                    random_corrupt_value(round(random.uniform(0.05, 0.25), 3)),
-                    random_corrupt_value(round(random.uniform(0.1, 1000), 2)),
-                    random_corrupt_value(lith, is_numeric=False),
-                    random_corrupt_value(round(random.uniform(2.0, 2.7), 3)),
-                    random_corrupt_value(round(random.uniform(0.1, 0.5), 3)),
-                    random_corrupt_value(round(random.uniform(0.2, 0.8), 3)),
-                    random_corrupt_value(round(random.uniform(0.0, 0.6), 3)),
-                    random_corrupt_value(round(random.uniform(0.0, 0.4), 3)),
-                    random_corrupt_value(round(random.uniform(10, 100), 2)),
-                    random_corrupt_value(round(random.uniform(5, 50), 2)),
-                    random_corrupt_value(round(random.uniform(100, 3000), 2)),
-                    random_corrupt_value(round(random.uniform(1500, 3500), 2)),
-                    random_corrupt_value(round(random.uniform(50, 150), 2)),
-                    random_corrupt_value(round(random.uniform(2000, 6000), 2)),
-                    random_corrupt_value(round(random.uniform(0.2, 0.8), 3)),
-                    random_corrupt_value(round(random.uniform(0.0, 0.5), 3)),
-                    random_corrupt_value(round(random.uniform(0.2, 1.0), 3)),
-                    random_corrupt_value(round(random.uniform(0, 10), 2))
-                ]
-                writer.writerow(row)
-
-
-# 4. Seismic Data (20 columns)
-# seismic_line_id, shot_point, twt_ms, amplitude, frequency_hz, reflection_coefficient,
-# acoustic_impedance, velocity_m_s, quality_factor, offset_m, azimuth_deg, inclination_deg,
-# wavelet_type, gain_db, noise_level_db, processing_version, survey_name, inline_number, crossline_number, pol_frequency_hz
+    generate_datasets(["well_characterization"])
+
+
+# 4. Seismic Data (20 columns), one shard per seismic line instead of per well
+WAVELET_TYPES = ["Ricker", "Ormsby", "Klauder"]
+SURVEYS = ["Survey_A", "Survey_B", "Survey_C"]
+PROCESSING_VERSIONS = ["v1", "v2", "v3"]
+SEISMIC = Table("seismic_data", [
+    Column("seismic_line_id", "key"),
+    Column("shot_point", "sequence"),
+    Column("twt_ms", "uniform", 1000, 5000, 2),
+    Column("amplitude", "uniform", -1000, 1000, 2),
+    Column("frequency_hz", "uniform", 10, 60, 2),
+    Column("reflection_coefficient", "uniform", -1, 1, 4),
+    Column("acoustic_impedance", "uniform", 5e6, 25e6, 2),
+    Column("velocity_m_s", "uniform", 1500, 5000, 2),
+    Column("quality_factor", "uniform", 10, 100, 2),
+    Column("offset_m", "uniform", 100, 10000, 2),
+    Column("azimuth_deg", "uniform", 0, 360, 2),
+    Column("inclination_deg", "uniform", 0, 30, 2),
+    Column("wavelet_type", "choice", choices=WAVELET_TYPES),
+    Column("gain_db", "uniform", -10, 10, 2),
+    Column("noise_level_db", "uniform", -20, 20, 2),
+    Column("processing_version", "choice", choices=PROCESSING_VERSIONS),
+    Column("survey_name", "choice", choices=SURVEYS),
+    Column("inline_number", "integer", 1000, 2000),
+    Column("crossline_number", "integer", 2000, 3000),
+    Column("pol_frequency_hz", "uniform", 10, 50, 2),
+], shard="line")
+SEISMIC_HEADER = SEISMIC.header
+seismic_rows = compile_rows(SEISMIC, globals())
+seismic_batches = compile_batches(SEISMIC, globals())
+
+
 def generate_seismic_data():
-    line_ids = [f"LINE-{i}" for i in range(1, NUM_WELLS + 1)]
-    wavelet_types = ["Ricker", "Ormsby", "Klauder"]
-    surveys = ["Survey_A", "Survey_B", "Survey_C"]
-
-    with open("seismic_data.csv", "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            "seismic_line_id", "shot_point", "twt_ms", "amplitude", "frequency_hz", "reflection_coefficient",
-            "acoustic_impedance", "velocity_m_s", "quality_factor", "offset_m", "azimuth_deg", "inclination_deg",
-            "wavelet_type", "gain_db", "noise_level_db", "processing_version", "survey_name", "inline_number",
-            "crossline_number", "pol_frequency_hz"
-        ])
-
-        for line_id in line_ids:
-            for i in range(NUM_RECORDS_PER_WELL):
-                row = [
-                    random_corrupt_value(line_id, is_numeric=False),
-                    random_corrupt_value(i + 1),
-                    random_corrupt_value(round(random.uniform(1000, 5000), 2)),
-                    random_corrupt_value(round(random.uniform(-1000, 1000), 2)),
-                    random_corrupt_value(round(random.uniform(10, 60), 2)),
-                    random_corrupt_value(round(random.uniform(-1, 1), 4)),
-                    random_corrupt_value(round(random.uniform(5e6, 25e6), 2)),
-                    random_corrupt_value(round(random.uniform(1500, 5000), 2)),
-                    random_corrupt_value(round(random.uniform(10, 100), 2)),
-                    random_corrupt_value(round(random.uniform(100, 10000), 2)),
-                    random_corrupt_value(round(random.uniform(0, 360), 2)),
-                    random_corrupt_value(round(random.uniform(0, 30), 2)),
-                    random_corrupt_value(random_str_choice(wavelet_types), is_numeric=False),
-                    random_corrupt_value(round(random.uniform(-10, 10), 2)),
-                    random_corrupt_value(round(random.uniform(-20, 20), 2)),
-                    random_corrupt_value(f"v{random.randint(1, 3)}", is_numeric=False),
-                    random_corrupt_value(random_str_choice(surveys), is_numeric=False),
-                    random_corrupt_value(random.randint(1000, 2000)),
-                    random_corrupt_value(random.randint(2000, 3000)),
-                    random_corrupt_value(round(random.uniform(10, 50), 2))
-                ]
-                writer.writerow(row)
+    generate_datasets(["seismic_data"])
+
+
+# Seismic volume mode: survey-sized inline x crossline x sample grids of float32 traces, written to
+# memory-mapped files (datagen.volume) instead of one CSV row per sample. Requires numpy.
+SEISMIC_SAMPLE_INTERVAL_MS = 4.0
+SEISMIC_REFLECTOR_DENSITY = 0.05  # share of samples that are reflectors
+SEISMIC_NOISE = 0.02  # background noise, relative to the largest amplitude
+
+
+def seismic_traces(rng, crosslines, samples, sample_interval_ms=SEISMIC_SAMPLE_INTERVAL_MS):
+    """The float32 (crosslines, samples) traces of one inline: sparse random reflectivity convolved
+    with a Ricker wavelet of 10-60 Hz plus noise, scaled to +-1000. Dead traces (all NaN) and traces
+    with a spike come at the configured missing and outlier rates."""
+    reflectivity = rng.uniform(-1, 1, (crosslines, samples)) * (rng.random((crosslines, samples))
+                                                                < SEISMIC_REFLECTOR_DENSITY)
+    peak_hz = rng.uniform(10, 60)
+    frequencies = np.fft.rfftfreq(samples, sample_interval_ms / 1000)
+    ricker = (frequencies / peak_hz) ** 2 * np.exp(1 - (frequencies / peak_hz) ** 2)
+    traces = np.fft.irfft(np.fft.rfft(reflectivity, axis=1) * ricker, n=samples, axis=1)
+    traces += rng.normal(0, SEISMIC_NOISE * np.abs(traces).max(initial=1e-12), traces.shape)
+    traces *= 1000 / np.abs(traces).max(initial=1e-12)
+    spiked = np.flatnonzero(rng.random(crosslines) < ERROR_PROB_OUTLIER)
+    traces[spiked, rng.integers(0, samples, len(spiked))] *= rng.uniform(10, 1000, len(spiked))
+    traces[rng.random(crosslines) < ERROR_PROB_MISSING] = np.nan
+    return traces.astype(np.float32)
+
+
+def write_seismic_inlines(directory, first, last, seed):
+    """Fill inlines first..last - 1 of the volume in directory, each from its own derived seed."""
+    volume = open_volume(directory, "r+")
+    for i in range(first, last):
+        volume.amplitude[i] = seismic_traces(numpy_rng(derive_seed(seed, "seismic_volume", i)), volume.crosslines,
+                                             volume.samples, volume.meta["sample_interval_ms"])
+    volume.flush()
+
+
+def generate_seismic_volume(inlines, crosslines, samples, seed=None, workers=1, output_dir=".", csv_view=False):
+    """Generate an inlines x crosslines x samples volume into <output_dir>/seismic_volume/, on a
+    process pool when workers > 1, writing straight into the memmapped files (one inline in memory
+    per worker). The output is the same for a given seed whatever the number of workers. With
+    csv_view, the CSV view is then derived into <output_dir>/seismic_volume.csv. Returns the seed."""
+    numpy_rng()  # fail early without numpy
+    if seed is None:
+        seed = new_seed()
+    directory = os.path.join(output_dir, "seismic_volume")
+    volume = create_volume(directory, inlines, crosslines, samples, SEISMIC_SAMPLE_INTERVAL_MS)
+    step = max(1, -(-inlines // (workers * 4)))  # a few chunks per worker to even out the load
+    chunks = [(directory, first, min(first + step, inlines), seed) for first in range(0, inlines, step)]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(write_seismic_inlines, *zip(*chunks)))
+    else:
+        for chunk in chunks:
+            write_seismic_inlines(*chunk)
+    if csv_view:
+        volume.write_csv(os.path.join(output_dir, "seismic_volume.csv"))
+    return seed
 
 
 # 5. Production Data (20 columns)
-# well_id, date, oil_rate_bopd, gas_rate_mscfd, water_cut_frac, tubing_pressure_psi, casing_pressure_psi,
-# choke_size_64ths, gorp_factor, oil_gravity_api, produced_water_salinity_ppm, downhole_temperature_C,
-# downhole_pressure_psi, CO2_fraction, H2S_fraction, sand_production_rate_lbs_day,
-# ESP_current_amp, ESP_voltage_volts, pump_efficiency_frac, downtime_hours
+PRODUCTION_START_DATE = datetime.date(2021, 1, 1)
+PRODUCTION = Table("production_data", [
+    Column("well_id", "key", errors=None),
+    Column("date", "date", start=PRODUCTION_START_DATE),
+    Column("oil_rate_bopd", "uniform", 500, 3000, 1),
+    Column("gas_rate_mscfd", "uniform", 1000, 10000, 1),
+    Column("water_cut_frac", "uniform", 0.1, 0.5, 2),
+    Column("tubing_pressure_psi", "uniform", 1000, 5000, 2),
+    Column("casing_pressure_psi", "uniform", 500, 3000, 2),
+    Column("choke_size_64ths", "uniform", 8, 64, 1),
+    Column("gorp_factor", "uniform", 0.5, 2.0, 3),  # gorp_factor is fictional
+    Column("oil_gravity_api", "uniform", 20, 40, 1),
+    Column("produced_water_salinity_ppm", "uniform", 10000, 50000, 1),
+    Column("downhole_temperature_C", "uniform", 50, 120, 2),
+    Column("downhole_pressure_psi", "uniform", 2000, 6000, 2),
+    Column("CO2_fraction", "uniform", 0.0, 0.05, 3),
+    Column("H2S_fraction", "uniform", 0.0, 0.01, 3),
+    Column("sand_production_rate_lbs_day", "uniform", 0, 100, 2),
+    Column("ESP_current_amp", "uniform", 5, 100, 2),
+    Column("ESP_voltage_volts", "uniform", 100, 600, 2),
+    Column("pump_efficiency_frac", "uniform", 0.5, 1.0, 3),
+    Column("downtime_hours", "uniform", 0, 24, 2),
+])
+PRODUCTION_HEADER = PRODUCTION.header
+production_rows = compile_rows(PRODUCTION, globals())
+production_batches = compile_batches(PRODUCTION, globals())
+
+
 def generate_production_data():
-    with open("production_data.csv", "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            "well_id", "date", "oil_rate_bopd", "gas_rate_mscfd", "water_cut_frac", "tubing_pressure_psi",
-            "casing_pressure_psi",
-            "choke_size_64ths", "gorp_factor", "oil_gravity_api", "produced_water_salinity_ppm",
-            "downhole_temperature_C",
-            "downhole_pressure_psi", "CO2_fraction", "H2S_fraction", "sand_production_rate_lbs_day",
-            "ESP_current_amp", "ESP_voltage_volts", "pump_efficiency_frac", "downtime_hours"
-        ])
-
-        for well_id, lat, lon, total_depth in wells:
-            dates = generate_timestamp_records(NUM_RECORDS_PER_WELL, start_date=datetime.date(2021, 1, 1))
-            for dt in dates:
-                row = [
-                    well_id,
-                    random_corrupt_value(dt.isoformat(), is_numeric=False),
-                    random_corrupt_value(round(random.uniform(500, 3000), 1)),
-                    random_corrupt_value(round(random.uniform(1000, 10000), 1)),
-                    random_corrupt_value(round(random.uniform(0.1, 0.5), 2)),
-                    random_corrupt_value(round(random.uniform(1000, 5000), 2)),
-                    random_corrupt_value(round(random.uniform(500, 3000), 2)),
-                    random_corrupt_value(round(random.uniform(8, 64), 1)),
-                    random_corrupt_value(round(random.uniform(0.5, 2.0), 3)),  # gorp_factor is fictional
-                    random_corrupt_value(round(random.uniform(20, 40), 1)),
-                    random_corrupt_value(round(random.uniform(10000, 50000), 1)),
-                    random_corrupt_value(round(random.uniform(50, 120), 2)),
-                    random_corrupt_value(round(random.uniform(2000, 6000), 2)),
-                    random_corrupt_value(round(random.uniform(0.0, 0.05), 3)),
-                    random_corrupt_value(round(random.uniform(0.0, 0.01), 3)),
-                    random_corrupt_value(round(random.uniform(0, 100), 2)),
-                    random_corrupt_value(round(random.uniform(5, 100), 2)),
-                    random_corrupt_value(round(random.uniform(100, 600), 2)),
-                    random_corrupt_value(round(random.uniform(0.5, 1.0), 3)),
-                    random_corrupt_value(round(random.uniform(0, 24), 2))
-                ]
-                writer.writerow(row)
-
-
-# Generate all datasets
-generate_wellbore_data()
-generate_geophysical_logs()
-generate_well_characterization()
-generate_seismic_data()
-generate_production_data()
-
-print("Data generation complete! Check the CSV files in the current directory.")
+    generate_datasets(["production_data"])
+
+
+TABLES = {table.name: table for table in [WELLBORE, GEOPHYSICAL, WELL_CHARACTERIZATION, SEISMIC, PRODUCTION]}
+
+# name -> (header, per-shard row generator, per-shard numpy batch generator)
+DATASETS = {
+    "wellbore_data": (WELLBORE_HEADER, wellbore_rows, wellbore_batches),
+    "geophysical_logs": (GEOPHYSICAL_HEADER, geophysical_rows, geophysical_batches),
+    "well_characterization": (WELL_CHARACTERIZATION_HEADER, well_characterization_rows,
+                              well_characterization_batches),
+    "seismic_data": (SEISMIC_HEADER, seismic_rows, seismic_batches),
+    "production_data": (PRODUCTION_HEADER, production_rows, production_batches),
+}
+
+
+def column_types(name):
+    return TABLES[name].column_types()
+
+
+def dataset_shards(name, wells):
+    """A shard is one well, or one seismic line for the seismic dataset."""
+    if TABLES[name].shard == "line":
+        return [f"LINE-{i}" for i in range(1, NUM_WELLS + 1)]
+    return wells
+
+
+@contextlib.contextmanager
+def recorded_errors(name, path, first_row=0):
+    """Record every error injected into rows of dataset name in the with-block to the sidecar at path
+    (datagen.truth), the rows being numbered from first_row. Nothing is recorded when path is None.
+
+    Like in instrument_datasets, random_corrupt_value / np_corrupt_column are swapped for recording
+    versions for the duration of the block only, so the normal path pays nothing.
+    """
+    global random_corrupt_value, np_corrupt_column
+    if path is None:
+        yield
+        return
+    table = TABLES[name]
+    corrupted = [i for i, column in enumerate(table.columns) if column.errors is not None]
+    plain_corrupt_value, plain_corrupt_column = random_corrupt_value, np_corrupt_column
+    with ErrorLog(path, table.header, corrupted, first_row) as log:
+        cells = itertools.count()
+        errors = log.errors
+
+        def recorded_value(value, is_numeric=True, rng=random):
+            cell = next(cells)
+            result = plain_corrupt_value(value, is_numeric, rng)
+            if result is not value:
+                errors.append((cell, MISSING if result is None else WRONG_TYPE if isinstance(result, str) else OUTLIER,
+                               value))
+                if len(errors) >= log.flush_errors:
+                    log.flush()
+            return result
+
+        def recorded_column(rng, values, is_numeric=True, masks=None):
+            masks = masks or np_error_masks(rng, len(values), is_numeric)
+            column, first = log.next_column(len(values))
+            missing, wrong_type, outlier = masks
+            rows = np.flatnonzero(missing if wrong_type is None else missing | wrong_type | outlier)
+            kinds = (np.full(len(rows), MISSING, np.int8) if wrong_type is None else
+                     np.select([wrong_type[rows], outlier[rows]], [WRONG_TYPE, OUTLIER], MISSING).astype(np.int8))
+            log.add_batch(rows + first, column, kinds, values[rows])
+            return plain_corrupt_column(rng, values, is_numeric, masks)
+
+        random_corrupt_value, np_corrupt_column = recorded_value, recorded_column
+        try:
+            yield log
+        finally:
+            random_corrupt_value, np_corrupt_column = plain_corrupt_value, plain_corrupt_column
+
+
+def write_shard(name, shard, seed, engine, path, output_format="csv", mixed="split", options=None,
+                compression=None, compression_level=None, compression_threads=1, errors_path=None, first_row=0):
+    """Write one shard to path, options are extra keyword arguments of its row/batch generator. With
+    errors_path, the errors injected into it are recorded there, its rows numbered from first_row."""
+    header, rows, batches = DATASETS[name]
+    options = options or {}
+    with open_sink(path, header, output_format, types=column_types(name), row_group_size=BATCH_SIZE,
+                   mixed=mixed, compression=compression, compression_level=compression_level,
+                   compression_threads=compression_threads) as sink, recorded_errors(name, errors_path, first_row):
+        if engine == "numpy":
+            for columns in batches(numpy_rng(seed), shard, **options):
+                sink.write_columns(columns)
+        else:
+            sink.write_rows(rows(shard, rng=random.Random(seed), **options))
+    return path
+
+
+def iter_rows(name, seed=None, engine=None):
+    """Lazily yield the rows of a dataset, shard by shard, without touching disk.
+
+    For a given seed and engine the rows are the ones generate_datasets writes (with None for the
+    missing values), so e.g. itertools.islice(iter_rows("wellbore_data", seed=42), 1000) is the
+    first 1000 rows of the file generated with --seed 42.
+    """
+    header, rows, batches = DATASETS[name]
+    for shard_seed, shard in seeded_shards(name, seed):
+        if (engine or ENGINE) == "numpy":
+            for columns in batches(numpy_rng(shard_seed), shard):
+                yield from map(list, zip(*columns))
+        else:
+            yield from rows(shard, rng=random.Random(shard_seed))
+
+
+def iter_batches(name, seed=None, engine=None):
+    """Lazily yield a dataset as batches of at most BATCH_SIZE rows, each a list of columns in header
+    order, e.g. for pyarrow.RecordBatch.from_arrays or pandas.DataFrame(dict(zip(header, batch)))."""
+    header, rows, batches = DATASETS[name]
+    for shard_seed, shard in seeded_shards(name, seed):
+        if (engine or ENGINE) == "numpy":
+            yield from batches(numpy_rng(shard_seed), shard)
+        else:
+            shard_rows = rows(shard, rng=random.Random(shard_seed))
+            while batch := list(itertools.islice(shard_rows, BATCH_SIZE)):
+                yield [list(column) for column in zip(*batch)]
+
+
+def seeded_shards(name, seed=None):
+    """(shard seed, shard) pairs of a dataset, derived from the master seed like generate_datasets does."""
+    if seed is None:
+        seed = new_seed()
+    wells = make_wells(stream(seed, "wells", 0))
+    return [(derive_seed(seed, name, index), shard) for index, shard in enumerate(dataset_shards(name, wells))]
+
+
+def output_extension():
+    """Extension of the output files, e.g. ".csv" or ".csv.gz"."""
+    return FORMATS[OUTPUT_FORMAT] + (CODECS[COMPRESSION] if COMPRESSION else "")
+
+
+def dataset_config(name, partitioned=False):
+    """Everything besides the seed and the code that determines the output of one dataset."""
+    return {
+        "dataset": name, "num_wells": NUM_WELLS, "num_records_per_well": NUM_RECORDS_PER_WELL,
+        "error_prob_missing": ERROR_PROB_MISSING, "error_prob_wrong_type": ERROR_PROB_WRONG_TYPE,
+        "error_prob_outlier": ERROR_PROB_OUTLIER, "wrong_type_values": WRONG_TYPE_VALUES, "engine": ENGINE,
+        "batch_size": BATCH_SIZE, "output_format": OUTPUT_FORMAT, "mixed_columns": MIXED_COLUMNS,
+        "partitioned": partitioned, "compression": COMPRESSION, "compression_level": COMPRESSION_LEVEL,
+    }
+
+
+def generate_datasets(names=tuple(DATASETS), seed=None, workers=1, output_dir=".", partitioned=False,
+                      cache=None):
+    """Generate the named datasets shard by shard, on a process pool when workers > 1.
+
+    Every shard writes its own part file under <output_dir>/<name>/, seeded from the master seed,
+    so for a given seed the output is byte-identical whatever the number of workers. The parts are
+    merged into <output_dir>/<name>.<format> unless partitioned is set. Returns the master seed used.
+
+    With a GenerationCache and an explicit seed, datasets already generated with the same
+    configuration, seed and code are taken from the cache instead, and new ones are stored in it.
+    The cache is not used with ERRORS_SIDECAR: the sidecars (<output_dir>/<name>.errors.parquet, or
+    one per part when partitioned) are written in the same pass as the data.
+    """
+    extension = output_extension()
+    outputs = {name: name if partitioned else f"{name}{extension}" for name in names}
+    keys = {}
+    if cache is not None and seed is not None and not ERRORS_SIDECAR:
+        version = code_version(__file__)
+        for name in names:
+            keys[name] = cache_key("oil-and-gas-batch-data-generator", dataset_config(name, partitioned), seed,
+                                   version)
+        os.makedirs(output_dir, exist_ok=True)
+        names = [name for name in names if not cache.fetch(keys[name], output_dir, outputs[name])]
+    if seed is None:
+        seed = new_seed()
+    wells = make_wells(stream(seed, "wells", 0))
+
+    tasks = []
+    parts = {}
+    error_parts = {}
+    for name in names:
+        part_dir = os.path.join(output_dir, name)
+        remove_output(part_dir)
+        os.makedirs(part_dir)
+        parts[name] = []
+        error_parts[name] = []
+        for index, shard in enumerate(dataset_shards(name, wells)):
+            part_path = os.path.join(part_dir, f"part-{index:05d}{extension}")
+            parts[name].append(part_path)
+            errors_path = None
+            if ERRORS_SIDECAR:
+                errors_path = os.path.join(part_dir, f"part-{index:05d}.errors.parquet")
+                error_parts[name].append(errors_path)
+            tasks.append((name, shard, derive_seed(seed, name, index), ENGINE, part_path, OUTPUT_FORMAT,
+                          MIXED_COLUMNS, None, COMPRESSION, COMPRESSION_LEVEL, COMPRESSION_THREADS, errors_path,
+                          index * NUM_RECORDS_PER_WELL))  # every shard has NUM_RECORDS_PER_WELL rows
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(write_shard, *zip(*tasks)))
+    else:
+        for task in tasks:
+            write_shard(*task)
+
+    if not partitioned:
+        for name in names:
+            path = os.path.join(output_dir, f"{name}{extension}")
+            remove_output(path)  # may be a read-only link into the cache
+            merge_files(parts[name], path, OUTPUT_FORMAT)
+            errors_path = os.path.join(output_dir, f"{name}.errors.parquet")
+            remove_output(errors_path)  # stale ground truth of an earlier run
+            if ERRORS_SIDECAR:
+                merge_files(error_parts[name], errors_path, "parquet")
+            shutil.rmtree(os.path.join(output_dir, name))
+    for name in names:
+        if name in keys:
+            cache.store(keys[name], output_dir, outputs[name])
+    return seed
+
+
+def instrument_datasets(names=tuple(DATASETS), seed=None, engine=None, output_dir="."):
+    """Generate datasets like generate_datasets, but in this process and shard after shard, while
+    recording the cost of every column, of writing, and the errors injected per column.
+
+    random_corrupt_value / np_corrupt_column are swapped for counting versions for the duration of
+    the run, so the normal path pays nothing. The files are the ones generate_datasets writes for
+    the same seed. Prints a report per dataset and returns {name: DatasetProfile}.
+    """
+    global random_corrupt_value, np_corrupt_column
+    engine = engine or ENGINE
+    if seed is None:
+        seed = new_seed()
+    plain_corrupt_value, plain_corrupt_column = random_corrupt_value, np_corrupt_column
+    profile = None  # of the dataset being generated
+
+    def counted_value(value, is_numeric=True, rng=random):
+        entered = time.perf_counter()
+        result = plain_corrupt_value(value, is_numeric, rng)
+        left = time.perf_counter()
+        missing = result is None
+        wrong_type = is_numeric and isinstance(result, str) and not isinstance(value, str)
+        profile.record(entered, left, 1, is_numeric, missing, wrong_type,
+                       not missing and not wrong_type and result is not value)
+        return result
+
+    def counted_column(rng, values, is_numeric=True):
+        entered = time.perf_counter()
+        column = plain_corrupt_column(rng, values, is_numeric)
+        left = time.perf_counter()
+        wrong_type = outlier = 0
+        if is_numeric:
+            wrong_type = sum(isinstance(value, str) for value in column)
+            outlier = sum(value is not None and not isinstance(value, str) and value != raw
+                          for value, raw in zip(column, values.tolist()))
+        profile.record(entered, left, len(column), is_numeric, column.count(None), wrong_type, outlier)
+        return column
+
+    profiles = {}
+    random_corrupt_value, np_corrupt_column = counted_value, counted_column
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        for name in names:
+            header, rows, batches = DATASETS[name]
+            corrupted = [i for i, column in enumerate(TABLES[name].columns) if column.errors is not None]
+            profile = profiles[name] = DatasetProfile(name, header, corrupted)
+            path = os.path.join(output_dir, f"{name}{output_extension()}")
+            remove_output(path)
+            with open_sink(path, header, OUTPUT_FORMAT, types=column_types(name), row_group_size=BATCH_SIZE,
+                           mixed=MIXED_COLUMNS, compression=COMPRESSION, compression_level=COMPRESSION_LEVEL,
+                           compression_threads=COMPRESSION_THREADS) as sink:
+                for shard_seed, shard in seeded_shards(name, seed):
+                    if engine == "numpy":
+                        instrument_shard(profile, batches(numpy_rng(shard_seed), shard), sink.write_columns,
+                                         lambda columns: len(columns[0]))
+                    else:
+                        instrument_shard(profile, rows(shard, rng=random.Random(shard_seed)), sink.write_rows)
+    finally:
+        random_corrupt_value, np_corrupt_column = plain_corrupt_value, plain_corrupt_column
+
+    expected = {"missing": ERROR_PROB_MISSING, "wrong_type": ERROR_PROB_WRONG_TYPE, "outlier": ERROR_PROB_OUTLIER}
+    for profile in profiles.values():
+        print(profile.report(expected))
+    return profiles
+
+
+def instrument_shard(profile, source, write, size=None):
+    """Pull rows (or column batches, whose row count size() gives) one at a time from source,
+    and hand them to write BATCH_SIZE rows (or one batch) at a time, timing both sides."""
+    buffer = []
+    while True:
+        profile.start_row()
+        item = next(source, None)
+        if item is None:
+            break
+        profile.end_row(size(item) if size else 1)
+        if size is None:
+            buffer.append(item)
+            if len(buffer) < BATCH_SIZE:
+                continue
+        started = time.perf_counter()
+        write(buffer if size is None else item)
+        profile.write_seconds += time.perf_counter() - started
+        buffer = []
+    if buffer:
+        started = time.perf_counter()
+        write(buffer)
+        profile.write_seconds += time.perf_counter() - started
+
+
+# Time series that can be extended in place: name -> (start date, date column, column carried forward)
+APPENDABLE = {
+    "wellbore_data": (WELLBORE_START_DATE, "date", "measured_depth_m"),
+    "production_data": (PRODUCTION_START_DATE, "date", None),
+}
+
+
+def reversed_lines(path, chunk_size=1 << 16):
+    """Yield the lines of a file from the last to the first, reading it backwards in chunks."""
+    with open(path, "rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        rest = b""
+        while position > 0:
+            size = min(chunk_size, position)
+            position -= size
+            f.seek(position)
+            lines = (f.read(size) + rest).split(b"\n")
+            rest = lines.pop(0)  # may be the end of a line that starts in the previous chunk
+            for line in reversed(lines):
+                if line:
+                    yield line.decode()
+        if rest:
+            yield rest.decode()
+
+
+def parse_date(value):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:  # missing or corrupted
+        return None
+
+
+def parse_depth(value):
+    try:
+        return int(value)
+    except ValueError:  # missing, wrong type, or an outlier (outliers are floats)
+        return None
+
+
+def read_tail_state(name, path, well_ids):
+    """Find, reading from the end of an existing CSV, the last date of each well and for wellbore
+    data the depth it has been drilled to. Returns {well_id: (last date, depth)}, wells that are not
+    in the file are left out.
+
+    Rows of one well are consecutive days, so a corrupted date is recovered from the last valid one
+    and the number of rows after it. The true depth of rows whose depth is corrupted is lost, so the
+    depth is the last clean one plus the most a day can drill (the column's high) for every row after
+    it: a depth the well may have reached, and never less than one it has, so appended rows do not go
+    back up the well (the caller caps it at the well's total depth). Only the tail is read once every
+    well is found: after the first append the latest day of every well sits at the end of the file.
+    """
+    start_date, date_column, carried_column = APPENDABLE[name]
+    header = DATASETS[name][0]
+    date_index = header.index(date_column)
+    carried_index = None if carried_column is None else header.index(carried_column)
+    daily_high = None if carried_column is None else TABLES[name].columns[carried_index].high
+    pending = set(well_ids)
+    found = {}  # well_id -> [last date, rows after the last valid date, depth, rows after the last clean depth]
+    for line in reversed_lines(path):
+        row = next(csv.reader([line]))
+        if row == header:
+            break
+        well_id = row[0]
+        if well_id not in pending:
+            continue
+        state = found.setdefault(well_id, [None, 0, None, 0])
+        if state[0] is None:
+            date = parse_date(row[date_index])
+            if date is None:
+                state[1] += 1
+            else:
+                state[0] = date + datetime.timedelta(days=state[1])
+        if carried_index is not None and state[2] is None:
+            state[2] = parse_depth(row[carried_index])
+            if state[2] is None:
+                state[3] += 1
+        if state[0] is not None and (carried_index is None or state[2] is not None):
+            pending.discard(well_id)
+            if not pending:
+                break
+    if carried_index is not None:
+        for state in found.values():
+            state[2] = (state[2] or 0) + state[3] * daily_high
+    return {well_id: (date, depth) for well_id, (date, _, depth, _) in found.items() if date is not None}
+
+
+def append_datasets(names=tuple(APPENDABLE), days=1, seed=None, workers=1, output_dir="."):
+    """Extend existing CSV time series by the next days days of every well, without rewriting them.
+
+    The last date of each well (and the depth it has been drilled to) is read from the tail of
+    <output_dir>/<name>.csv. Wells come from the seed like in generate_datasets, so use the seed of
+    the original run; the new rows are drawn from streams derived from it and their first date, so
+    each appended day is reproducible too. Wells missing from the file start at the dataset's start
+    date. Returns the master seed used.
+    """
+    if seed is None:
+        seed = new_seed()
+    wells = make_wells(stream(seed, "wells", 0))
+
+    tasks = []
+    parts = {}
+    for name in names:
+        start_date, _, carried_column = APPENDABLE[name]
+        path = os.path.join(output_dir, f"{name}.csv")
+        tail = read_tail_state(name, path, [well[0] for well in wells])
+        if os.stat(path).st_nlink > 1:  # a read-only link into the generation cache, append to a copy
+            shutil.copyfile(path, path + ".tmp")
+            os.replace(path + ".tmp", path)
+        part_dir = os.path.join(output_dir, name)
+        remove_output(part_dir)
+        os.makedirs(part_dir)
+        parts[name] = []
+        for index, well in enumerate(wells):
+            last_date, depth = tail.get(well[0], (start_date - datetime.timedelta(days=1), None))
+            options = {"first_day": (last_date - start_date).days + 1, "num_records": days}
+            if carried_column is not None:
+                options["current_depth"] = min(depth or 0, well[3])
+            part_path = os.path.join(part_dir, f"part-{index:05d}.csv")
+            parts[name].append(part_path)
+            tasks.append((name, well, derive_seed(seed, name, index, options["first_day"]), ENGINE, part_path,
+                          "csv", "string", options))
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(write_shard, *zip(*tasks)))
+    else:
+        for task in tasks:
+            write_shard(*task)
+
+    for name in names:
+        merge_files(parts[name], os.path.join(output_dir, f"{name}.csv"), append=True)
+        shutil.rmtree(os.path.join(output_dir, name))
+    return seed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate oil and gas datasets with data quality issues.")
+    parser.add_argument("datasets", nargs="*", metavar="DATASET",
+                        help=f"datasets to generate, any of {', '.join(DATASETS)} (default: all)")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--seed", type=int, help="master seed, the same seed reproduces the same files")
+    parser.add_argument("--engine", choices=["python", "numpy"], default=ENGINE)
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument("--format", choices=list(FORMATS), default=OUTPUT_FORMAT)
+    parser.add_argument("--mixed", choices=MIXED, default=MIXED_COLUMNS,
+                        help="how numeric columns with error strings are stored in parquet and arrow files: split "
+                             "into a float64 column and a <name>_raw column of the error strings, as strings, or as "
+                             "a union (arrow only)")
+    parser.add_argument("--compress", choices=list(CODECS),
+                        help="compress the CSV files (zstd requires zstandard), in members that can be "
+                             "decompressed in parallel")
+    parser.add_argument("--compress-level", type=int, help="compression level (default: the codec's default)")
+    parser.add_argument("--compress-threads", type=int, default=COMPRESSION_THREADS,
+                        help="threads compressing each file while its rows are generated")
+    parser.add_argument("--errors-sidecar", action="store_true",
+                        help="also write <dataset>.errors.parquet with the row, column, kind and original value of "
+                             "every injected error, in the same pass (requires pyarrow)")
+    parser.add_argument("--partitioned", action="store_true",
+                        help="leave one part file per shard in <output-dir>/<dataset>/ instead of merging")
+    parser.add_argument("--cache-dir",
+                        help="reuse datasets generated before with the same config, --seed and code from this "
+                             "cache directory, and store new ones in it")
+    parser.add_argument("--cache-max-gb", type=float, default=10.0,
+                        help="size limit of the cache, least recently used datasets are evicted past it")
+    parser.add_argument("--append-days", type=int, metavar="N",
+                        help=f"append the next N days of every well to existing CSV files instead of regenerating "
+                             f"them, for {' and '.join(APPENDABLE)} (use the --seed of the original run)")
+    parser.add_argument("--instrument", action="store_true",
+                        help="report the cost of every column and of writing, and the errors injected per column "
+                             "(runs in this process, shard after shard)")
+    parser.add_argument("--seismic-volume", type=int, nargs=3, metavar=("INLINES", "CROSSLINES", "SAMPLES"),
+                        help="generate a seismic volume of float32 traces into <output-dir>/seismic_volume/ "
+                             "(memory-mapped binary files, requires numpy) instead of the datasets")
+    parser.add_argument("--volume-csv", action="store_true",
+                        help="with --seismic-volume, also derive seismic_volume.csv (one row per sample)")
+    parser.add_argument("--profile", choices=["cprofile", "sample"],
+                        help="run under cProfile (stats also saved to <output-dir>/profile.pstats) or a sampling "
+                             "profiler and print the hottest functions")
+    args = parser.parse_args()
+    for name in args.datasets:
+        if name not in DATASETS:
+            parser.error(f"unknown dataset {name!r}")
+    if args.mixed == "union" and args.format != "arrow":
+        parser.error("--mixed union is only supported with --format arrow")
+    if args.cache_dir is not None and args.seed is None:
+        parser.error("--cache-dir requires --seed, a random seed never produces the same dataset twice")
+    if args.append_days is not None:
+        if args.append_days < 1 or args.format != "csv" or args.partitioned or args.cache_dir:
+            parser.error("--append-days needs N >= 1 and works on merged CSV files only, without the cache")
+        for name in args.datasets:
+            if name not in APPENDABLE:
+                parser.error(f"{name} is not a time series, only {', '.join(APPENDABLE)} can be appended to")
+    if args.compress and (args.format != "csv" or args.append_days is not None):
+        parser.error("--compress applies to new CSV files only, not to --append-days or other formats")
+    if args.errors_sidecar and (args.append_days is not None or args.instrument or args.seismic_volume):
+        parser.error("--errors-sidecar applies to newly generated datasets, not to --append-days, --instrument "
+                     "or --seismic-volume")
+    if args.profile and args.workers > 1:
+        parser.error("--profile only sees this process, use it with --workers 1")
+    if args.seismic_volume is not None:
+        if min(args.seismic_volume) < 1 or args.datasets or args.append_days is not None:
+            parser.error("--seismic-volume needs sizes >= 1 and is used without datasets or --append-days")
+    elif args.volume_csv:
+        parser.error("--volume-csv is only used with --seismic-volume")
+
+    ENGINE = args.engine
+    OUTPUT_FORMAT = args.format
+    MIXED_COLUMNS = args.mixed
+    COMPRESSION = args.compress
+    COMPRESSION_LEVEL = args.compress_level
+    COMPRESSION_THREADS = args.compress_threads
+    ERRORS_SIDECAR = args.errors_sidecar
+    if args.append_days is not None:
+        seed = append_datasets(args.datasets or tuple(APPENDABLE), args.append_days, seed=args.seed,
+                               workers=args.workers, output_dir=args.output_dir)
+        print(f"Appended {args.append_days} day(s) (seed {seed}) to the csv files in '{args.output_dir}'.")
+        raise SystemExit
+    if args.seismic_volume is not None:
+        seed = generate_seismic_volume(*args.seismic_volume, seed=args.seed, workers=args.workers,
+                                       output_dir=args.output_dir, csv_view=args.volume_csv)
+        print(f"Seismic volume of {' x '.join(map(str, args.seismic_volume))} samples generated (seed {seed}) in "
+              f"'{os.path.join(args.output_dir, 'seismic_volume')}'.")
+        raise SystemExit
+    cache = None if args.cache_dir is None else GenerationCache(args.cache_dir, int(args.cache_max_gb * 1024 ** 3))
+    with profiled(args.profile, os.path.join(args.output_dir, "profile.pstats")):
+        if args.instrument:
+            seed = new_seed() if args.seed is None else args.seed
+            instrument_datasets(args.datasets or tuple(DATASETS), seed, output_dir=args.output_dir)
+        else:
+            seed = generate_datasets(args.datasets or tuple(DATASETS), seed=args.seed, workers=args.workers,
+                                     output_dir=args.output_dir, partitioned=args.partitioned, cache=cache)
+    if cache is not None:
+        print(f"Cache: {len(cache.hits)} hit(s), {len(cache.misses)} generated.")
+    print(f"Data generation complete (seed {seed})! Check the {args.format} files in '{args.output_dir}'.")
@@ -1,16 +1,33 @@
+import argparse
+import datetime
+import importlib
+import itertools
 import os
+import queue
 import random
-import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from datagen.compress import CODECS, compressed_path, open_compressed
+from datagen.dates import date_pool
+from datagen.schema import Column, Table, compile_sql_rows
+from datagen.seeding import new_seed, stream
 
 # Directory to store generated SQL files
 output_dir = "generated_big_data_sql_files"
-os.makedirs(output_dir, exist_ok=True)
 
 # Configuration
 NUM_WELLS = 10000  # Number of wells to simulate
 NUM_RECORDS_PER_WELL = 100  # Number of records per dataset
-well_ids = [f"WELL {i}" for i in range(1, NUM_WELLS)]
 ERROR_RATE = 0.40  # Probability of introducing errors
+SQL_MODE = "insert"  # "insert" (one statement per row), "multi-insert" or "copy" (PostgreSQL COPY ... FROM STDIN)
+BULK_MODES = {"multi-insert", "copy"}  # one transaction, the columns that get errors are declared TEXT
+INSERT_BATCH_SIZE = 1000  # rows per statement in "multi-insert" mode
+COMPRESSION = None  # None, "gzip" or "zstd" (requires zstandard), the files get a .gz / .zst extension
+COMPRESSION_LEVEL = None  # None for the codec's default
+COMPRESSION_THREADS = 1  # threads compressing a file while its rows are generated
+SINGLE_WRITER_DRIVERS = {"sqlite3"}  # drivers whose databases take one writer at a time, loaded table by table
 
 
 def random_date_range(start_date, end_date):
@@ -40,117 +57,167 @@ def wrong_date_format_numbers(date):
 
 
 years = [2010, 2011, 2012, 2013, 2014, 2015, 2016, 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024]
-days = random.randint(1, 28)
-month = random.randint(1, 12)
-date_format1 = str(years[random.randint(0, len(years) - 1)]) + "-" + str(days) + "-" + str(month)
-date_format2 = f"{str(month)}{"/"}{str(days)}{"/"}{str(years[random.randint(0, len(years) - 1)])} "
+
+
+def messed_up_dates(rng=random):
+    """The two badly formatted dates of a table, "yyyy-d-m" and "m/d/yyyy " (with a trailing space)."""
+    days = rng.randint(1, 28)
+    month = rng.randint(1, 12)
+    date_format1 = str(years[rng.randint(0, len(years) - 1)]) + "-" + str(days) + "-" + str(month)
+    date_format2 = f"{month}/{days}/{years[rng.randint(0, len(years) - 1)]} "
+    return [date_format1, date_format2]
+
+
+def iter_well_ids(num_wells=None):
+    """Lazily yield the well ids, NUM_WELLS - 1 of them by default."""
+    for i in range(1, num_wells or NUM_WELLS):
+        yield f"WELL {i}"
+
+
+def table_rng(seed, table_name):
+    """The random stream of one table: independent of the other tables for a given seed, or the
+    shared random module when no seed is given."""
+    return random if seed is None else stream(seed, table_name)
 
 
 # Helper Functions
-def random_value(val_range, is_float=False):
+def random_value(val_range, is_float=False, rng=random):
     """Generate random value with a chance of NULL or error."""
-    if random.random() < ERROR_RATE:
-        return random.choice(
-            ["NULL", "N/A", random.randint(9999999, 99999999)])  # Wrong data type or missing
-    return round(random.uniform(*val_range), 2) if is_float else random.randint(*val_range)
+    if rng.random() < ERROR_RATE:
+        return rng.choice(
+            ["NULL", "N/A", rng.randint(9999999, 99999999)])  # Wrong data type or missing
+    return round(rng.uniform(*val_range), 2) if is_float else rng.randint(*val_range)
 
 
-def random_date(start_date, days_range=365):
+def random_date(start_date, bad_dates, days_range=365, rng=random):
     """Generate random dates with chance of errors."""
-    if random.random() < ERROR_RATE:
-        return random.choice(["NULL", "INVALID_DATE", date_format1, date_format2])  # Messed-up dates
-    random_days = random.randint(0, days_range)
-    return (start_date + datetime.timedelta(days=random_days)).isoformat()
+    if rng.random() < ERROR_RATE:
+        return rng.choice(["NULL", "INVALID_DATE", *bad_dates])  # Messed-up dates
+    return date_pool(start_date, days_range).iso[rng.randint(0, days_range)]
 
 
 def format_sql_value(value):
     """Format value for SQL (e.g., wrap strings in quotes)."""
-    if value in ["NULL", "INVALID_DATE", "N/A"]:
+    if value == "NULL":
         return value
-    return f"'{value}'" if isinstance(value, str) else value
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return str(value)
+
+
+def format_copy_value(value):
+    """Format value for the text format of COPY ... FROM STDIN (tab separated, \\N for NULL)."""
+    if value == "NULL":
+        return "\\N"
+    if isinstance(value, str):
+        return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+    return str(value)
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, size)):
+        yield batch
+
+
+def write_sql_file(table_name, columns, rows, mode=SQL_MODE, batch_size=INSERT_BATCH_SIZE, directory=None):
+    """Write CREATE TABLE and the rows of table_name to <directory>/<table_name>.sql (output_dir by
+    default) as one INSERT per row, as multi-row INSERTs of batch_size rows, or as a COPY ... FROM
+    STDIN block. The bulk modes run in a single transaction, which one value its column's type rejects
+    would abort, so pass them the table's sql_columns(dirty=True). With COMPRESSION the file is
+    compressed while it is written, e.g. <table_name>.sql.gz."""
+    directory = directory or output_dir
+    os.makedirs(directory, exist_ok=True)
+    file_path = compressed_path(os.path.join(directory, f"{table_name}.sql"), COMPRESSION)
+    with open_compressed(file_path, "w", COMPRESSION, COMPRESSION_LEVEL, COMPRESSION_THREADS) as f:
+        f.write(f"CREATE TABLE {table_name} (\n    {', '.join(columns)}\n);\n\n")
+        if mode == "insert":
+            for row in rows:
+                f.write(f"INSERT INTO {table_name} VALUES ({', '.join(map(format_sql_value, row))});\n")
+        elif mode == "multi-insert":
+            f.write("BEGIN;\n")
+            for batch in batched(rows, batch_size):
+                values = ",\n".join(f"({', '.join(map(format_sql_value, row))})" for row in batch)
+                f.write(f"INSERT INTO {table_name} VALUES\n{values};\n")
+            f.write("COMMIT;\n")
+        elif mode == "copy":
+            column_names = ", ".join(column.split()[0] for column in columns)
+            f.write(f"BEGIN;\nCOPY {table_name} ({column_names}) FROM STDIN;\n")
+            for batch in batched(rows, batch_size):
+                f.write("".join("\t".join(map(format_copy_value, row)) + "\n" for row in batch))
+            f.write("\\.\nCOMMIT;\n")
+        else:
+            raise ValueError(f"unknown SQL mode {mode!r}, expected 'insert', 'multi-insert' or 'copy'")
+    return file_path
 
 
 # Dataset Generators
-def generate_wellbore_data():
-    table_name = "wellbore_data"
-    columns = [
-        "well_id TEXT", "date DATE", "measured_depth_m FLOAT", "mud_weight_ppg FLOAT",
-        "rop_m_per_hr FLOAT", "borehole_diameter_in FLOAT", "bit_type TEXT",
-        "pump_pressure_psi FLOAT", "rpm INT", "torque_ft_lbs FLOAT", "standpipe_pressure FLOAT",
-        "fluid_loss_rate FLOAT", "direction_azimuth_deg FLOAT", "inclination_deg FLOAT",
-        "formation_pressure_psi FLOAT", "wellhead_temperature FLOAT", "bit_wear_index FLOAT",
-        "drill_time_hours FLOAT", "block_height_m FLOAT", "well_status TEXT", "well_location TEXT"
-    ]
-    file_path = os.path.join(output_dir, f"{table_name}.sql")
-    with open(file_path, "w") as f:
-        f.write(f"CREATE TABLE {table_name} (\n    {', '.join(columns)}\n)\n\n")
-        start_date = datetime.date(2010, 1, 1)
-        for well_id in well_ids:
-            for _ in range(NUM_RECORDS_PER_WELL):
-                row = [
-                    format_sql_value(well_id),
-                    format_sql_value(random_date(start_date)),
-                    random_value((100, 5000), True),
-                    random_value((8.5, 12.0), True),
-                    random_value((5, 30), True),
-                    random_value((8.5, 12.25), True),
-                    random.choice(["PDC", "Roller Cone", "Diamond", "ERROR"]),
-                    random_value((500, 5000), True),
-                    random_value((50, 200)),
-                    random_value((100, 10000), True),
-                    random_value((500, 5000), True),
-                    random_value((0, 50), True),
-                    random_value((0, 360), True),
-                    random_value((0, 90), True),
-                    random_value((1000, 5000), True),
-                    random_value((20, 120), True),
-                    random_value((0, 1), True),
-                    random_value((0, 100), True),
-                    random_value((0, 50), True),
-                    random.choice(["Active", "Inactive", "Under Maintenance", "NULL"]),
-                    random.choice(["Dubai", "Texas", "Nigeria", "Calgary", "Mzarabani", "NULL"]),
-                ]
-                f.write(f"INSERT INTO {table_name} VALUES ({', '.join(map(str, row))});\n")
-
-
-def generate_geophysical_logs():
-    table_name = "geophysical_logs"
-    columns = [
-        "well_id TEXT", "depth_m FLOAT", "gamma_ray_api FLOAT", "resistivity_ohm_m FLOAT",
-        "sonic_dt_us_ft FLOAT", "density_g_cc FLOAT", "caliper_in FLOAT",
-        "neutron_porosity FLOAT", "bulk_modulus_gpa FLOAT", "shear_modulus_gpa FLOAT",
-        "poisson_ratio FLOAT", "velocity_m_s FLOAT", "shale_volume FLOAT",
-        "clay_content FLOAT", "water_saturation FLOAT", "hydrocarbon_saturation FLOAT",
-        "permeability_md FLOAT", "lithology TEXT", "wavelet_type TEXT", "survey_name TEXT"
-    ]
-    file_path = os.path.join(output_dir, f"{table_name}.sql")
-    with open(file_path, "w") as f:
-        f.write(f"CREATE TABLE {table_name} (\n    {', '.join(columns)}\n)\n\n")
-        for well_id in well_ids:
-            for _ in range(NUM_RECORDS_PER_WELL):
-                row = [
-                    format_sql_value(well_id),
-                    random_value((0, 5000), True),
-                    random_value((20, 150), True),
-                    random_value((0.5, 200), True),
-                    random_value((50, 120), True),
-                    random_value((1.9, 2.7), True),
-                    random_value((8.5, 16), True),
-                    random_value((0.05, 0.35), True),
-                    random_value((10, 50), True),
-                    random_value((5, 30), True),
-                    random_value((0.1, 0.4), True),
-                    random_value((1000, 5000), True),
-                    random_value((0.1, 0.8), True),
-                    random_value((0.1, 0.5), True),
-                    random_value((0.2, 1.0), True),
-                    random_value((0.2, 0.8), True),
-                    random_value((0.1, 1000), True),
-                    random.choice(["Sandstone", "Shale", "Limestone", "Dolomite", "INVALID"]),
-                    random.choice(["Ricker", "Ormsby", "Klauder", "INVALID"]),
-                    random.choice(["SurveyA", "SurveyB", "SurveyC", "ERROR"])
-                ]
-                f.write(f"INSERT INTO {table_name} VALUES ({', '.join(map(str, row))});\n")
+# The bad values of the categorical columns are among their choices, every other column gets the
+# random_value / random_date errors.
+WELLBORE = Table("wellbore_data", [
+    Column("well_id", "key", errors=None),
+    Column("date", "date", start=datetime.date(2010, 1, 1), errors="sql"),
+    Column("measured_depth_m", low=100, high=5000, errors="sql"),
+    Column("mud_weight_ppg", low=8.5, high=12.0, errors="sql"),
+    Column("rop_m_per_hr", low=5, high=30, errors="sql"),
+    Column("borehole_diameter_in", low=8.5, high=12.25, errors="sql"),
+    Column("bit_type", "choice", choices=["PDC", "Roller Cone", "Diamond", "ERROR"], errors=None),
+    Column("pump_pressure_psi", low=500, high=5000, errors="sql"),
+    Column("rpm", "integer", 50, 200, errors="sql"),
+    Column("torque_ft_lbs", low=100, high=10000, errors="sql"),
+    Column("standpipe_pressure", low=500, high=5000, errors="sql"),
+    Column("fluid_loss_rate", low=0, high=50, errors="sql"),
+    Column("direction_azimuth_deg", low=0, high=360, errors="sql"),
+    Column("inclination_deg", low=0, high=90, errors="sql"),
+    Column("formation_pressure_psi", low=1000, high=5000, errors="sql"),
+    Column("wellhead_temperature", low=20, high=120, errors="sql"),
+    Column("bit_wear_index", low=0, high=1, errors="sql"),
+    Column("drill_time_hours", low=0, high=100, errors="sql"),
+    Column("block_height_m", low=0, high=50, errors="sql"),
+    Column("well_status", "choice", choices=["Active", "Inactive", "Under Maintenance", "NULL"], errors=None),
+    Column("well_location", "choice", choices=["Dubai", "Texas", "Nigeria", "Calgary", "Mzarabani", "NULL"],
+           errors=None),
+])
+WELLBORE_COLUMNS = WELLBORE.sql_columns()
+wellbore_rows = compile_sql_rows(WELLBORE, globals())
+
+
+def generate_wellbore_data(mode=SQL_MODE, batch_size=INSERT_BATCH_SIZE, seed=None, directory=None):
+    rows = wellbore_rows(table_rng(seed, "wellbore_data"))
+    columns = WELLBORE.sql_columns(dirty=True) if mode in BULK_MODES else WELLBORE_COLUMNS
+    return write_sql_file("wellbore_data", columns, rows, mode, batch_size, directory)
+
+
+GEOPHYSICAL = Table("geophysical_logs", [
+    Column("well_id", "key", errors=None),
+    Column("depth_m", low=0, high=5000, errors="sql"),
+    Column("gamma_ray_api", low=20, high=150, errors="sql"),
+    Column("resistivity_ohm_m", low=0.5, high=200, errors="sql"),
+    Column("sonic_dt_us_ft", low=50, high=120, errors="sql"),
+    Column("density_g_cc", low=1.9, high=2.7, errors="sql"),
+    Column("caliper_in", low=8.5, high=16, errors="sql"),
+    Column("neutron_porosity", low=0.05, high=0.35, errors="sql"),
+    Column("bulk_modulus_gpa", low=10, high=50, errors="sql"),
+    Column("shear_modulus_gpa", low=5, high=30, errors="sql"),
+    Column("poisson_ratio", low=0.1, high=0.4, errors="sql"),
+    Column("velocity_m_s", low=1000, high=5000, errors="sql"),
+    Column("shale_volume", low=0.1, high=0.8, errors="sql"),
+    Column("clay_content", low=0.1, high=0.5, errors="sql"),
+    Column("water_saturation", low=0.2, high=1.0, errors="sql"),
+    Column("hydrocarbon_saturation", low=0.2, high=0.8, errors="sql"),
+    Column("permeability_md", low=0.1, high=1000, errors="sql"),
+    Column("lithology", "choice", choices=["Sandstone", "Shale", "Limestone", "Dolomite", "INVALID"], errors=None),
+    Column("wavelet_type", "choice", choices=["Ricker", "Ormsby", "Klauder", "INVALID"], errors=None),
+    Column("survey_name", "choice", choices=["SurveyA", "SurveyB", "SurveyC", "ERROR"], errors=None),
+])
+GEOPHYSICAL_COLUMNS = GEOPHYSICAL.sql_columns()
+geophysical_rows = compile_sql_rows(GEOPHYSICAL, globals())
+
+
+def generate_geophysical_logs(mode=SQL_MODE, batch_size=INSERT_BATCH_SIZE, seed=None, directory=None):
+    rows = geophysical_rows(table_rng(seed, "geophysical_logs"))
+    columns = GEOPHYSICAL.sql_columns(dirty=True) if mode in BULK_MODES else GEOPHYSICAL_COLUMNS
+    return write_sql_file("geophysical_logs", columns, rows, mode, batch_size, directory)
 
 
 # Add more datasets with similar structure
@@ -159,8 +226,155 @@ datasets = [
     generate_geophysical_logs,
 ]
 
-# Generate SQL Files
-for dataset_generator in datasets:
-    dataset_generator()
+# Tables for loading straight into a database: name -> (columns, row generator)
+tables = {
+    "wellbore_data": (WELLBORE_COLUMNS, wellbore_rows),
+    "geophysical_logs": (GEOPHYSICAL_COLUMNS, geophysical_rows),
+}
+
+
+def iter_rows(table_name, seed=None, num_wells=None):
+    """Lazily yield the rows of a table without writing anything, the same rows --seed writes."""
+    return tables[table_name][1](table_rng(seed, table_name), num_wells)
+
+
+# Direct database loading
+class ConnectionPool:
+    """Minimal DB-API connection pool: connections are opened on demand, up to max_size, and reused."""
+
+    def __init__(self, connect, max_size=4):
+        self.connect = connect
+        self.idle = queue.LifoQueue()
+        self.slots = queue.Queue()
+        for _ in range(max_size):
+            self.slots.put(None)
+        self.opened = []
+
+    @contextmanager
+    def connection(self):
+        self.slots.get()  # blocks while max_size connections are in use
+        try:
+            conn = self.idle.get_nowait()
+        except queue.Empty:
+            conn = self.connect()
+            self.opened.append(conn)
+        try:
+            yield conn
+        finally:
+            self.idle.put(conn)
+            self.slots.put(None)
+
+    def close(self):
+        for conn in self.opened:
+            conn.close()
+        self.opened.clear()
+
+
+def placeholders(paramstyle, count):
+    if paramstyle == "qmark":
+        return ", ".join("?" * count)
+    if paramstyle == "numeric":
+        return ", ".join(f":{i}" for i in range(1, count + 1))
+    if paramstyle == "named":
+        return ", ".join(f":p{i}" for i in range(count))
+    return ", ".join(["%s"] * count)  # format, pyformat
+
+
+def row_params(row, paramstyle):
+    params = [None if value == "NULL" else value for value in row]
+    if paramstyle == "named":
+        return {f"p{i}": value for i, value in enumerate(params)}
+    return params
+
+
+def load_table(pool, paramstyle, table_name, columns, rows, batch_size=INSERT_BATCH_SIZE):
+    """(Re)create table_name and insert rows with executemany, batch_size rows per call, in one
+    transaction on a pooled connection. Returns (row count, seconds of the insert phase)."""
+    insert = f"INSERT INTO {table_name} VALUES ({placeholders(paramstyle, len(columns))})"
+    count = 0
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
+        cursor.execute(f"CREATE TABLE {table_name} ({', '.join(columns)})")
+        start = time.perf_counter()
+        for batch in batched(rows, batch_size):
+            cursor.executemany(insert, [row_params(row, paramstyle) for row in batch])
+            count += len(batch)
+        conn.commit()
+        cursor.close()
+    return count, time.perf_counter() - start
+
+
+def load_database(connect, paramstyle, table_names=tuple(tables), batch_size=INSERT_BATCH_SIZE, seed=None,
+                  parallel=True):
+    """Generate the tables straight into a database, each on its own connection from a pool, all
+    tables in parallel, or one after another when the database takes one writer at a time (SQLite),
+    where parallel loads would only wait on each other's lock. Returns {table name: (row count,
+    seconds)}."""
+    pool = ConnectionPool(connect, max_size=len(table_names) if parallel else 1)
+    try:
+        with ThreadPoolExecutor(max_workers=len(table_names) if parallel else 1) as executor:
+            futures = {name: executor.submit(load_table, pool, paramstyle, name, tables[name][0],
+                                             tables[name][1](table_rng(seed, name)), batch_size)
+                       for name in table_names}
+            return {name: future.result() for name, future in futures.items()}
+    finally:
+        pool.close()
+
+
+def database_connector(driver, dsn):
+    """Return (connect function, paramstyle) for a DB-API driver module, e.g. sqlite3 or psycopg2."""
+    module = importlib.import_module(driver)
+    if driver == "sqlite3":
+        # pooled connections move between threads
+        return (lambda: module.connect(dsn, timeout=60, check_same_thread=False)), module.paramstyle
+    return (lambda: module.connect(dsn)), module.paramstyle
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate SQL files for big data datasets with quality issues.")
+    parser.add_argument("--mode", choices=["insert", "multi-insert", "copy"], default=SQL_MODE,
+                        help="one INSERT per row, multi-row INSERTs, or a PostgreSQL COPY block; the bulk modes "
+                             "declare the columns with errors TEXT so that they load in one transaction")
+    parser.add_argument("--batch-size", type=int, default=INSERT_BATCH_SIZE,
+                        help="rows per multi-row INSERT, or per executemany call with --database")
+    parser.add_argument("--wells", type=int, default=NUM_WELLS, help="number of wells to simulate")
+    parser.add_argument("--output-dir", default=output_dir)
+    parser.add_argument("--compress", choices=list(CODECS),
+                        help="compress the SQL files (zstd requires zstandard), in members that can be "
+                             "decompressed in parallel")
+    parser.add_argument("--compress-level", type=int, help="compression level (default: the codec's default)")
+    parser.add_argument("--compress-threads", type=int, default=COMPRESSION_THREADS,
+                        help="threads compressing each file while its rows are generated")
+    parser.add_argument("--database", metavar="DSN",
+                        help="load the tables straight into this database instead of writing SQL files "
+                             "(a file path for sqlite3)")
+    parser.add_argument("--driver", default="sqlite3", help="DB-API driver module used with --database")
+    parser.add_argument("--seed", type=int, help="master seed, the same seed reproduces the same tables")
+    parser.add_argument("--tables", nargs="+", choices=list(tables), default=list(tables),
+                        help="tables to generate (default: all), each has its own random stream")
+    args = parser.parse_args()
+    seed = new_seed() if args.seed is None else args.seed
+
+    output_dir = args.output_dir
+    NUM_WELLS = args.wells
+    COMPRESSION = args.compress
+    COMPRESSION_LEVEL = args.compress_level
+    COMPRESSION_THREADS = args.compress_threads
+
+    if args.database:
+        connect, paramstyle = database_connector(args.driver, args.database)
+        results = load_database(connect, paramstyle, args.tables, batch_size=args.batch_size, seed=seed,
+                                parallel=args.driver not in SINGLE_WRITER_DRIVERS)
+        for table_name, (count, seconds) in results.items():
+            print(f"{table_name}: {count} rows in {seconds:.2f}s ({count / seconds:.0f} rows/s)")
+        print(f"Seed: {seed}")
+        raise SystemExit
+
+    # Generate SQL Files
+    for dataset_generator in datasets:
+        if dataset_generator.__name__ in (f"generate_{table}" for table in args.tables):
+            dataset_generator(args.mode, args.batch_size, seed)
 
-print(f"SQL files for big data datasets with quality issues have been generated in the '{output_dir}' directory.")
+    print(f"SQL files for big data datasets with quality issues have been generated in the '{output_dir}' "
+          f"directory (seed {seed}).")
@@ -0,0 +1,11 @@
+import functools
+
+import pytest
+
+from datagen import scripts
+
+
+@pytest.fixture(scope="session")
+def load_script():
+    """load_script(filename) is the module of a script of the repository root, loaded once per session."""
+    return functools.cache(scripts.load_script)
@@ -0,0 +1,35 @@
+import csv
+
+import pytest
+
+
+@pytest.fixture
+def generator(load_script):
+    return load_script("oil-and-gas-batch-data-generator.py")
+
+
+def write_wellbore(generator, path, depths):
+    header = generator.DATASETS["wellbore_data"][0]
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for day, depth in enumerate(depths, 1):
+            row = [""] * len(header)
+            row[0], row[1], row[2] = "WELL-1000", f"2010-01-{day:02d}", depth
+            writer.writerow(row)
+
+
+def test_append_after_a_corrupted_depth_does_not_go_back_up_the_well(generator, tmp_path):
+    path = tmp_path / "wellbore_data.csv"
+    # a wrong type and an outlier after the last clean depth
+    write_wellbore(generator, path, ["100", "120", "ERROR", "1850.5"])
+    (last_date, depth), = generator.read_tail_state("wellbore_data", path, ["WELL-1000"]).values()
+    assert last_date.isoformat() == "2010-01-04"
+    assert depth == 120 + 2 * 20
+
+    generator.append_datasets(("wellbore_data",), days=5, seed=7, output_dir=tmp_path)
+    with open(path, newline="") as f:
+        rows = [row for row in csv.reader(f) if row[0] == "WELL-1000"][4:]
+    assert len(rows) == 5
+    appended = [generator.parse_depth(row[2]) for row in rows]
+    assert all(d > 140 for d in appended if d is not None)
@@ -0,0 +1,26 @@
+import os
+
+import pytest
+
+from datagen.cleaning import clean_files
+from datagen.quality import read_header
+from datagen.scripts import ROOT
+
+pytest.importorskip("pyarrow")
+
+
+def test_cleaned_files_do_not_depend_on_workers_or_chunks(load_script, tmp_path):
+    datasets = load_script("dirty-data-cleaner.py").dataset_rules()
+    outputs = {}
+    for workers, chunk_size in ((1, 64 * 1024 * 1024), (1, 30_000), (3, 30_000)):
+        jobs = []
+        for name in ("wellbore_data", "production_data"):
+            path = os.path.join(ROOT, f"{name}.csv")
+            rules = datasets[tuple(read_header(path)[0])][1]
+            jobs.append((path, str(tmp_path / f"{name}-{workers}-{chunk_size}.csv"), rules))
+        summaries = clean_files(jobs, workers, chunk_size)
+        assert [summary["rows"] for summary in summaries] == [5000, 5000]
+        outputs[workers, chunk_size] = [open(output, "rb").read() for _, output, _ in jobs]
+    whole, *chunked = outputs.values()
+    assert all(files == whole for files in chunked)
+    assert b"ERROR" not in whole[0] and b"N/A" not in whole[0]
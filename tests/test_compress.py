@@ -0,0 +1,44 @@
+import gzip
+import random
+
+import pytest
+
+from datagen.compress import CODECS, iter_decompressed, iter_members, open_compressed
+
+
+@pytest.fixture(params=list(CODECS))
+def codec(request):
+    if request.param == "zstd":
+        pytest.importorskip("zstandard")
+    return request.param
+
+
+def test_members_decompress_to_what_was_written_whatever_the_threads(codec, tmp_path):
+    rng = random.Random(3)
+    data = "".join(f"{rng.random()},{rng.choice(['ERROR', 'N/A', ''])}\n" for _ in range(20_000)).encode()
+    paths = []
+    for threads in (1, 3):
+        path = tmp_path / f"data-{threads}{CODECS[codec]}"
+        with open_compressed(str(path), "wb", threads=threads, chunk_size=10_000) as f:
+            f.write(data[:1000])
+            f.write(data[1000:])
+        with open_compressed(str(path), "ab", threads=threads, chunk_size=10_000) as f:
+            f.write(data)
+        paths.append(path)
+    assert paths[0].read_bytes() == paths[1].read_bytes()
+    assert len(list(iter_members(str(paths[0])))) > 2
+    assert b"".join(iter_decompressed(str(paths[0]), threads=3)) == data + data
+    if codec == "gzip":
+        assert gzip.decompress(paths[0].read_bytes()) == data + data
+
+
+def test_compressed_datasets_hold_the_uncompressed_bytes(load_script, tmp_path, monkeypatch):
+    generator = load_script("oil-and-gas-batch-data-generator.py")
+    plain, compressed = tmp_path / "plain", tmp_path / "compressed"
+    generator.generate_datasets(["wellbore_data", "seismic_data"], seed=9, output_dir=str(plain))
+    monkeypatch.setattr(generator, "COMPRESSION", "gzip")
+    monkeypatch.setattr(generator, "COMPRESSION_THREADS", 2)
+    generator.generate_datasets(["wellbore_data", "seismic_data"], seed=9, output_dir=str(compressed))
+    for name in ("wellbore_data", "seismic_data"):
+        with gzip.open(compressed / f"{name}.csv.gz", "rb") as f:
+            assert f.read() == (plain / f"{name}.csv").read_bytes()
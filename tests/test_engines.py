@@ -0,0 +1,37 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def generator(load_script):
+    return load_script("oil-and-gas-batch-data-generator.py")
+
+
+def error_rates(generator, name, engine):
+    """Missing rate of the uniform numeric columns, wrong-type rate among their non-missing cells and
+    outlier (out of range) rate among the rest, as DatasetProfile.error_rates counts them."""
+    columns = [(i, column) for i, column in enumerate(generator.TABLES[name].columns)
+               if column.kind == "uniform" and column.errors == "numeric"]
+    cells = missing = wrong_type = outlier = 0
+    for row in generator.iter_rows(name, seed=11, engine=engine):
+        for i, column in columns:
+            value = row[i]
+            cells += 1
+            if value is None:
+                missing += 1
+            elif isinstance(value, str):
+                wrong_type += 1
+            elif not column.low <= value <= column.high:
+                outlier += 1
+    return missing / cells, wrong_type / (cells - missing), outlier / (cells - missing - wrong_type)
+
+
+@pytest.mark.parametrize("name", ["production_data", "geophysical_logs"])
+def test_numpy_engine_injects_errors_at_the_python_engine_rates(generator, name):
+    configured = (generator.ERROR_PROB_MISSING, generator.ERROR_PROB_WRONG_TYPE, generator.ERROR_PROB_OUTLIER)
+    python = error_rates(generator, name, "python")
+    vectorized = error_rates(generator, name, "numpy")
+    for kind, expected, a, b in zip(("missing", "wrong_type", "outlier"), configured, python, vectorized):
+        assert abs(a - b) < 0.01, kind
+        assert abs(b - expected) < 0.015, kind
@@ -0,0 +1,27 @@
+import asyncio
+
+from datagen.eventlog import ENTRY, LogReader, LogWriter
+
+
+def test_played_log_is_the_recorded_payloads(tmp_path):
+    path = str(tmp_path / "burst.log")
+    payloads = [f'{{"n": {i}}}\n'.encode() * (i % 7 + 1) for i in range(2000)]
+    with LogWriter(path, "json", index_every=1024) as log:
+        log.append((1000.0 + i / 100, payload) for i, payload in enumerate(payloads[:1200]))
+    with LogWriter(path, "json", index_every=1024) as log:  # reopened, continues the log and its index
+        log.append((1000.0 + i / 100, payload) for i, payload in enumerate(payloads[1200:], 1200))
+    with LogReader(path) as log:
+        assert b"".join(data for _, _, data in log.play(speed=0)) == b"".join(payloads)
+        assert sum(count for _, count, _ in log.play(speed=0, batch_size=64)) == len(payloads)
+        window = [log.map[offset + ENTRY.size:offset + ENTRY.size + size]
+                  for _, offset, size in log.entries(1005.0, 1010.0)]
+        assert window == payloads[500:1000]
+
+
+def test_replay_writes_the_bytes_of_the_recorded_stream(load_script, tmp_path):
+    simulator = load_script("bmw-live-streaming-data-simulator.py")
+    live, replayed, log = tmp_path / "live.jsonl", tmp_path / "replayed.jsonl", str(tmp_path / "burst.log")
+    asyncio.run(simulator.run_fleet(5, 50, output=str(live), duration=0.5, seed=1, record=log))
+    records = asyncio.run(simulator.replay(log, output=str(replayed), speed=0))
+    assert records == live.read_bytes().count(b"\n") > 0
+    assert replayed.read_bytes() == live.read_bytes()
@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+
+
+@pytest.fixture
+def simulator(load_script):
+    return load_script("bmw-live-streaming-data-simulator.py")
+
+
+class SlowTransport:
+    """Takes 0.2 s per write, like a stalled consumer, and counts the records of every batch."""
+
+    def __init__(self):
+        self.batches = []
+
+    async def open(self):
+        pass
+
+    async def write(self, data):
+        self.batches.append(data.count(b"\n"))
+        await asyncio.sleep(0.2)
+
+    async def close(self):
+        pass
+
+    def report(self):
+        return None
+
+
+def test_a_slow_transport_holds_the_vehicles_back(simulator):
+    transport = SlowTransport()
+    stats = asyncio.run(simulator.run_fleet(50, 100, duration=1.5, batch_size=100, seed=1, transport=transport))
+    max_pending = simulator.BatchWriter.PENDING_BATCHES * 100
+    assert max(transport.batches) <= max_pending
+    assert stats.events <= sum(transport.batches) + 50  # at most one record per vehicle waited for room
+    assert stats.events < 50 * 100 * 1.5 / 2
@@ -0,0 +1,38 @@
+import csv
+import io
+import time
+
+import pytest
+
+from datagen.profiling import DatasetProfile, SamplingProfiler
+
+
+@pytest.fixture
+def generator(load_script):
+    return load_script("oil-and-gas-batch-data-generator.py")
+
+
+def test_calls_are_attributed_to_the_corrupted_columns():
+    profile = DatasetProfile("table", ["id", "depth", "status", "pressure"], corrupted=[1, 3])
+    profile.start_row()
+    profile.record(1.0, 1.5, 1, True, True, False, False)
+    profile.record(2.0, 2.5, 1, True, False, True, False)
+    profile.end_row()
+    assert profile.columns["depth"].missing == 1
+    assert profile.columns["pressure"].wrong_type == 1
+    assert profile.columns["id"].cells == profile.columns["status"].cells == 0
+
+
+def test_samples_are_broken_down_by_line_of_the_compiled_generator(generator):
+    profiler = SamplingProfiler(interval=0.002)
+    profiler.start()
+    try:
+        deadline = time.perf_counter() + 0.5
+        while time.perf_counter() < deadline:
+            csv.writer(io.StringIO()).writerows(generator.wellbore_rows(("WELL-1", 0.0, 0.0, 5000)))
+    finally:
+        profiler.stop()
+    compiled = sum(profiler.compiled.values())
+    assert compiled > profiler.samples / 2
+    assert any(inner.startswith("uniform ") for _, inner in profiler.compiled)
+    assert "<schema wellbore_data rows>:" in profiler.report()
@@ -0,0 +1,40 @@
+import bisect
+import csv
+import os
+
+from datagen.quality import profile_files
+from datagen.scripts import ROOT
+
+SHIPPED = os.path.join(ROOT, "wellbore_data.csv")
+EXACT = ("type", "cells", "missing", "sentinels", "wrong_type", "distinct", "min", "max")
+QUANTILES = {"p01": 0.01, "p25": 0.25, "p50": 0.5, "p75": 0.75, "p99": 0.99}
+
+
+def numbers(path, column):
+    values = []
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            try:
+                values.append(float(row[column]))
+            except ValueError:
+                pass
+    return sorted(values)
+
+
+def test_merged_chunk_profiles_match_the_whole_file_profile():
+    whole, = profile_files([SHIPPED])
+    merged, = profile_files([SHIPPED], workers=2, chunk_size=40_000)
+    whole, merged = whole.summary(), merged.summary()
+    assert whole["rows"] == merged["rows"] == 5000
+    for name, column in whole["columns"].items():
+        other = merged["columns"][name]
+        assert {key: column[key] for key in EXACT} == {key: other[key] for key in EXACT}, name
+        assert abs(column["outliers"] - other["outliers"]) <= 0.05 * max(column["outliers"], 20), name
+        if column["type"] != "numeric":
+            continue
+        values = numbers(SHIPPED, name)
+        for key, q in QUANTILES.items():  # the sketches differ, both stay within 2% in rank of the true quantile
+            for summary in (column, other):
+                low = bisect.bisect_left(values, summary[key]) / len(values)
+                high = bisect.bisect_right(values, summary[key]) / len(values)  # ties: capped depths
+                assert low - 0.02 < q < high + 0.02, (name, key)
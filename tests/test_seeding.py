@@ -0,0 +1,49 @@
+import csv
+import io
+import itertools
+
+from datagen.seeding import derive_seed, stream
+
+
+def first(rows, n=200):
+    return list(itertools.islice(rows, n))
+
+
+def test_streams_are_independent_and_reproducible():
+    assert derive_seed(42, "wellbore_data", 3) == derive_seed(42, "wellbore_data", 3)
+    assert derive_seed(42, "wellbore_data", 3) != derive_seed(42, "wellbore_data", 4)
+    assert stream(42, "vehicle", "BMW-00001").random() == stream(42, "vehicle", "BMW-00001").random()
+
+
+def test_batch_rows_are_the_rows_of_the_file_of_the_same_seed(load_script, tmp_path):
+    generator = load_script("oil-and-gas-batch-data-generator.py")
+    rows = first(generator.iter_rows("wellbore_data", seed=42))
+    assert rows == first(generator.iter_rows("wellbore_data", seed=42))
+    assert rows != first(generator.iter_rows("wellbore_data", seed=43))
+    generator.generate_datasets(["wellbore_data"], seed=42, output_dir=str(tmp_path))
+    with open(tmp_path / "wellbore_data.csv", newline="") as f:
+        lines = first(f, len(rows) + 1)[1:]
+    written = io.StringIO()
+    csv.writer(written).writerows(rows)
+    assert written.getvalue() == "".join(lines)
+
+
+def test_sql_tables_places_and_vehicles_are_reproducible(load_script):
+    sql = load_script("oil-and-gas-sql-data-generator.py")
+    for table in sql.tables:
+        assert first(sql.iter_rows(table, seed=7, num_wells=4)) == first(sql.iter_rows(table, seed=7, num_wells=4))
+        assert first(sql.iter_rows(table, seed=7, num_wells=4)) != first(sql.iter_rows(table, seed=8, num_wells=4))
+
+    places = load_script("wellbore-oil-dataset-generator-with-places.py")
+    cities = places.scaled_cities(3)
+    assert first(places.generate_rows(cities, seed=7)) == first(places.generate_rows(cities, seed=7))
+    assert first(places.generate_rows(cities, seed=7)) != first(places.generate_rows(cities, seed=8))
+
+    simulator = load_script("bmw-live-streaming-data-simulator.py")
+
+    def values(seed):
+        return [{key: value for key, value in record.items() if key != "timestamp"}
+                for record in first(simulator.iter_records("BMW-00001", seed=seed))]
+
+    assert values(7) == values(7)
+    assert values(7) != values(8)
@@ -0,0 +1,29 @@
+import datetime
+import re
+
+import pytest
+
+CHECKS = {"INT": int, "FLOAT": float, "DATE": datetime.date.fromisoformat, "TEXT": str}
+
+
+@pytest.fixture
+def sql(load_script):
+    return load_script("oil-and-gas-sql-data-generator.py")
+
+
+@pytest.mark.parametrize("table", ["wellbore_data", "geophysical_logs"])
+def test_copy_values_fit_the_declared_column_types(sql, table, tmp_path, monkeypatch):
+    """One value PostgreSQL cannot cast to its column's type aborts the whole COPY transaction."""
+    monkeypatch.setattr(sql, "NUM_WELLS", 11)
+    generate = {"wellbore_data": sql.generate_wellbore_data, "geophysical_logs": sql.generate_geophysical_logs}[table]
+    path = generate("copy", 100, seed=3, directory=str(tmp_path))
+    with open(path) as f:
+        text = f.read()
+    columns = re.search(r"CREATE TABLE \w+ \(\n    (.*)\n\);", text).group(1).split(", ")
+    types = [CHECKS[column.split()[1]] for column in columns]
+    rows = text.split(" FROM STDIN;\n", 1)[1].split("\\.\n", 1)[0].splitlines()
+    assert rows
+    for row in rows:
+        for check, value in zip(types, row.split("\t"), strict=True):
+            if value != "\\N":
+                check(value)
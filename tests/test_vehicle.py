@@ -0,0 +1,28 @@
+import statistics
+
+import pytest
+
+from datagen.seeding import stream
+
+
+@pytest.fixture
+def simulator(load_script):
+    return load_script("bmw-live-streaming-data-simulator.py")
+
+
+def mean_speed(simulator, dt, vehicles=10, seconds=1800):
+    speeds = []
+    for i in range(vehicles):
+        car = simulator.Vehicle(f"BMW-{i:05d}", stream(7, "vehicle", i))
+        for _ in range(round(seconds / dt)):
+            car.advance(dt)
+            speeds.append(car.speed)
+    return statistics.fmean(speeds), speeds.count(0.0) / len(speeds)
+
+
+def test_driving_does_not_depend_on_the_emission_rate(simulator):
+    slow, slow_stopped = mean_speed(simulator, 1.0)
+    fast, fast_stopped = mean_speed(simulator, 0.1)
+    assert 40 < slow < 150
+    assert abs(fast - slow) < 0.15 * slow
+    assert slow_stopped < 0.1 and fast_stopped < 0.1
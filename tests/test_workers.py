@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from datagen.scripts import ROOT
+
+GENERATOR = os.path.join(ROOT, "oil-and-gas-batch-data-generator.py")
+
+
+def generate(directory, *args):
+    subprocess.run([sys.executable, GENERATOR, "--seed", "5", "--output-dir", str(directory), *args], check=True,
+                   cwd=directory, capture_output=True)
+
+
+def read_files(directory):
+    return {os.path.relpath(os.path.join(root, name), directory): open(os.path.join(root, name), "rb").read()
+            for root, _, names in os.walk(directory) for name in names}
+
+
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+def test_datasets_do_not_depend_on_the_number_of_workers(tmp_path, engine):
+    if engine == "numpy":
+        pytest.importorskip("numpy")
+    one, three = tmp_path / "one", tmp_path / "three"
+    one.mkdir()
+    three.mkdir()
+    generate(one, "--engine", engine, "--workers", "1")
+    generate(three, "--engine", engine, "--workers", "3")
+    files = read_files(one)
+    assert sorted(files) == sorted(f"{name}.csv" for name in ("wellbore_data", "geophysical_logs",
+                                                               "well_characterization", "seismic_data",
+                                                               "production_data"))
+    assert files == read_files(three)
+
+
+def test_seismic_volume_does_not_depend_on_the_number_of_workers(tmp_path):
+    pytest.importorskip("numpy")
+    one, three = tmp_path / "one", tmp_path / "three"
+    one.mkdir()
+    three.mkdir()
+    generate(one, "--seismic-volume", "12", "8", "50", "--workers", "1", "--volume-csv")
+    generate(three, "--seismic-volume", "12", "8", "50", "--workers", "3", "--volume-csv")
+    files = read_files(one)
+    assert "seismic_volume.csv" in files and len(files) > 2
+    assert files == read_files(three)
@@ -2,9 +2,15 @@
 Note that the data generated is full of errors, and should not be used for any serious data analysis. It's meant
  for practical use.
 """
-import csv
+import argparse
+import itertools
 import random
-import datetime
+
+from datagen.compress import CODECS, compressed_path
+from datagen.dates import year_pool
+from datagen.ids import IdAllocator
+from datagen.seeding import derive_seed, new_seed, stream
+from datagen.sinks import FORMATS, MIXED, open_sink
 
 # Configuration
 output_file = "wellbore_data_with_places.csv"
@@ -22,43 +28,47 @@ cities = [
 ]
 min_wells_per_place = 2200
 max_wells_per_place = 2500
+well_id_space = None  # number of distinct well ids, None for places x max_wells_per_place
+duplicate_well_rate = 0.02  # 2% of wells reuse the id of an earlier well of the same place
 wrong_date_formats = ["MM/DD/YYYY", "DD-MM-YYYY", "INVALID_DATE", " "]
+# Wrong variants of a date: strftime formats are applied to the drawn date, the rest used as is
+wrong_dates = (
+    "%m/%d/%Y",  # MM/DD/YYYY
+    "%d-%m-%Y",  # DD-MM-YYYY
+    "31/02/2023",  # Invalid date
+    "NULL",  # Missing date
+)
+flush_rows = 10_000  # rows buffered before each write, bounds memory use whatever the row count
 
 
 # Helper Functions
-def random_date(start_year, end_year, include_wrong_format=False):
+def random_date(start_year, end_year, include_wrong_format=False, rng=random):
     """Generate a random date within the specified range, with optional wrong formats."""
-    start_date = datetime.date(start_year, 1, 1)
-    end_date = datetime.date(end_year, 12, 31)
-    random_days = random.randint(0, (end_date - start_date).days)
-    date = start_date + datetime.timedelta(days=random_days)
+    pool = year_pool(start_year, end_year)
+    random_days = rng.randint(0, pool.last)
 
-    if include_wrong_format and random.random() < 0.25:  # 15% chance for a wrong date format
-        return random.choice([
-            date.strftime("%m/%d/%Y"),  # MM/DD/YYYY
-            date.strftime("%d-%m-%Y"),  # DD-MM-YYYY
-            "31/02/2023",  # Invalid date
-            "NULL",  # Missing date
-        ])
-    return date.strftime("%Y-%m-%d")  # Default correct format
+    if include_wrong_format and rng.random() < 0.25:  # 15% chance for a wrong date format
+        wrong = rng.choice(wrong_dates)
+        return pool.strftime(random_days, wrong) if wrong.startswith("%") else wrong
+    return pool.iso[random_days]  # Default correct format, "%Y-%m-%d"
 
 
-def random_status():
-    return random.choice(["Active", "Inactive", "Maintenance", "Abandoned", "NULL", "ERROR"])
+def random_status(rng=random):
+    return rng.choice(["Active", "Inactive", "Maintenance", "Abandoned", "NULL", "ERROR"])
 
 
-def random_operator():
-    return random.choice(["Schlumberger", "Halliburton", "Baker Hughes", "Weatherford", "UNKNOWN", "ERROR"])
+def random_operator(rng=random):
+    return rng.choice(["Schlumberger", "Halliburton", "Baker Hughes", "Weatherford", "UNKNOWN", "ERROR"])
 
 
-def random_formation():
-    return random.choice(["Sandstone", "Shale", "Limestone", "Dolomite", "Granite", "UNKNOWN"])
+def random_formation(rng=random):
+    return rng.choice(["Sandstone", "Shale", "Limestone", "Dolomite", "Granite", "UNKNOWN"])
 
 
-def random_pressure():
-    if random.random() < 0.1:  # 10% chance of an error
-        return random.choice(["NULL", "ERROR", "N/A", random.randint(99999, 9999999)])
-    return f"{random.randint(1000, 15000)} PSI"
+def random_pressure(rng=random):
+    if rng.random() < 0.1:  # 10% chance of an error
+        return rng.choice(["NULL", "ERROR", "N/A", rng.randint(99999, 9999999)])
+    return f"{rng.randint(1000, 15000)} PSI"
 
 
 # Generate the CSV data
@@ -68,45 +78,140 @@ header = [
     "MUD_WEIGHT_PPG", "CASING_SIZE_IN", "CEMENT_TYPE", "SPUD_DATE", "COMPLETION_DATE",
     "LAST_INSPECTION", "PRODUCTION_RATE_BBL", "WATER_CUT_PERCENT"
 ]
-
-rows = []
-
-for place in cities:
+# Arrow/Parquet column types, every other column is a string
+column_types = {
+    "DEPTH_FT": "int64", "PRESSURE_PSI": "mixed", "TEMPERATURE_F": "int64", "LATITUDE": "float64",
+    "LONGITUDE": "float64", "POROSITY": "float64", "PERMEABILITY": "float64", "CASING_SIZE_IN": "float64",
+    "PRODUCTION_RATE_BBL": "int64", "WATER_CUT_PERCENT": "int64",
+}
+
+
+def city_rows(place, min_wells=min_wells_per_place, max_wells=max_wells_per_place, rng=random, well_ids=None,
+              first_index=0):
+    """Yield the rows of every well of one city, its wells being the well_ids indexes from first_index
+    on (max_wells are reserved per city). Without an allocator the city gets its own id space."""
     city, country = place["city"], place["country"]
-    num_wells = random.randint(min_wells_per_place, max_wells_per_place)
-    for i in range(num_wells):
-        well_id = f"WELL-{random.randint(1000, 9999)}-{city[:3].upper()}"
-        depth_ft = random.randint(100, 15000)
-        pressure_psi = random_pressure()
-        temperature_f = random.randint(50, 350)
-        date_logged = random_date(2015, 2023, include_wrong_format=True)
-        status = random_status()
-        latitude = round(random.uniform(-90, 90), 6)
-        longitude = round(random.uniform(-180, 180), 6)
-        operator = random_operator()
-        formation = random_formation()
-        porosity = round(random.uniform(0.05, 0.3), 5)
-        permeability = round(random.uniform(0.01, 1000), 6)
-        mud_weight_ppg = random.choice(["8.5", "9.0", "10.0", "ERROR", "N/A", "NULL"])
-        casing_size_in = round(random.uniform(4.5, 20.0), 2)
-        cement_type = random.choice(["Type I", "Type II", "Type III", "Type IV", "UNKNOWN"])
-        spud_date = random_date(2000, 2015, include_wrong_format=True)
-        completion_date = random_date(2015, 2023, include_wrong_format=True)
-        last_inspection = random_date(2020, 2023, include_wrong_format=True)
-        production_rate_bbl = random.randint(0, 5000)
-        water_cut_percent = random.randint(0, 100)
-
-        rows.append([
+    if well_ids is None:
+        well_ids = IdAllocator(max_wells, rng.getrandbits(64), duplicate_rate=duplicate_well_rate)
+    num_wells = rng.randint(min_wells, max_wells)
+    for i in range(first_index, first_index + num_wells):
+        well_id = f"WELL-{1000 + well_ids.next_id(i, rng, first_index)}-{city[:3].upper()}"
+        depth_ft = rng.randint(100, 15000)
+        pressure_psi = random_pressure(rng)
+        temperature_f = rng.randint(50, 350)
+        date_logged = random_date(2015, 2023, include_wrong_format=True, rng=rng)
+        status = random_status(rng)
+        latitude = round(rng.uniform(-90, 90), 6)
+        longitude = round(rng.uniform(-180, 180), 6)
+        operator = random_operator(rng)
+        formation = random_formation(rng)
+        porosity = round(rng.uniform(0.05, 0.3), 5)
+        permeability = round(rng.uniform(0.01, 1000), 6)
+        mud_weight_ppg = rng.choice(["8.5", "9.0", "10.0", "ERROR", "N/A", "NULL"])
+        casing_size_in = round(rng.uniform(4.5, 20.0), 2)
+        cement_type = rng.choice(["Type I", "Type II", "Type III", "Type IV", "UNKNOWN"])
+        spud_date = random_date(2000, 2015, include_wrong_format=True, rng=rng)
+        completion_date = random_date(2015, 2023, include_wrong_format=True, rng=rng)
+        last_inspection = random_date(2020, 2023, include_wrong_format=True, rng=rng)
+        production_rate_bbl = rng.randint(0, 5000)
+        water_cut_percent = rng.randint(0, 100)
+
+        yield [
             city, country, well_id, depth_ft, pressure_psi, temperature_f, date_logged, status,
             latitude, longitude, operator, formation, porosity, permeability, mud_weight_ppg,
             casing_size_in, cement_type, spud_date, completion_date, last_inspection,
             production_rate_bbl, water_cut_percent
-        ])
-
-# Write to CSV
-with open(output_file, mode="w", newline="") as file:
-    writer = csv.writer(file)
-    writer.writerow(header)
-    writer.writerows(rows)
-
-print(f"CSV file '{output_file}' with data for 10 cities and their wells has been generated.")
+        ]
+
+
+def generate_rows(places, min_wells=min_wells_per_place, max_wells=max_wells_per_place, seed=None, id_space=None,
+                  duplicate_rate=duplicate_well_rate):
+    """Lazily yield the rows of all places, one city at a time, so nothing is kept in memory.
+
+    With a seed every city draws from its own stream derived from the seed and its position, so a
+    city's rows do not depend on the cities before it.
+
+    Well ids are unique across all places (WELL-<1000 + id>-<city>, id < id_space, which defaults to
+    len(places) * max_wells), except for the duplicate_rate share of wells that deliberately reuse
+    the id of an earlier well of the same place.
+    """
+    id_space = id_space or well_id_space or len(places) * max_wells
+    if id_space < len(places) * max_wells:
+        raise ValueError(f"an id space of {id_space} cannot hold {len(places)} places of up to {max_wells} wells")
+    key = random.getrandbits(64) if seed is None else derive_seed(seed, "well_ids")
+    well_ids = IdAllocator(id_space, key, duplicate_rate=duplicate_rate)
+    for index, place in enumerate(places):
+        rng = random if seed is None else stream(seed, "places", index)
+        yield from city_rows(place, min_wells, max_wells, rng, well_ids, index * max_wells)
+
+
+def write_output(path, rows, output_format="csv", flush_rows=flush_rows, mixed="split", compression=None,
+                 compression_level=None, compression_threads=1):
+    """Stream rows to a CSV, Parquet or Arrow file, handing them to the sink flush_rows at a time.
+
+    Only one buffer of flush_rows rows is alive at any point (it is also the Parquet/Arrow row
+    group size), so peak memory does not depend on how many rows are written. A CSV file can be
+    gzip or zstd compressed on background threads. Returns the number of rows written.
+    """
+    count = 0
+    rows = iter(rows)
+    with open_sink(path, header, output_format, types=column_types, row_group_size=flush_rows, mixed=mixed,
+                   compression=compression, compression_level=compression_level,
+                   compression_threads=compression_threads) as sink:
+        while True:
+            buffer = list(itertools.islice(rows, flush_rows))
+            if not buffer:
+                break
+            sink.write_rows(buffer)
+            count += len(buffer)
+    return count
+
+
+def scaled_cities(num_cities):
+    """Repeat the configured cities until there are num_cities places, for load tests."""
+    return list(itertools.islice(itertools.cycle(cities), num_cities))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate wellbore data with places and data quality issues.")
+    parser.add_argument("--output", default=output_file)
+    parser.add_argument("--format", choices=list(FORMATS), default="csv",
+                        help="output format, parquet and arrow require pyarrow")
+    parser.add_argument("--mixed", choices=MIXED, default="split",
+                        help="how PRESSURE_PSI (numbers and error strings) is stored in parquet and arrow files: "
+                             "split into a float64 column and PRESSURE_PSI_raw, as strings, or as a union (arrow only)")
+    parser.add_argument("--compress", choices=list(CODECS),
+                        help="compress the CSV file (zstd requires zstandard), in members that can be "
+                             "decompressed in parallel")
+    parser.add_argument("--compress-level", type=int, help="compression level (default: the codec's default)")
+    parser.add_argument("--compress-threads", type=int, default=1,
+                        help="threads compressing the file while its rows are generated")
+    parser.add_argument("--cities", type=int, default=len(cities),
+                        help="number of places, the configured cities are repeated to reach it")
+    parser.add_argument("--min-wells", type=int, default=min_wells_per_place)
+    parser.add_argument("--max-wells", type=int, default=max_wells_per_place)
+    parser.add_argument("--flush-rows", type=int, default=flush_rows,
+                        help="rows buffered before each write")
+    parser.add_argument("--seed", type=int, help="master seed, the same seed reproduces the same file")
+    parser.add_argument("--id-space", type=int, default=well_id_space,
+                        help="number of distinct well ids (default: cities x max wells), ids are unique within it")
+    parser.add_argument("--duplicate-rate", type=float, default=duplicate_well_rate,
+                        help="share of wells that reuse the id of an earlier well of the same city")
+    args = parser.parse_args()
+    if args.mixed == "union" and args.format != "arrow":
+        parser.error("--mixed union is only supported with --format arrow")
+    if args.compress and args.format != "csv":
+        parser.error("--compress is only supported with --format csv")
+    if not 0 <= args.duplicate_rate < 1:
+        parser.error("--duplicate-rate must be in [0, 1)")
+    if args.id_space is not None and args.id_space < args.cities * args.max_wells:
+        parser.error(f"--id-space must hold at least --cities x --max-wells = {args.cities * args.max_wells} ids")
+
+    seed = new_seed() if args.seed is None else args.seed
+    places = scaled_cities(args.cities)
+    rows = generate_rows(places, args.min_wells, args.max_wells, seed, args.id_space, args.duplicate_rate)
+    output = compressed_path(args.output, args.compress)
+    count = write_output(output, rows, args.format, args.flush_rows, args.mixed, args.compress, args.compress_level,
+                         args.compress_threads)
+    print(f"{args.format.upper()} file '{output}' with {count} wells in {len(places)} cities has been generated "
+          f"(seed {seed}).")